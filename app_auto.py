@@ -14,6 +14,7 @@ from dotenv import load_dotenv
 from src.script_generator import ScriptGenerator
 from src.browser_automation.flow_controller import FlowController
 from src.video_assembler import VideoAssembler
+from src.video_processor.probe_cache import PROBE_CACHE_FILENAME
 
 # Load environment
 load_dotenv()
@@ -166,45 +167,40 @@ Thành công: {success_count}/{num_scenes} video
         progress(0.7, desc="📥 Đang tải video...")
         yield f"📥 Bước 3/4: Đang tải {success_count} video về máy...", None, None
 
-        downloaded_files = []
-        for i, result in enumerate(video_results):
-            if result['status'] != 'success' or not result['url']:
-                continue
-
-            scene_num = result['scene']
-            progress((0.7 + (i / num_scenes) * 0.2), desc=f"📥 Tải scene {scene_num}")
+        ready = [r for r in video_results if r['status'] == 'success' and r['url']]
+        items = [
+            {
+                'filename': f"scene_{r['scene']:03d}.mp4",
+                'prompt_text': script['scenes'][r['scene'] - 1]['veo_prompt']
+            }
+            for r in ready
+        ]
 
-            try:
-                # Download with 1080p upscale
-                filename = f"scene_{scene_num:03d}.mp4"
-                filepath = await controller.download_video_from_ui(
-                    video_url=result['url'],
-                    quality="1080p",  # Try 1080p first
-                    filename=filename
+        downloaded_files = []
+        try:
+            # Request every 1080p upscale at once, download each as it finishes
+            paths = await controller.download_videos_from_ui(items, quality="1080p")
+
+            # Try 720p fallback for the ones that failed
+            failed = [i for i, path in enumerate(paths) if not path]
+            if failed:
+                fallback = await controller.download_videos_from_ui(
+                    [items[i] for i in failed],
+                    quality="720p"
                 )
+                for i, path in zip(failed, fallback):
+                    paths[i] = path
 
-                if filepath and os.path.exists(filepath):
-                    downloaded_files.append(filepath)
+            for result, item, path in zip(ready, items, paths):
+                if path and os.path.exists(path):
+                    downloaded_files.append(path)
                     yield f"""📥 Bước 3/4: Đang tải video...
 
-Scene {scene_num}: ✅ Downloaded (1080p)
-File: {filename}""", None, None
-                else:
-                    # Try 720p fallback
-                    filepath = await controller.download_video_from_ui(
-                        video_url=result['url'],
-                        quality="720p",
-                        filename=filename
-                    )
-                    if filepath:
-                        downloaded_files.append(filepath)
-                        yield f"""📥 Bước 3/4: Đang tải video...
+Scene {result['scene']}: ✅ Downloaded
+File: {item['filename']}""", None, None
 
-Scene {scene_num}: ⚠️ Downloaded (720p - fallback)
-File: {filename}""", None, None
-
-            except Exception as e:
-                yield f"❌ Scene {scene_num}: Lỗi tải - {str(e)}", None, None
+        except Exception as e:
+            yield f"❌ Lỗi tải video - {str(e)}", None, None
 
         await controller.close()
         project_state.download_dir = download_dir
@@ -226,7 +222,7 @@ Thư mục: {download_dir}
 
         final_path = os.path.join(project_dir, f"final_video.mp4")
 
-        assembler = VideoAssembler()
+        assembler = VideoAssembler(probe_cache_path=os.path.join(project_dir, PROBE_CACHE_FILENAME))
         assembled_path = assembler.assemble_videos(
             video_files=sorted(downloaded_files),
             output_path=final_path,
@@ -20,8 +20,10 @@ if sys.platform == 'win32':
 
 from dotenv import load_dotenv
 from src.script_generator import ScriptGenerator
-from src.browser_automation.flow_controller import FlowController
+from src.browser_automation.browser_service import get_browser_service
+from src.browser_automation.scene_scheduler import SceneScheduler
 from src.video_assembler import VideoAssembler
+from src.video_processor.probe_cache import PROBE_CACHE_FILENAME
 
 # Load environment
 load_dotenv()
@@ -40,6 +42,8 @@ class ProjectState:
         self.scenes = []  # List of scene states
         self.seo_content = None
         self.final_video_path = None
+        self.flow_project_id = None  # Flow project the scenes were generated in
+        self.cookies_file = None
 
     def create_new_project(self, project_name: str):
         """Initialize a new project"""
@@ -72,6 +76,8 @@ class ProjectState:
             "scenes": self.scenes,
             "seo_content": self.seo_content,
             "final_video_path": self.final_video_path,
+            "flow_project_id": self.flow_project_id,
+            "cookies_file": self.cookies_file,
             "last_updated": datetime.now().isoformat()
         }
 
@@ -94,6 +100,8 @@ class ProjectState:
         self.scenes = state_data.get("scenes", [])
         self.seo_content = state_data.get("seo_content")
         self.final_video_path = state_data.get("final_video_path")
+        self.flow_project_id = state_data.get("flow_project_id")
+        self.cookies_file = state_data.get("cookies_file")
 
         return True
 
@@ -379,6 +387,31 @@ THUMBNAIL PROMPT:
 
 # ========== Video Generation with Progress ==========
 
+DEFAULT_COOKIES_FILE = "./config/cookies.json"
+
+
+async def _open_flow_project(controller) -> bool:
+    """Show the project's Flow page, creating the Flow project on first use"""
+    if project.flow_project_id:
+        # A warm context is usually still on the project - no navigation needed
+        if project.flow_project_id in controller.page.url:
+            return True
+        if await controller.goto_project(project.flow_project_id):
+            return True
+
+    if "/project/" in controller.page.url:
+        # "+ Dự án mới" only exists on the dashboard
+        await controller.goto_flow()
+
+    flow_project_id = await controller.create_new_project()
+    if not flow_project_id:
+        return False
+
+    project.flow_project_id = flow_project_id
+    project.save_state()
+    return True
+
+
 async def generate_all_videos_async(cookies_file: str, headless: bool = True) -> str:
     """Generate videos for all scenes"""
     try:
@@ -388,46 +421,35 @@ async def generate_all_videos_async(cookies_file: str, headless: bool = True) ->
         if not os.path.exists(cookies_file):
             return f"❌ File cookies không tồn tại: {cookies_file}"
 
-        project_dir = project.get_project_dir()
-        download_dir = os.path.join(project_dir, "downloads")
-
-        # Initialize controller
-        controller = FlowController(cookies_file, download_dir, headless=headless)
-
-        # Generate videos for each scene
-        results = []
-        for i, scene_state in enumerate(project.scenes):
-            scene = project.script['scenes'][i]
+        project.cookies_file = cookies_file
+        download_dir = os.path.join(project.get_project_dir(), "downloads")
 
-            # Update status
+        for scene_state in project.scenes:
             scene_state['status'] = 'generating'
-            project.save_state()
+        project.save_state()
 
-            try:
-                # Generate video
-                video_url = await controller.generate_video_flow(
-                    prompt=scene['veo_prompt'],
-                    duration=scene['duration'],
-                    aspect_ratio=project.script.get('aspect_ratio', '16:9')
-                )
+        async with get_browser_service(headless).session(cookies_file, download_dir) as controller:
+            if not await _open_flow_project(controller):
+                return "❌ Không tạo được dự án Flow"
 
-                if video_url:
-                    scene_state['status'] = 'completed'
-                    scene_state['video_url'] = video_url
-                    results.append(f"✅ Scene {i+1}: Hoàn thành")
-                else:
-                    scene_state['status'] = 'failed'
-                    scene_state['error'] = 'Không tạo được video'
-                    results.append(f"❌ Scene {i+1}: Thất bại")
+            scene_results = await controller.generate_scene_videos(
+                project.script['scenes'],
+                project_name=project.project_name
+            )
 
-            except Exception as e:
+        results = []
+        for i, (scene_state, result) in enumerate(zip(project.scenes, scene_results)):
+            if result['status'] == 'success':
+                scene_state['status'] = 'completed'
+                scene_state['video_url'] = result['video_url']
+                scene_state['download_path'] = result['download_path']
+                results.append(f"✅ Scene {i+1}: Hoàn thành")
+            else:
                 scene_state['status'] = 'failed'
-                scene_state['error'] = str(e)
-                results.append(f"❌ Scene {i+1}: Lỗi - {str(e)}")
-
-            project.save_state()
+                scene_state['error'] = result.get('error') or 'Không tạo được video'
+                results.append(f"❌ Scene {i+1}: Thất bại - {scene_state['error']}")
 
-        await controller.close()
+        project.save_state()
 
         summary = "\n".join(results)
         return f"🎬 Kết quả tạo video:\n\n{summary}"
@@ -437,8 +459,8 @@ async def generate_all_videos_async(cookies_file: str, headless: bool = True) ->
 
 
 def generate_all_videos(cookies_file: str, headless: bool = True) -> str:
-    """Wrapper for async video generation"""
-    return asyncio.run(generate_all_videos_async(cookies_file, headless))
+    """Run video generation on the shared browser"""
+    return get_browser_service(headless).run(generate_all_videos_async(cookies_file, headless))
 
 
 # ========== Video Download with Auto-Upscale ==========
@@ -449,49 +471,53 @@ async def download_all_videos_async(quality: str = "1080p") -> str:
         if not project.scenes:
             return "❌ Chưa có video nào được tạo"
 
-        cookies_file = os.path.join(project.get_project_dir(), "../../../config/cookies.json")
-        download_dir = os.path.join(project.get_project_dir(), "downloads")
+        scene_states = [
+            scene_state for scene_state in project.scenes
+            if scene_state['status'] == 'completed' and scene_state.get('approved', True)
+        ]
+        if not scene_states:
+            return "❌ Không có video nào để tải"
 
-        controller = FlowController(cookies_file, download_dir, headless=True)
+        cookies_file = project.cookies_file or DEFAULT_COOKIES_FILE
+        download_dir = os.path.join(project.get_project_dir(), "downloads")
 
         results = []
-        for scene_state in project.scenes:
-            if scene_state['status'] != 'completed' or not scene_state.get('approved', True):
-                continue
-
-            scene_num = scene_state['scene_number']
-
-            try:
-                # Try 1080p first
-                file_path = await controller.download_video_flow(
-                    video_url=scene_state['video_url'],
-                    quality="1080p",
-                    filename=f"scene_{scene_num:03d}_1080p.mp4"
-                )
+        async with get_browser_service().session(cookies_file, download_dir) as controller:
+            paths = [None] * len(scene_states)
+            if await _open_flow_project(controller):
+                # Fire all upscales at once; each file is saved as it finishes
+                items = [
+                    {
+                        'filename': f"scene_{scene_state['scene_number']:03d}_{quality}.mp4",
+                        'prompt_text': scene_state['prompt']
+                    }
+                    for scene_state in scene_states
+                ]
+                paths = await controller.download_videos_from_ui(items, quality=quality)
+
+            for scene_state, file_path in zip(scene_states, paths):
+                scene_num = scene_state['scene_number']
 
                 if file_path:
                     scene_state['download_path'] = file_path
-                    results.append(f"✅ Scene {scene_num}: Downloaded 1080p")
-                else:
-                    # Fallback to 720p
-                    file_path = await controller.download_video_flow(
-                        video_url=scene_state['video_url'],
-                        quality="720p",
-                        filename=f"scene_{scene_num:03d}_720p.mp4"
+                    results.append(f"✅ Scene {scene_num}: Downloaded {quality}")
+                    continue
+
+                # Fallback: the generated file itself (720p)
+                file_path = None
+                if scene_state.get('video_url'):
+                    file_path = await controller.download_video(
+                        scene_state['video_url'],
+                        f"scene_{scene_num:03d}_720p.mp4"
                     )
 
-                    if file_path:
-                        scene_state['download_path'] = file_path
-                        results.append(f"⚠️ Scene {scene_num}: Downloaded 720p (1080p failed)")
-                    else:
-                        results.append(f"❌ Scene {scene_num}: Download failed")
-
-            except Exception as e:
-                results.append(f"❌ Scene {scene_num}: Error - {str(e)}")
-
-            project.save_state()
+                if file_path:
+                    scene_state['download_path'] = file_path
+                    results.append(f"⚠️ Scene {scene_num}: Downloaded 720p ({quality} failed)")
+                else:
+                    results.append(f"❌ Scene {scene_num}: Download failed")
 
-        await controller.close()
+        project.save_state()
 
         summary = "\n".join(results)
         return f"📥 Kết quả tải video:\n\n{summary}"
@@ -501,8 +527,8 @@ async def download_all_videos_async(quality: str = "1080p") -> str:
 
 
 def download_all_videos(quality: str = "1080p") -> str:
-    """Wrapper for async download"""
-    return asyncio.run(download_all_videos_async(quality))
+    """Run downloads on the shared browser"""
+    return get_browser_service().run(download_all_videos_async(quality))
 
 
 # ========== Video Preview & Approval ==========
@@ -580,31 +606,33 @@ async def regenerate_scene_async(scene_index: int, cookies_file: str) -> str:
         scene_state['error'] = None
         project.save_state()
 
-        # Initialize controller
         download_dir = os.path.join(project.get_project_dir(), "downloads")
-        controller = FlowController(cookies_file, download_dir, headless=True)
 
-        # Generate video
-        video_url = await controller.generate_video_flow(
-            prompt=scene['veo_prompt'],
-            duration=scene['duration'],
-            aspect_ratio=project.script.get('aspect_ratio', '16:9')
-        )
+        async with get_browser_service().session(cookies_file, download_dir) as controller:
+            if not await _open_flow_project(controller):
+                raise RuntimeError("Không mở được dự án Flow")
+
+            # Same scheduler as the full run, with a one-scene queue
+            queue = asyncio.Queue()
+            queue.put_nowait((scene_index + 1, scene))
+            results = await SceneScheduler(controller).run_from_queue(
+                queue,
+                project_name=project.project_name,
+                total=1
+            )
+            result = results.get(scene_index + 1)
 
-        if video_url:
+        if result and result['status'] == 'success':
             scene_state['status'] = 'completed'
-            scene_state['video_url'] = video_url
+            scene_state['video_url'] = result['video_url']
+            scene_state['download_path'] = result['download_path']
             scene_state['approved'] = False  # Need review again
             project.save_state()
-
-            await controller.close()
             return f"✅ Scene {scene_index + 1} đã được tạo lại thành công"
         else:
             scene_state['status'] = 'failed'
-            scene_state['error'] = 'Không tạo được video'
+            scene_state['error'] = (result or {}).get('error') or 'Không tạo được video'
             project.save_state()
-
-            await controller.close()
             return f"❌ Scene {scene_index + 1} tạo lại thất bại"
 
     except Exception as e:
@@ -615,8 +643,8 @@ async def regenerate_scene_async(scene_index: int, cookies_file: str) -> str:
 
 
 def regenerate_scene(scene_index: int, cookies_file: str) -> str:
-    """Wrapper for async regenerate"""
-    return asyncio.run(regenerate_scene_async(scene_index, cookies_file))
+    """Run a scene regeneration on the shared browser"""
+    return get_browser_service().run(regenerate_scene_async(scene_index, cookies_file))
 
 
 def get_all_scenes_summary() -> str:
@@ -667,11 +695,13 @@ def assemble_final_video() -> tuple:
         project_dir = project.get_project_dir()
         output_path = os.path.join(project_dir, f"{project.project_name}_final.mp4")
 
-        assembler = VideoAssembler()
+        # Keep per-scene segments so a regenerated scene only rebuilds itself
+        assembler = VideoAssembler(probe_cache_path=os.path.join(project_dir, PROBE_CACHE_FILENAME))
         final_path = assembler.assemble_videos(
             video_files=video_files,
             output_path=output_path,
-            script=project.script
+            script=project.script,
+            segment_dir=os.path.join(project_dir, "segments")
         )
 
         if final_path:
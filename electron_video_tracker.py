@@ -4,12 +4,13 @@ Uses Playwright's Electron support for better video URL tracking
 """
 
 import asyncio
-import re
 import json
 from datetime import datetime
 from playwright.async_api import async_playwright
 import logging
 
+from src.browser_automation.video_events import VideoEventStream
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ class ElectronVideoTracker:
         self.page = None
         self.context = None
         self.browser = None
+        self.events = None
         self.video_map = {}  # Map: scene_number -> video_url
         
     async def start(self):
@@ -47,6 +49,10 @@ class ElectronVideoTracker:
         # Create page and immediately navigate to avoid about:blank issue
         self.page = await self.context.new_page()
 
+        # In-page observer pushes new video URLs as events
+        self.events = VideoEventStream()
+        await self.events.attach(self.page)
+
         # Go to Flow homepage first to establish session
         logger.info("🌐 Navigating to Flow...")
         try:
@@ -110,11 +116,8 @@ class ElectronVideoTracker:
             return None
             
     async def _get_all_video_urls(self):
-        """Extract all Google Storage video URLs from page"""
-        content = await self.page.content()
-        pattern = r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+'
-        urls = set(re.findall(pattern, content))
-        return urls
+        """Get all Google Storage video URLs seen on the page"""
+        return self.events.known_urls()
         
     async def _fill_prompt(self, prompt: str):
         """Fill prompt textarea"""
@@ -199,40 +202,9 @@ class ElectronVideoTracker:
     async def _wait_for_new_video(self, urls_before: set, timeout: int = 120):
         """
         Wait for new video URL to appear
-        Theo hướng dẫn: tìm play_arrow icon để biết video ready
+        URL chỉ xuất hiện khi video đã sẵn sàng, observer đẩy sự kiện ngay lập tức
         """
-        start_time = asyncio.get_event_loop().time()
-        check_interval = 3
-
-        while asyncio.get_event_loop().time() - start_time < timeout:
-            elapsed = int(asyncio.get_event_loop().time() - start_time)
-            logger.info(f"   ⏳ Waiting... {elapsed}s / {timeout}s")
-
-            # Theo hướng dẫn: Check for play_arrow icon (video ready)
-            # Selector: button có icon play_arrow hoặc aria-label chứa "play"
-            play_button = await self.page.query_selector(
-                'button[aria-label*="play" i], button:has-text("play_arrow")'
-            )
-
-            if play_button:
-                logger.info("   ✅ Play button (play_arrow) found!")
-
-                # Get new URLs
-                urls_after = await self._get_all_video_urls()
-                new_urls = urls_after - urls_before
-
-                if new_urls:
-                    # Return FIRST new URL (matches prompt best)
-                    new_urls_sorted = sorted(list(new_urls))
-                    logger.info(f"   📹 Found {len(new_urls)} new video(s)")
-                    return new_urls_sorted[0]
-                else:
-                    logger.info("   ⚠️  Play button found but no new URLs yet, waiting...")
-
-            await self.page.wait_for_timeout(check_interval * 1000)
-
-        logger.error(f"   ⏱️ Timeout after {timeout}s")
-        return None
+        return await self.events.wait_for_new_video(urls_before, timeout=timeout)
         
     async def close(self):
         """Close browser"""
@@ -5,26 +5,45 @@ Không đánh số vào prompt để tránh ảnh hưởng AI generation
 """
 import asyncio
 import json
-import re
 from playwright.async_api import async_playwright
 import logging
 from typing import List, Dict, Optional
 
+from src.browser_automation.card_index import CARD_SCAN_JS, PENDING_STATES
+from src.browser_automation.lean_profile import LEAN_VIEWPORT, apply_lean_profile, block_heavy_requests
+from src.browser_automation.network_capture import base_video_url
+from src.browser_automation.video_events import VideoEventStream
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# more_vert button inside a video card, and the delete entry of its menu
+MORE_BUTTON_SELECTOR = 'button[aria-haspopup="menu"]:has-text("more_vert")'
+DELETE_OPTION_SELECTOR = (
+    '[role="menuitem"]:has-text("Xoá"), menuitem:has-text("Xoá"), '
+    '[role="menuitem"]:has-text("Delete")'
+)
+# Confirm button of the in-page "delete this video?" modal, when Flow shows one
+CONFIRM_DELETE_SELECTOR = (
+    '[role="dialog"] button:has-text("Xoá"), [role="dialog"] button:has-text("Xóa"), '
+    '[role="alertdialog"] button:has-text("Delete"), [role="dialog"] button:has-text("Delete")'
+)
+
+
 class FlowVideoTracker:
     """
     Track videos using baseline URL comparison
     Không cần đánh số vào prompt, track qua before/after URLs
     """
 
-    def __init__(self, cookies_path: str):
+    def __init__(self, cookies_path: str, lean: bool = False):
         self.cookies_path = cookies_path
+        self.lean = lean  # Block media/images/fonts and autoplay
         self.page = None
         self.context = None
         self.browser = None
         self.playwright = None
+        self.events: Optional[VideoEventStream] = None
 
         # Video mapping: scene_number -> {prompt, video_url, status}
         self.scenes: Dict[int, Dict] = {}
@@ -41,11 +60,19 @@ class FlowVideoTracker:
 
         # Desktop viewport
         self.context = await self.browser.new_context(
-            viewport={'width': 1280, 'height': 800},
-            screen={'width': 1280, 'height': 800}
+            viewport=LEAN_VIEWPORT,
+            screen=LEAN_VIEWPORT
         )
         await self.context.add_cookies(cookies)
+        if self.lean:
+            await apply_lean_profile(self.context)
         self.page = await self.context.new_page()
+        if self.lean:
+            await block_heavy_requests(self.page)
+
+        # In-page observer pushes new video URLs instead of us scraping page.content()
+        self.events = VideoEventStream()
+        await self.events.attach(self.page)
 
         logger.info("🌐 Navigating to Flow...")
         await self.page.goto("https://labs.google/fx/vi/tools/flow",
@@ -205,12 +232,8 @@ class FlowVideoTracker:
         await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
         await self.page.wait_for_timeout(1000)
 
-        # Get baseline URLs
-        content_before = await self.page.content()
-        urls_before = set(re.findall(
-            r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+',
-            content_before
-        ))
+        # Get baseline URLs (already known from observer events)
+        urls_before = self.events.known_urls()
         logger.info(f"   📊 Baseline: {len(urls_before)} existing videos")
 
         # Fill prompt (KHÔNG đánh số, giữ nguyên prompt gốc)
@@ -267,198 +290,221 @@ class FlowVideoTracker:
         return video_url
 
     async def _wait_for_new_video(self, urls_before: set, timeout: int = 180) -> Optional[str]:
-        """Wait for new video URL to appear"""
-        start_time = asyncio.get_event_loop().time()
-        check_interval = 5
-
-        while asyncio.get_event_loop().time() - start_time < timeout:
-            elapsed = int(asyncio.get_event_loop().time() - start_time)
-
-            if elapsed % 15 == 0:  # Log every 15s
-                logger.info(f"   ⏳ {elapsed}s / {timeout}s")
-
-            # Check for new URLs
-            content_after = await self.page.content()
-            urls_after = set(re.findall(
-                r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+',
-                content_after
-            ))
-
-            new_urls = urls_after - urls_before
-            if new_urls:
-                # Return FIRST new URL
-                new_urls_sorted = sorted(list(new_urls))
-                logger.info(f"   ✅ Found {len(new_urls)} new video(s)!")
-                return new_urls_sorted[0]
-
-            await self.page.wait_for_timeout(check_interval * 1000)
-
-        logger.error(f"   ⏱️ Timeout after {timeout}s")
-        return None
+        """Wait for new video URL to appear (pushed by the in-page observer)"""
+        return await self.events.wait_for_new_video(urls_before, timeout=timeout)
 
     async def delete_video_by_url(self, video_url: str) -> bool:
         """
         Delete video by URL
         Match chính xác video với nút xoá
         """
-        logger.info(f"\n🗑️  Deleting video: {video_url[:70]}...")
-
-        # Scroll to top to see videos
-        await self.page.evaluate("window.scrollTo(0, 0)")
-        await self.page.wait_for_timeout(2000)
-
-        # Step 1: Find video card containing this URL
-        logger.info("   📍 Finding video card...")
-
-        # Get all video elements
-        videos = await self.page.query_selector_all('video')
-        logger.info(f"   Found {len(videos)} video elements")
-
-        target_video_card = None
-        for video in videos:
-            # Check if this video's src matches our URL
-            src = await video.get_attribute('src')
-            if src and video_url in src:
-                # Found the video! Now get its parent card
-                target_video_card = await video.evaluate_handle('''el => {
-                    let parent = el;
-                    let depth = 0;
-                    while (parent && depth < 15) {
-                        // Look for card container (article, section, or div with significant content)
-                        if (parent.tagName === 'ARTICLE' ||
-                            parent.tagName === 'SECTION' ||
-                            (parent.className && parent.className.includes('card'))) {
-                            return parent;
-                        }
-                        parent = parent.parentElement;
-                        depth++;
-                    }
-                    return el.parentElement?.parentElement?.parentElement;
-                }''')
-                logger.info("   ✅ Found target video card!")
-                break
-
-        if not target_video_card:
-            logger.error("   ❌ Video card not found!")
-            return False
+        report = await self.delete_videos([video_url])
+        return bool(report['deleted'])
 
-        # Step 2: Find more_vert button within this video card
-        logger.info("   🔍 Finding more_vert button in video card...")
+    async def delete_videos(self, video_urls: List[str]) -> Dict[str, List[str]]:
+        """
+        Delete several videos in one pass
+        Xoá nhiều video cùng lúc: tìm tất cả thẻ trong một lần quét
 
-        more_btn = await target_video_card.query_selector('button[aria-haspopup="menu"]:has-text("more_vert")')
+        Args:
+            video_urls: Video URLs to delete (signed or not)
 
-        if not more_btn:
-            logger.error("   ❌ more_vert button not found!")
-            return False
+        Returns:
+            Report {'deleted': [...], 'failed': [...], 'missing': [...]} of URLs
+        """
+        targets = {base_video_url(url): url for url in video_urls}
+        cards = await self.page.evaluate(CARD_SCAN_JS)
+
+        by_url = {card['url']: card for card in cards if card['url']}
+        found = [by_url[base] for base in targets if base in by_url]
+        missing = [targets[base] for base in targets if base not in by_url]
+        if missing:
+            logger.warning(f"   ⚠️  {len(missing)} videos not on the page")
+
+        result = await self._delete_cards(found)
+        return {
+            'deleted': [targets[card['url']] for card in result['deleted']],
+            'failed': [targets[card['url']] for card in result['failed']],
+            'missing': missing
+        }
+
+    async def prune_project(self, state_path: str, dry_run: bool = False) -> Dict[str, List[str]]:
+        """
+        Delete every finished card not referenced by a project_state.json
+        Dọn các video không còn dùng để trang dự án nhẹ hơn
 
-        logger.info("   ✅ Found more_vert button!")
+        Cards still generating are left alone. A card without a URL is only
+        removed when it provably holds no video: it shows a generation error
+        and its text matches none of the project's scene prompts.
 
-        # Step 3: Click more_vert to open menu
-        logger.info("   🎯 Clicking more_vert...")
-        await more_btn.click(force=True)
-        await self.page.wait_for_timeout(1500)
-        logger.info("   ✅ Menu opened!")
+        Args:
+            state_path: Path to project_state.json (scenes[].video_url are kept)
+            dry_run: Only report what would be deleted
 
-        # Step 4: Find and click Delete option in menu
-        logger.info("   🗑️  Finding Delete option...")
+        Returns:
+            Report {'deleted', 'failed', 'kept'} (plus 'would_delete' on a dry run)
+            of card URLs, or card text for cards without a URL
+        """
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        scenes = state.get('scenes', [])
+        keep = {
+            base_video_url(scene['video_url'])
+            for scene in scenes
+            if scene.get('video_url')
+        }
+        prompts = [
+            ' '.join(scene['prompt'].split()).lower()[:60]
+            for scene in scenes
+            if scene.get('prompt')
+        ]
+
+        def unreferenced(card: Dict) -> bool:
+            if card['state'] in PENDING_STATES:
+                return False
+            if card['url']:
+                return card['url'] not in keep
+            # No URL: the video may just not be loaded (lean profile, lazy
+            # media), so only error cards of no known scene are safe to drop
+            text = ' '.join(card['text'].split()).lower()
+            return card['state'] == 'failed' and not any(prompt in text for prompt in prompts)
+
+        cards = await self.page.evaluate(CARD_SCAN_JS)
+        doomed = [card for card in cards if unreferenced(card)]
+        kept = [card for card in cards if card not in doomed]
+
+        def describe(card: Dict) -> str:
+            return card['url'] or card['text'][:60]
+
+        logger.info(f"\n🧹 Pruning project: {len(doomed)} to delete, {len(kept)} kept")
+        report = {'deleted': [], 'failed': [], 'kept': [describe(card) for card in kept]}
+        if dry_run:
+            logger.info("   (dry run - nothing deleted)")
+            report['would_delete'] = [describe(card) for card in doomed]
+            return report
+
+        result = await self._delete_cards(doomed)
+        report['deleted'] = [describe(card) for card in result['deleted']]
+        report['failed'] = [describe(card) for card in result['failed']]
+        return report
+
+    async def _delete_cards(self, cards: List[Dict]) -> Dict[str, List[Dict]]:
+        """
+        Delete cards found by a card scan
 
-        # Wait for menu to render
-        await self.page.wait_for_timeout(1000)
+        Menus are opened back to back (accepting any confirm dialog); removal
+        of each card is checked at the end, all at once, instead of waiting
+        after every click. A card only counts as deleted once its element is
+        gone and a fresh scan no longer shows it.
+        """
+        clicked, failed = [], []
+        before = await self.page.evaluate(CARD_SCAN_JS)
 
-        # Try multiple strategies to find Delete option
-        delete_option = None
+        async def accept_dialog(dialog):
+            logger.info(f"   💬 Confirming: {dialog.message}")
+            await dialog.accept()
 
-        # Strategy 1: Find any visible element with exact text "Xoá"
+        self.page.on("dialog", accept_dialog)
         try:
-            # Look for elements containing "Xoá" that are visible
-            xoa_elements = await self.page.query_selector_all(':visible:has-text("Xoá")')
-
-            for elem in xoa_elements:
-                text = await elem.inner_text()
-                # Must be exactly "Xoá" or have delete icon
-                if text.strip() == "Xoá":
-                    # Check if it's clickable (button, menuitem, or has click handler)
-                    tag = await elem.evaluate('el => el.tagName')
-                    role = await elem.get_attribute('role')
-
-                    if tag in ['BUTTON', 'MENUITEM'] or role == 'menuitem':
-                        delete_option = elem
-                        logger.info(f"   ✅ Found Delete option! (tag: {tag}, role: {role})")
-                        break
-        except Exception as e:
-            logger.warning(f"   Strategy 1 failed: {e}")
-
-        # Strategy 2: Try menuitem selector
-        if not delete_option:
-            try:
-                delete_option = await self.page.query_selector('menuitem:has-text("Xoá")')
-                if delete_option:
-                    logger.info("   ✅ Found Delete via menuitem selector!")
-            except Exception as e:
-                logger.warning(f"   Strategy 2 failed: {e}")
-
-        # Strategy 3: Find by role=menuitem
-        if not delete_option:
-            try:
-                all_menuitems = await self.page.query_selector_all('[role="menuitem"]')
-                for item in all_menuitems:
-                    text = await item.inner_text()
-                    if "Xoá" in text:
-                        delete_option = item
-                        logger.info("   ✅ Found Delete via role=menuitem!")
-                        break
-            except Exception as e:
-                logger.warning(f"   Strategy 3 failed: {e}")
-
-        if delete_option:
-            try:
-                # Click delete
-                await delete_option.click()
-                await self.page.wait_for_timeout(2000)
-                logger.info("   ✅✅ Video deleted!")
-                return True
-            except Exception as e:
-                logger.error(f"   ❌ Failed to click Delete: {e}")
-                return False
-        else:
-            logger.error("   ❌ Delete option not found!")
-
-            # Debug: list all visible elements with "Xoá"
-            try:
-                all_xoa = await self.page.query_selector_all(':has-text("Xoá")')
-                logger.info(f"   📝 Found {len(all_xoa)} elements with 'Xoá':")
-                for i, item in enumerate(all_xoa[:5]):
-                    text = await item.inner_text()
-                    tag = await item.evaluate('el => el.tagName')
-                    visible = await item.is_visible()
-                    logger.info(f"      {i+1}. <{tag}> '{text[:50]}' (visible: {visible})")
-            except Exception as e:
-                logger.error(f"   Debug failed: {e}")
-
-            return False
+            for card in cards:
+                card_selector = f'[data-veo-card="{card["id"]}"]'
+                try:
+                    await self.page.click(f'{card_selector} {MORE_BUTTON_SELECTOR}', force=True, timeout=5000)
+                    await self.page.click(DELETE_OPTION_SELECTOR, timeout=5000)
+                except Exception as e:
+                    logger.error(f"   ❌ Could not delete card {card['id']}: {str(e)}")
+                    await self.page.keyboard.press("Escape")
+                    failed.append(card)
+                    continue
+
+                try:
+                    confirm = await self.page.wait_for_selector(CONFIRM_DELETE_SELECTOR, timeout=1500)
+                    await confirm.click()
+                except Exception:
+                    pass  # No in-page confirmation for this card
+                clicked.append(card)
+
+            async def detached(card: Dict) -> bool:
+                try:
+                    await self.page.wait_for_selector(
+                        f'[data-veo-card="{card["id"]}"]', state="detached", timeout=15000
+                    )
+                    return True
+                except Exception:
+                    return False
+
+            confirmed = await asyncio.gather(*(detached(card) for card in clicked))
+        finally:
+            self.page.remove_listener("dialog", accept_dialog)
+
+        # A re-rendered list also detaches elements; make sure the cards are
+        # really gone (by URL, or by how many identical error cards remain)
+        remaining = await self.page.evaluate(CARD_SCAN_JS)
+        remaining_urls = {card['url'] for card in remaining if card['url']}
+        remaining_text = {}
+        for card in remaining:
+            if not card['url']:
+                remaining_text[card['text']] = remaining_text.get(card['text'], 0) + 1
+        removed_text = {}
+        for card, ok in zip(clicked, confirmed):
+            if ok and not card['url']:
+                removed_text[card['text']] = removed_text.get(card['text'], 0) + 1
+        scanned_text = {}
+        for card in before:
+            if not card['url']:
+                scanned_text[card['text']] = scanned_text.get(card['text'], 0) + 1
+
+        def gone(card: Dict) -> bool:
+            if card['url']:
+                return card['url'] not in remaining_urls
+            text = card['text']
+            return remaining_text.get(text, 0) <= scanned_text.get(text, 0) - removed_text[text]
+
+        deleted = [card for card, ok in zip(clicked, confirmed) if ok and gone(card)]
+        failed += [card for card in clicked if card not in deleted]
+
+        logger.info(f"🗑️  Deleted {len(deleted)}/{len(cards)} videos"
+                    + (f" ({len(failed)} failed)" if failed else ""))
+        return {'deleted': deleted, 'failed': failed}
 
     async def delete_scene(self, scene_number: int) -> bool:
         """Delete video for specific scene"""
-        if scene_number not in self.scenes:
-            logger.error(f"Scene {scene_number} not found!")
-            return False
+        return (await self.delete_scenes([scene_number]))[scene_number]
 
-        scene = self.scenes[scene_number]
-        if not scene['video_url']:
-            logger.error(f"Scene {scene_number} has no video URL!")
-            return False
+    async def delete_scenes(self, scene_numbers: List[int]) -> Dict[int, bool]:
+        """
+        Delete the videos of several scenes in one pass
+
+        Args:
+            scene_numbers: Scene numbers tracked by this tracker
 
-        logger.info(f"\n🗑️  Deleting Scene {scene_number}: {scene['prompt'][:50]}...")
+        Returns:
+            scene_number -> True if its video was deleted
+        """
+        urls = {}
+        for scene_number in scene_numbers:
+            scene = self.scenes.get(scene_number)
+            if not scene:
+                logger.error(f"Scene {scene_number} not found!")
+            elif not scene['video_url']:
+                logger.error(f"Scene {scene_number} has no video URL!")
+            else:
+                urls[scene_number] = scene['video_url']
 
-        result = await self.delete_video_by_url(scene['video_url'])
+        report = await self.delete_videos(list(urls.values())) if urls else {'deleted': []}
+        deleted = set(report['deleted'])
 
-        if result:
-            # Update scene status
-            scene['status'] = 'deleted'
-            scene['video_url'] = None
-            logger.info(f"✅ Scene {scene_number} deleted successfully!")
+        results = {}
+        for scene_number in scene_numbers:
+            results[scene_number] = urls.get(scene_number) in deleted
+            if results[scene_number]:
+                # Update scene status
+                self.scenes[scene_number]['status'] = 'deleted'
+                self.scenes[scene_number]['video_url'] = None
+                logger.info(f"✅ Scene {scene_number} deleted successfully!")
 
-        return result
+        return results
 
     async def close(self):
         """Close browser"""
@@ -12,7 +12,7 @@ from dotenv import load_dotenv
 import logging
 
 from src.script_generator import ScriptGenerator
-from src.browser_automation import FlowController
+from src.browser_automation import AccountPool, FlowController
 from src.video_processor import VideoMerger
 
 
@@ -59,7 +59,8 @@ class VeoAutomation:
         scene_duration: int = 8,
         style: str = "cinematic",
         aspect_ratio: str = "16:9",
-        add_transitions: bool = True
+        add_transitions: bool = True,
+        stream: bool = False
     ) -> dict:
         """
         Run complete automation pipeline
@@ -71,6 +72,7 @@ class VeoAutomation:
             style: Visual style
             aspect_ratio: Video aspect ratio
             add_transitions: Add transitions between scenes
+            stream: Submit each scene to Flow as soon as Gemini has written it
 
         Returns:
             Dict with results and file paths
@@ -93,43 +95,64 @@ class VeoAutomation:
         }
 
         try:
-            # Step 1: Generate Script
-            logger.info("📝 STEP 1: Generating script with Gemini API...")
-            script = self.script_generator.generate_script(
-                topic=topic,
-                duration=duration,
-                scene_duration=scene_duration,
-                aspect_ratio=aspect_ratio,
-                style=style
-            )
-
-            script_path = self.script_generator.save_script(
-                script,
-                output_dir="./data/scripts"
-            )
-            results['script_path'] = script_path
-
-            logger.info(f"✅ Script generated: {len(script['scenes'])} scenes")
-            logger.info(f"   Title: {script['title']}")
-
-            # Step 2: Start browser and generate videos
-            logger.info("\n🌐 STEP 2: Starting browser automation...")
-            await self.flow_controller.start()
-
-            # Navigate to Flow
-            flow_ready = await self.flow_controller.goto_flow()
-            if not flow_ready:
-                raise Exception("Failed to access Flow. Please check cookies.")
-
-            # Save cookies for next time
-            await self.flow_controller.save_cookies()
-
-            # Step 3: Generate videos for each scene
-            logger.info(f"\n🎬 STEP 3: Generating {len(script['scenes'])} videos...")
-            scene_results = await self.flow_controller.generate_scene_videos(
-                scenes=script['scenes'],
-                project_name=project_name
-            )
+            if stream:
+                # Browser first, so scene 1 is submitted while Gemini writes the rest
+                logger.info("🌐 STEP 1: Starting browser automation...")
+                await self._start_flow()
+
+                logger.info("\n📝🎬 STEP 2-3: Streaming script from Gemini into Flow...")
+                script_stream = self.script_generator.stream_script(
+                    topic=topic,
+                    duration=duration,
+                    scene_duration=scene_duration,
+                    aspect_ratio=aspect_ratio,
+                    style=style
+                )
+                scene_results = await self.flow_controller.stream_scene_videos(
+                    script_stream,
+                    project_name=project_name
+                )
+
+                # Keep whatever was streamed even if the final JSON did not parse
+                script = script_stream.script or {
+                    'title': topic,
+                    'scenes': script_stream.scenes,
+                    'aspect_ratio': aspect_ratio
+                }
+                results['script_path'] = self.script_generator.save_script(
+                    script,
+                    output_dir="./data/scripts"
+                )
+            else:
+                # Step 1: Generate Script
+                logger.info("📝 STEP 1: Generating script with Gemini API...")
+                script = self.script_generator.generate_script(
+                    topic=topic,
+                    duration=duration,
+                    scene_duration=scene_duration,
+                    aspect_ratio=aspect_ratio,
+                    style=style
+                )
+
+                script_path = self.script_generator.save_script(
+                    script,
+                    output_dir="./data/scripts"
+                )
+                results['script_path'] = script_path
+
+                logger.info(f"✅ Script generated: {len(script['scenes'])} scenes")
+                logger.info(f"   Title: {script['title']}")
+
+                # Step 2: Start browser and generate videos
+                logger.info("\n🌐 STEP 2: Starting browser automation...")
+                await self._start_flow()
+
+                # Step 3: Generate videos for each scene
+                logger.info(f"\n🎬 STEP 3: Generating {len(script['scenes'])} videos...")
+                scene_results = await self.flow_controller.generate_scene_videos(
+                    scenes=script['scenes'],
+                    project_name=project_name
+                )
 
             results['scenes'] = scene_results
 
@@ -195,6 +218,18 @@ class VeoAutomation:
 
         return results
 
+    async def _start_flow(self):
+        """Start the browser, open Flow and refresh saved cookies"""
+        await self.flow_controller.start()
+
+        # Navigate to Flow
+        flow_ready = await self.flow_controller.goto_flow()
+        if not flow_ready:
+            raise Exception("Failed to access Flow. Please check cookies.")
+
+        # Save cookies for next time
+        await self.flow_controller.save_cookies()
+
     async def generate_script_only(
         self,
         topic: str,
@@ -220,8 +255,15 @@ class VeoAutomation:
 
         return script_path
 
-    async def generate_from_script(self, script_path: str) -> dict:
-        """Generate videos from existing script file"""
+    async def generate_from_script(self, script_path: str, accounts_dir: str = None) -> dict:
+        """
+        Generate videos from existing script file
+
+        Args:
+            script_path: Path to the script JSON
+            accounts_dir: Optional directory of per-account cookie files; scenes
+                are then shared across all accounts
+        """
         logger.info(f"📂 Loading script from: {script_path}")
 
         script = self.script_generator.load_script(script_path)
@@ -229,17 +271,29 @@ class VeoAutomation:
 
         logger.info(f"🎬 Generating videos for: {script['title']}")
 
-        # Start browser
-        await self.flow_controller.start()
-        await self.flow_controller.goto_flow()
+        if accounts_dir:
+            pool = AccountPool(cookies_dir=accounts_dir, download_dir="./data/videos")
+            try:
+                if not await pool.start():
+                    raise Exception(f"No usable accounts in {accounts_dir}")
+                scene_results = await pool.generate_scene_videos(
+                    scenes=script['scenes'],
+                    project_name=project_name
+                )
+            finally:
+                await pool.close()
+        else:
+            # Start browser
+            await self.flow_controller.start()
+            await self.flow_controller.goto_flow()
 
-        # Generate videos
-        scene_results = await self.flow_controller.generate_scene_videos(
-            scenes=script['scenes'],
-            project_name=project_name
-        )
+            # Generate videos
+            scene_results = await self.flow_controller.generate_scene_videos(
+                scenes=script['scenes'],
+                project_name=project_name
+            )
 
-        await self.flow_controller.close()
+            await self.flow_controller.close()
 
         return {
             'project_name': project_name,
@@ -300,10 +354,29 @@ def main():
         help="Generate videos from existing script file"
     )
 
+    parser.add_argument(
+        "--accounts-dir",
+        type=str,
+        help="Directory with one cookies JSON per Flow account (used with --from-script)"
+    )
+
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Start generating videos while the script is still being written"
+    )
+
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Call Gemini again instead of reusing a cached script"
+    )
+
     args = parser.parse_args()
 
     # Initialize automation
     automation = VeoAutomation()
+    automation.script_generator.force_refresh = args.refresh
 
     async def run():
         if args.script_only:
@@ -319,7 +392,7 @@ def main():
             )
 
         elif args.from_script:
-            await automation.generate_from_script(args.from_script)
+            await automation.generate_from_script(args.from_script, accounts_dir=args.accounts_dir)
 
         else:
             if not args.topic:
@@ -331,7 +404,8 @@ def main():
                 duration=args.duration,
                 scene_duration=args.scene_duration,
                 style=args.style,
-                aspect_ratio=args.aspect_ratio
+                aspect_ratio=args.aspect_ratio,
+                stream=args.stream
             )
 
     asyncio.run(run())
@@ -1,3 +1,6 @@
 from .flow_controller import FlowController
+from .scene_scheduler import SceneScheduler
+from .account_pool import AccountPool
+from .browser_service import BrowserService, get_browser_service
 
-__all__ = ['FlowController']
+__all__ = ['FlowController', 'SceneScheduler', 'AccountPool', 'BrowserService', 'get_browser_service']
@@ -0,0 +1,283 @@
+"""
+Account Pool - Generate scenes across several Flow accounts at once
+Chạy mỗi tài khoản trong một browser context riêng, chia scene và tự chuyển việc khi một tài khoản lỗi / hết hạn mức
+"""
+
+import asyncio
+import glob
+import os
+import logging
+from typing import Dict, List, Optional
+
+from .flow_controller import FlowController, launch_browser
+from .scene_scheduler import SceneScheduler
+
+
+logger = logging.getLogger(__name__)
+
+# Error text that means the account cannot generate any more for now
+QUOTA_KEYWORDS = ['quota', 'hạn mức', 'giới hạn', 'tín dụng', 'credits', 'too many requests']
+
+
+class AccountPool:
+    """
+    One isolated browser context per cookie file, sharing one scene queue
+
+    Each account runs its own SceneScheduler (and so its own 5-slot queue
+    accounting) and pulls the next scene only when it has a free slot, so
+    faster accounts naturally take more work. A failed scene goes back on
+    the queue for another account; an account that hits its quota or keeps
+    failing stops taking scenes.
+    """
+
+    def __init__(
+        self,
+        cookies_dir: str = "./config/accounts",
+        download_dir: str = "./data/videos",
+        headless: bool = False,
+        max_in_flight: int = 5,
+        max_attempts: int = 2,
+        max_consecutive_failures: int = 3,
+        lean: bool = False
+    ):
+        """
+        Initialize Account Pool
+
+        Args:
+            cookies_dir: Directory with one cookies JSON file per account
+            download_dir: Directory to save downloaded videos
+            headless: Run browser in headless mode
+            max_in_flight: Max generations pending per account (Flow allows 5)
+            max_attempts: Max tries per scene across all accounts
+            max_consecutive_failures: Failures in a row before an account is benched
+            lean: Use the lean page profile (no previews, images or fonts)
+        """
+        self.cookies_dir = cookies_dir
+        self.download_dir = download_dir
+        self.headless = headless
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.max_consecutive_failures = max_consecutive_failures
+        self.lean = lean
+
+        self.playwright = None
+        self.browser = None
+        self.accounts: List[Dict] = []
+
+    def discover(self) -> List[str]:
+        """
+        Find account cookie files
+
+        Returns:
+            Sorted list of cookie file paths
+        """
+        return sorted(glob.glob(os.path.join(self.cookies_dir, "*.json")))
+
+    async def start(self, create_projects: bool = True) -> int:
+        """
+        Open one context per account in a shared browser
+
+        Args:
+            create_projects: Create a fresh Flow project for every account
+
+        Returns:
+            Number of accounts ready to generate
+        """
+        cookie_files = self.discover()
+        if not cookie_files:
+            logger.error(f"❌ No cookie files found in {self.cookies_dir}")
+            return 0
+
+        self.playwright, self.browser = await launch_browser(headless=self.headless)
+        logger.info(f"👥 Starting {len(cookie_files)} accounts...")
+
+        results = await asyncio.gather(
+            *(self._start_account(path, create_projects) for path in cookie_files),
+            return_exceptions=True
+        )
+        self.accounts = [account for account in results if isinstance(account, dict)]
+
+        logger.info(f"✅ {len(self.accounts)}/{len(cookie_files)} accounts ready")
+        return len(self.accounts)
+
+    async def _start_account(self, cookies_path: str, create_projects: bool) -> Optional[Dict]:
+        """Start one account's context and open a project"""
+        name = os.path.splitext(os.path.basename(cookies_path))[0]
+        controller = FlowController(cookies_path, self.download_dir, headless=self.headless, lean=self.lean)
+        try:
+            await controller.start(browser=self.browser)
+
+            if not await controller.goto_flow():
+                logger.error(f"❌ [{name}] Cannot access Flow - cookies expired?")
+                await controller.close()
+                return None
+
+            if create_projects and not await controller.create_new_project():
+                logger.error(f"❌ [{name}] Could not create a project")
+                await controller.close()
+                return None
+
+            await controller.save_cookies()
+        except Exception as e:
+            logger.error(f"❌ [{name}] Could not start account: {str(e)}")
+            # The context may already exist even though start() failed
+            try:
+                await controller.close()
+            except Exception as close_error:
+                logger.debug(f"   [{name}] Close error: {str(close_error)}")
+            return None
+
+        return {
+            'name': name,
+            'controller': controller,
+            'healthy': True,
+            'completed': 0,
+            'failed': 0,
+            'consecutive_failures': 0
+        }
+
+    async def generate_scene_videos(
+        self,
+        scenes: List[Dict],
+        project_name: str = "video_project",
+        timeout: int = 420
+    ) -> List[Dict]:
+        """
+        Generate videos for all scenes across the healthy accounts
+
+        Args:
+            scenes: List of scene dictionaries with 'veo_prompt'
+            project_name: Project name for organizing files
+            timeout: Max seconds per generation
+
+        Returns:
+            List of scenes with video URLs and download paths (same order as input)
+        """
+        queue = asyncio.Queue()
+        for i, scene in enumerate(scenes, 1):
+            queue.put_nowait((i, scene))
+
+        attempts: Dict[int, int] = {}
+        results: Dict[int, Dict] = {}
+
+        # A round ends when every account has drained the queue; scenes that
+        # failed late are requeued and picked up by the next round
+        while not queue.empty():
+            healthy = [account for account in self.accounts if account['healthy']]
+            if not healthy:
+                logger.error("❌ No healthy accounts left")
+                break
+
+            logger.info(f"👥 Sharing {queue.qsize()} scenes across {len(healthy)} accounts")
+            rounds = await asyncio.gather(*(
+                self._run_account(account, queue, project_name, len(scenes), timeout, attempts)
+                for account in healthy
+            ))
+            for account_results in rounds:
+                results.update(account_results)
+
+        # Scenes no account could take
+        while not queue.empty():
+            i, scene = queue.get_nowait()
+            results[i] = {**scene, 'video_url': None, 'download_path': None,
+                          'status': 'failed', 'error': "No healthy account available"}
+
+        for account in self.accounts:
+            logger.info(f"   [{account['name']}] {account['completed']} done, {account['failed']} failed"
+                        f"{'' if account['healthy'] else ' (benched)'}")
+
+        return [results[i] for i in sorted(results)]
+
+    async def _run_account(
+        self,
+        account: Dict,
+        queue: asyncio.Queue,
+        project_name: str,
+        total: int,
+        timeout: int,
+        attempts: Dict[int, int]
+    ) -> Dict[int, Dict]:
+        """Run one account's scheduler against the shared queue"""
+        scheduler = SceneScheduler(
+            account['controller'],
+            max_in_flight=self.max_in_flight,
+            job_timeout=timeout
+        )
+        scheduler.on_finished = lambda job: self._on_finished(account, scheduler, job, queue, attempts)
+        scheduler.on_downloaded = lambda job: self._on_downloaded(account, scheduler, job, queue, attempts)
+
+        try:
+            return await scheduler.run_from_queue(queue, project_name=project_name, total=total)
+        except Exception as e:
+            logger.error(f"❌ [{account['name']}] Scheduler crashed: {str(e)}")
+            account['healthy'] = False
+            return {}
+
+    def _on_finished(
+        self,
+        account: Dict,
+        scheduler: SceneScheduler,
+        job: Dict,
+        queue: asyncio.Queue,
+        attempts: Dict[int, int]
+    ):
+        """Handle a job leaving the generation stage (successes are counted once downloaded)"""
+        if job['status'] == 'failed':
+            self._record_failure(account, scheduler, job, queue, attempts)
+
+    def _on_downloaded(
+        self,
+        account: Dict,
+        scheduler: SceneScheduler,
+        job: Dict,
+        queue: asyncio.Queue,
+        attempts: Dict[int, int]
+    ):
+        """Count a scene as completed only once its file exists"""
+        if job['status'] == 'success':
+            account['completed'] += 1
+            account['consecutive_failures'] = 0
+        else:
+            self._record_failure(account, scheduler, job, queue, attempts)
+
+    def _record_failure(
+        self,
+        account: Dict,
+        scheduler: SceneScheduler,
+        job: Dict,
+        queue: asyncio.Queue,
+        attempts: Dict[int, int]
+    ):
+        """Update account health and requeue a failed scene"""
+        account['failed'] += 1
+        account['consecutive_failures'] += 1
+        error = (job['error'] or '').lower()
+
+        if any(keyword in error for keyword in QUOTA_KEYWORDS):
+            logger.warning(f"⚠️  [{account['name']}] Quota reached - benching account")
+            account['healthy'] = False
+        elif account['consecutive_failures'] >= self.max_consecutive_failures:
+            logger.warning(f"⚠️  [{account['name']}] {account['consecutive_failures']} failures in a row"
+                           f" - benching account")
+            account['healthy'] = False
+
+        if not account['healthy']:
+            scheduler.stop()
+
+        attempts[job['index']] = attempts.get(job['index'], 1) + 1
+        if attempts[job['index']] <= self.max_attempts:
+            logger.info(f"🔁 Scene {job['index']} requeued "
+                        f"(attempt {attempts[job['index']]}/{self.max_attempts})")
+            job['requeued'] = True
+            queue.put_nowait((job['index'], job['scene']))
+
+    async def close(self):
+        """Close every account context and the shared browser"""
+        for account in self.accounts:
+            await account['controller'].close()
+        if self.browser:
+            await self.browser.close()
+            logger.info("👋 Browser closed")
+        if self.playwright:
+            await self.playwright.stop()
+            self.playwright = None
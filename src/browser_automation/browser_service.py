@@ -0,0 +1,207 @@
+"""
+Browser Service - One long-lived browser that hands out warm Flow sessions
+Giữ trình duyệt chạy suốt phiên làm việc, mỗi thao tác trên UI dùng lại context đã đăng nhập sẵn
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from .flow_controller import FlowController, launch_browser
+
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserService:
+    """
+    Keep one browser and one authenticated context per cookie file alive
+
+    Playwright objects belong to the event loop that created them, so the
+    service owns a background loop thread. Synchronous callers (Gradio
+    handlers) submit coroutines with ``run``; inside them, ``session``
+    yields a started FlowController that is already on Flow. Sessions are
+    reused across calls and recycled after ``max_uses`` or when their page
+    dies.
+    """
+
+    def __init__(self, headless: bool = True, max_uses: int = 50):
+        """
+        Initialize Browser Service
+
+        Args:
+            headless: Run browser in headless mode
+            max_uses: Recreate a context after this many sessions (bounds memory)
+        """
+        self.headless = headless
+        self.max_uses = max_uses
+
+        self.playwright = None
+        self.browser = None
+        self._sessions: Dict[str, Dict] = {}  # cookies_path -> {'controller', 'lock', 'uses'}
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ---------- Loop thread ----------
+
+    def _ensure_loop(self):
+        """Start the background event loop on first use"""
+        with self._start_lock:
+            if self._loop is not None:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="browser-service",
+                daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """
+        Run a coroutine on the service loop and wait for its result
+
+        Args:
+            coro: Coroutine to run (may use ``session``)
+            timeout: Optional max seconds to wait
+
+        Returns:
+            The coroutine's result
+        """
+        self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    # ---------- Sessions ----------
+
+    async def _get_browser(self):
+        """Launch the shared browser once"""
+        if self._browser_lock is None:
+            self._browser_lock = asyncio.Lock()
+
+        async with self._browser_lock:
+            if self.browser is None or not self.browser.is_connected():
+                # A crashed browser's driver process must not outlive it
+                await self._stop_playwright()
+                self.playwright, self.browser = await launch_browser(headless=self.headless)
+                self._sessions.clear()
+        return self.browser
+
+    @asynccontextmanager
+    async def session(self, cookies_path: str, download_dir: str):
+        """
+        Borrow the warm controller for an account
+
+        Args:
+            cookies_path: Path to the account's cookies JSON
+            download_dir: Directory for this call's downloads
+
+        Yields:
+            Started FlowController (exclusive while the block runs)
+        """
+        key = os.path.abspath(cookies_path)
+        entry = self._sessions.get(key)
+        if entry is None:
+            entry = self._sessions[key] = {'controller': None, 'lock': asyncio.Lock(), 'uses': 0}
+
+        async with entry['lock']:
+            controller = entry['controller']
+            if controller is not None and (entry['uses'] >= self.max_uses or controller.page.is_closed()):
+                logger.info("♻️  Recycling browser context")
+                await controller.close()
+                controller = entry['controller'] = None
+
+            if controller is None:
+                controller = await self._open(cookies_path, download_dir)
+                entry['controller'] = controller
+                entry['uses'] = 0
+            else:
+                logger.info("⚡ Reusing warm browser context")
+
+            controller.download_dir = download_dir
+            os.makedirs(download_dir, exist_ok=True)
+            entry['uses'] += 1
+
+            try:
+                yield controller
+            except Exception:
+                # Unknown page state after a failure - start fresh next time
+                entry['uses'] = self.max_uses
+                raise
+
+    async def _open(self, cookies_path: str, download_dir: str) -> FlowController:
+        """Create a context for an account and load Flow once"""
+        browser = await self._get_browser()
+        controller = FlowController(cookies_path, download_dir, headless=self.headless)
+        await controller.start(browser=browser)
+
+        if not await controller.goto_flow():
+            await controller.close()
+            raise RuntimeError("Cannot access Flow - cookies expired?")
+
+        await controller.save_cookies()
+        return controller
+
+    # ---------- Shutdown ----------
+
+    async def _close_all(self):
+        """Close every context and the browser"""
+        for entry in self._sessions.values():
+            if entry['controller'] is not None:
+                await entry['controller'].close()
+        self._sessions.clear()
+
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
+            logger.info("👋 Browser closed")
+        await self._stop_playwright()
+
+    async def _stop_playwright(self):
+        """Stop the Playwright driver of the shared browser"""
+        if self.playwright is not None:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logger.debug(f"   Playwright stop error: {str(e)}")
+            self.playwright = None
+
+    def shutdown(self):
+        """Close the browser and stop the loop thread"""
+        if self._loop is None or not self._loop.is_running():
+            return
+        try:
+            self.run(self._close_all(), timeout=30)
+        except Exception as e:
+            logger.warning(f"⚠️  Browser shutdown error: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+_service: Optional[BrowserService] = None
+
+
+def get_browser_service(headless: Optional[bool] = None) -> BrowserService:
+    """
+    Get the process-wide browser service
+
+    Args:
+        headless: Headless mode used when the service is first created
+            (None keeps the running service's mode, default headless)
+
+    Returns:
+        Shared BrowserService
+    """
+    global _service
+    if _service is None:
+        _service = BrowserService(headless=True if headless is None else headless)
+    elif headless is not None and _service.headless != headless:
+        logger.info(f"ℹ️  Browser already running (headless={_service.headless}) - reusing it")
+    return _service
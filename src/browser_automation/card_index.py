@@ -0,0 +1,293 @@
+"""
+Card Index - Track each prompt submission by its video card in Flow
+Theo dõi trạng thái từng thẻ video (đang chờ / đang tạo / xong / lỗi) thay vì đếm % trên cả trang
+"""
+
+import logging
+import re
+import time
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Returns one entry per video card. A card is the largest element around a
+# model label ("Veo 3.1 - Fast") that contains no other card's label; the
+# model picker in the prompt bar (a button) is ignored. Cards are tagged with
+# data-veo-card so ids stay stable between scans. The result is cached in the
+# page until a DOM mutation (or a video loading) invalidates it.
+CARD_SCAN_JS = r"""
+() => {
+    const MODEL_RE = /Veo \d/;
+    const PERCENT_RE = /^\s*(\d{1,3})%\s*$/;
+    const ERROR_RE = /không tạo được|failed to generate/i;
+    const URL_RE = /https:\/\/storage\.googleapis\.com\/ai-sandbox-videofx\/video\/[a-f0-9\-]+/;
+    if (!document.body) return [];
+
+    if (window.__veoCardBody !== document.body) {
+        const invalidate = () => { window.__veoCardsDirty = true; };
+        if (window.__veoCardObserver) window.__veoCardObserver.disconnect();
+        window.__veoCardObserver = new MutationObserver(invalidate);
+        window.__veoCardObserver.observe(document.body, {
+            childList: true, subtree: true, characterData: true,
+            attributes: true, attributeFilter: ['src']
+        });
+        if (!window.__veoCardBody) document.addEventListener('loadedmetadata', invalidate, true);
+        window.__veoCardBody = document.body;
+        window.__veoCardsDirty = true;
+    }
+    if (!window.__veoCardsDirty && window.__veoCards) return window.__veoCards;
+
+    const labels = [];
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    while (walker.nextNode()) {
+        const el = walker.currentNode.parentElement;
+        if (el && MODEL_RE.test(walker.currentNode.data) &&
+            !el.closest('button, [role="button"], [role="listbox"], [role="option"], [role="menu"]')) {
+            labels.push(el);
+        }
+    }
+
+    const labelCount = (el) => labels.filter((label) => el.contains(label)).length;
+    const roots = [];
+    for (const label of labels) {
+        let card = label;
+        while (card.parentElement && card.parentElement !== document.body &&
+               labelCount(card.parentElement) === 1) {
+            card = card.parentElement;
+        }
+        if (!roots.includes(card) && !card.querySelector('textarea')) roots.push(card);
+    }
+
+    let seq = window.__veoCardSeq || 0;
+    const cards = roots.map((card) => {
+        if (!card.dataset.veoCard) card.dataset.veoCard = String(++seq);
+        const text = card.innerText || '';
+
+        let percent = null;
+        const inner = document.createTreeWalker(card, NodeFilter.SHOW_TEXT);
+        while (inner.nextNode()) {
+            const m = inner.currentNode.data.match(PERCENT_RE);
+            if (m) { percent = parseInt(m[1], 10); break; }
+        }
+
+        const url = (card.outerHTML.match(URL_RE) || [null])[0];
+        const video = card.querySelector('video');
+
+        // Failed cards still show play_arrow and "0:08", so check errors first
+        let state = 'queued';
+        if (ERROR_RE.test(text)) state = 'failed';
+        else if (percent !== null && percent < 100) state = 'progress';
+        else if (url || (video && video.duration > 0)) state = 'ready';
+
+        return {id: card.dataset.veoCard, state, percent, url, text: text.slice(0, 1000)};
+    });
+    window.__veoCardSeq = seq;
+    window.__veoCards = cards;
+    window.__veoCardsDirty = false;
+    return cards;
+}
+"""
+
+# Element of the card showing a prompt (normalized prefix) or a video URL
+CARD_FIND_JS = f"""
+([prompt, url]) => {{
+    const normalize = (text) => (text || '').replace(/\\s+/g, ' ').trim().toLowerCase();
+    const card = ({CARD_SCAN_JS})().find((card) =>
+        (url && card.url && url.startsWith(card.url)) ||
+        (prompt && normalize(card.text).includes(prompt))
+    );
+    return card ? document.querySelector(`[data-veo-card="${{card.id}}"]`) : null;
+}}
+"""
+
+# States that occupy one of Flow's queue slots
+PENDING_STATES = ('queued', 'progress')
+
+
+def _normalize(text: str) -> str:
+    """Lowercase and collapse whitespace for prompt matching"""
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+
+async def find_card(page, prompt: Optional[str] = None, url: Optional[str] = None, match_chars: int = 60):
+    """
+    Locate a video card on a Playwright page in one round trip
+
+    Args:
+        page: Playwright page showing the project
+        prompt: Prompt text shown on the card
+        url: Video URL of the card
+        match_chars: Prompt prefix length used to recognise the card
+
+    Returns:
+        ElementHandle of the card or None
+    """
+    handle = await page.evaluate_handle(
+        CARD_FIND_JS,
+        [_normalize(prompt)[:match_chars] if prompt else None, url]
+    )
+    element = handle.as_element()
+    if element is None:
+        await handle.dispose()
+    return element
+
+
+class CardIndex:
+    """
+    Map prompt submissions to their Flow video cards
+
+    Each refresh scans the page once and links every unmatched submission to
+    a new card showing its prompt (or, failing that, to the oldest new card).
+    Queue depth counts pending cards that are known to be generating (seen
+    with a progress percentage, or linked to one of our submissions) plus
+    submissions whose card has not rendered yet. A card that merely looks
+    'queued' (no percent, URL or loaded video - e.g. a finished card whose
+    media is blocked, or a stale card from another session) does not count.
+    """
+
+    def __init__(self, max_queue: int = 5, match_chars: int = 60):
+        """
+        Initialize Card Index
+
+        Args:
+            max_queue: Flow's queue limit (pending videos at once)
+            match_chars: Prompt prefix length used to recognise a card
+        """
+        self.max_queue = max_queue
+        self.match_chars = match_chars
+        self.cards: Dict[str, Dict] = {}
+        self.baseline = set()
+        self.submissions: Dict[str, Dict] = {}  # key -> {'prompt', 'card_id', 'submitted_at'}
+        self.progressed = set()  # ids of cards ever seen with a progress percentage
+
+    # ---------- Refresh ----------
+
+    async def refresh(self, page) -> List[Dict]:
+        """
+        Rescan cards on a Playwright page
+
+        Args:
+            page: Playwright page showing the project
+
+        Returns:
+            Current cards
+        """
+        return self._apply(await page.evaluate(CARD_SCAN_JS))
+
+    def refresh_selenium(self, driver) -> List[Dict]:
+        """
+        Rescan cards through a Selenium driver
+
+        Args:
+            driver: Selenium WebDriver showing the project
+
+        Returns:
+            Current cards
+        """
+        return self._apply(driver.execute_script(f"return ({CARD_SCAN_JS})();") or [])
+
+    def _apply(self, cards: List[Dict]) -> List[Dict]:
+        """Store a scan and link submissions to new cards"""
+        self.cards = {card['id']: card for card in cards}
+        self.progressed.update(card['id'] for card in cards if card['state'] == 'progress')
+        self._link_submissions(cards)
+        return cards
+
+    def mark_baseline(self):
+        """Remember the cards that existed before our submissions"""
+        self.baseline = set(self.cards)
+
+    # ---------- Submissions ----------
+
+    def submit(self, key: str, prompt: str):
+        """
+        Register a prompt that is about to be submitted
+
+        Args:
+            key: Caller's id for the submission (e.g. scene index)
+            prompt: Prompt text (appears on the card)
+        """
+        self.submissions[key] = {
+            'prompt': _normalize(prompt)[:self.match_chars],
+            'card_id': None,
+            'submitted_at': time.monotonic()
+        }
+
+    def forget(self, key: str, url: Optional[str] = None):
+        """
+        Stop tracking a submission
+
+        Its card (and any card showing ``url``) is retired with the baseline
+        so it is never linked to a later submission.
+
+        Args:
+            key: Submission id
+            url: Video URL the submission finished with, if any
+        """
+        submission = self.submissions.pop(key, None)
+        if submission and submission['card_id']:
+            self.baseline.add(submission['card_id'])
+        if url:
+            self.baseline.update(
+                card['id'] for card in self.cards.values()
+                if card['url'] and url.startswith(card['url'])
+            )
+
+    def card_for(self, key: str) -> Optional[Dict]:
+        """
+        Get the current card of a submission
+
+        Args:
+            key: Submission id
+
+        Returns:
+            Card dict ({'id', 'state', 'percent', 'url', 'text'}) or None if not matched yet
+        """
+        submission = self.submissions.get(key)
+        if not submission or not submission['card_id']:
+            return None
+        return self.cards.get(submission['card_id'])
+
+    def _link_submissions(self, cards: List[Dict]):
+        """Match unmatched submissions to cards that are not claimed yet"""
+        claimed = {s['card_id'] for s in self.submissions.values() if s['card_id']}
+        free = [card for card in cards if card['id'] not in self.baseline and card['id'] not in claimed]
+        if not free:
+            return
+
+        waiting = sorted(
+            (item for item in self.submissions.items() if not item[1]['card_id']),
+            key=lambda item: item[1]['submitted_at']
+        )
+
+        # Prompt text on the card is the reliable link
+        for key, submission in waiting:
+            for card in free:
+                if submission['prompt'] and submission['prompt'] in _normalize(card['text']):
+                    submission['card_id'] = card['id']
+                    free.remove(card)
+                    break
+
+        # Anything left: oldest submission gets the oldest new card
+        free.sort(key=lambda card: int(card['id']))
+        for key, submission in waiting:
+            if not submission['card_id'] and free:
+                submission['card_id'] = free.pop(0)['id']
+                logger.debug(f"   Card {submission['card_id']} linked to {key} by order")
+
+    # ---------- Queue accounting ----------
+
+    def pending_count(self) -> int:
+        """Videos occupying Flow's queue (ours and any others on the page)"""
+        linked = {s['card_id'] for s in self.submissions.values() if s['card_id']}
+        pending = sum(
+            1 for card in self.cards.values()
+            if card['state'] in PENDING_STATES and (card['id'] in self.progressed or card['id'] in linked)
+        )
+        unrendered = sum(1 for s in self.submissions.values() if not s['card_id'])
+        return pending + unrendered
+
+    def free_slots(self) -> int:
+        """Submissions Flow will accept right now"""
+        return max(self.max_queue - self.pending_count(), 0)
@@ -6,22 +6,103 @@ Tự động hóa việc tạo video trên Flow với VEO 3.1
 import asyncio
 import json
 import os
-from typing import Dict, List, Optional
+import re
+import time
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-from playwright.async_api import async_playwright, Page, Browser, BrowserContext
+from playwright.async_api import async_playwright, Page, Browser, BrowserContext, Playwright
 import logging
 
+from .card_index import CardIndex, find_card
+from .generation_eta import GenerationETA
+from .lean_profile import LEAN_VIEWPORT, apply_lean_profile, block_heavy_requests
+from .network_capture import NetworkCapture, base_video_url, find_video_urls
+from .selector_registry import SelectorRegistry, locale_of
+from .video_downloader import VideoDownloader
+from .video_events import VideoEventStream
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Google Storage URL of a generated Flow video
+VIDEO_URL_PATTERN = r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+'
+
+# One round trip per completion check: play button state + error elements
+# (Based on Button2.txt: button with icon play_arrow)
+COMPLETION_PROBE_JS = """
+() => {
+    const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const playButtons = [...document.querySelectorAll('button, [role="button"]')].filter((el) =>
+        (el.textContent || '').includes('play_arrow') ||
+        (el.getAttribute('aria-label') || '').toLowerCase().includes('play')
+    ).filter(visible);
+    const isDisabled = (el) => el.disabled || el.getAttribute('aria-disabled') === 'true';
+    const error = document.querySelector('[role="alert"], .error, .error-message');
+    return {
+        ready: playButtons.some((el) => !isDisabled(el)),
+        disabled: playButtons.some(isDisabled),
+        error: error ? (error.innerText || '').trim() || 'error' : null
+    };
+}
+"""
+
+# Flow has rendered: the dashboard's "new project" button, a project's prompt
+# box, or a redirect to the Google login page
+FLOW_READY_JS = """
+() => location.hostname.includes('accounts.google.com') ||
+      !!document.querySelector('textarea') ||
+      [...document.querySelectorAll('button')].some((el) =>
+          /Dự án mới|New project/i.test(el.textContent || ''))
+"""
+
+# Prompt box of a project page (all known placeholders)
+PROMPT_BOX_SELECTOR = (
+    'textarea[node="72"], '
+    'textarea[placeholder*="Tạo một video"], '
+    'textarea[placeholder*="Create a video"], '
+    'textarea'
+)
+
+
+async def launch_browser(headless: bool = False) -> Tuple[Playwright, Browser]:
+    """
+    Launch the Chrome instance used for Flow automation
+
+    Args:
+        headless: Run browser in headless mode
+
+    Returns:
+        (Playwright driver, Browser); call ``.stop()`` on the driver after
+        closing the browser or its process stays alive
+    """
+    playwright = await async_playwright().start()
+
+    logger.info("🚀 Starting browser (Chrome)...")
+    # Note: Comet is not compatible with Playwright - using standard Chrome instead
+    try:
+        browser = await playwright.chromium.launch(
+            headless=headless,
+            channel='chrome',  # Use installed Chrome browser
+            args=[
+                '--disable-blink-features=AutomationControlled',
+                '--disable-dev-shm-usage',
+                '--no-sandbox',
+            ]
+        )
+    except Exception:
+        await playwright.stop()
+        raise
+    return playwright, browser
+
 
 class FlowController:
     def __init__(
         self,
         cookies_path: str = "./config/cookies.json",
         download_dir: str = "./data/videos",
-        headless: bool = False
+        headless: bool = False,
+        lean: bool = False
     ):
         """
         Initialize Flow Controller
@@ -30,36 +111,51 @@ class FlowController:
             cookies_path: Path to cookies JSON file
             download_dir: Directory to save downloaded videos
             headless: Run browser in headless mode
+            lean: Block media/images/fonts, disable autoplay and use a smaller
+                viewport (for generation workers that never watch previews)
         """
         self.cookies_path = cookies_path
         self.download_dir = download_dir
         self.headless = headless
+        self.lean = lean
+        self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        self.events: Optional[VideoEventStream] = None
+        self.capture: Optional[NetworkCapture] = None
+        self.downloader: Optional[VideoDownloader] = None
+        self.eta = GenerationETA()
+        self.last_timings: Dict[str, float] = {}  # Phases of the last prompt submission
+        self.selectors = SelectorRegistry()
+        self.cards = CardIndex()  # Links prompts submitted here to their video cards
+        self.last_card_key: Optional[str] = None  # Submission wait_for_video_completion() follows
+        self._submission_count = 0
+        self._owns_browser = True
 
         os.makedirs(download_dir, exist_ok=True)
 
-    async def start(self):
-        """Start browser and load cookies"""
-        playwright = await async_playwright().start()
+    async def start(self, browser: Optional[Browser] = None):
+        """
+        Start browser and load cookies
 
-        logger.info("🚀 Starting browser (Chrome)...")
-        # Note: Comet is not compatible with Playwright - using standard Chrome instead
-        self.browser = await playwright.chromium.launch(
-            headless=self.headless,
-            channel='chrome',  # Use installed Chrome browser
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-            ]
-        )
+        Args:
+            browser: Optional running browser to open this controller's
+                context in (e.g. one browser shared by several accounts).
+                A new browser is launched when omitted.
+        """
+        if browser is None:
+            self.playwright, self.browser = await launch_browser(headless=self.headless)
+            self._owns_browser = True
+        else:
+            self.browser = browser
+            self._owns_browser = False
 
         # Create context with larger viewport to ensure all UI elements are visible
         # Fixed: Previous viewport was too small, causing submit button to be hidden
         self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},  # Standard Full HD resolution
+            # Standard Full HD resolution (lean workers use the smaller tracker viewport)
+            viewport=LEAN_VIEWPORT if self.lean else {'width': 1920, 'height': 1080},
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
             accept_downloads=True,
             device_scale_factor=1  # Standard scaling to ensure UI elements fit
@@ -85,9 +181,48 @@ class FlowController:
         else:
             logger.warning(f"⚠️  Cookies file not found: {self.cookies_path}")
 
+        # Generation results and media requests also report video URLs
+        self.events = VideoEventStream()
+        self.capture = NetworkCapture(self.events)
+        self.capture.attach(self.context)
+
+        if self.lean:
+            await apply_lean_profile(self.context)
+
         self.page = await self.context.new_page()
+        if self.lean:
+            # Blocked video fetches still carry the URL
+            await block_heavy_requests(self.page, on_blocked=self.capture.record)
+
+        # In-page observer pushes new video URLs / progress / errors as events
+        await self.events.attach(self.page)
+
+        # Direct HTTP downloads with the context's cookies
+        self.downloader = VideoDownloader(self.context)
+
         logger.info("✅ Browser started")
 
+    async def _wait_for_flow_ready(self, timeout: int = 20000):
+        """Wait until Flow has rendered (or redirected to login)"""
+        try:
+            await self.page.wait_for_function(FLOW_READY_JS, timeout=timeout)
+        except Exception as e:
+            logger.debug(f"   Flow not ready after {timeout / 1000:.0f}s: {str(e)}")
+
+    async def _wait_for_prompt_box(self, timeout: int = 20000):
+        """Wait until a project's prompt box is visible"""
+        try:
+            await self.page.wait_for_selector(PROMPT_BOX_SELECTOR, state="visible", timeout=timeout)
+        except Exception as e:
+            logger.debug(f"   Prompt box not visible after {timeout / 1000:.0f}s: {str(e)}")
+
+    async def _wait_for_network_idle(self, timeout: int = 5000):
+        """Wait for the network to settle (Flow polls, so this may time out)"""
+        try:
+            await self.page.wait_for_load_state("networkidle", timeout=timeout)
+        except Exception:
+            pass
+
     async def save_cookies(self):
         """Save current cookies to file"""
         cookies = await self.context.cookies()
@@ -106,7 +241,7 @@ class FlowController:
             wait_until="domcontentloaded",
             timeout=60000
         )
-        await asyncio.sleep(5)  # Wait for dynamic content
+        await self._wait_for_flow_ready()
 
         # Check if logged in by looking at URL (better than content check)
         try:
@@ -158,16 +293,11 @@ class FlowController:
             ]
 
             clicked = False
-            for selector in create_selectors:
-                try:
-                    await self.page.wait_for_selector(selector, timeout=5000)
-                    await self.page.click(selector)
-                    clicked = True
-                    logger.info(f"   ✅ Clicked button: {selector}")
-                    break
-                except Exception as e:
-                    logger.debug(f"   Selector failed: {selector}")
-                    continue
+            selector, button = await self.selectors.find(self.page, "new_project", create_selectors)
+            if button:
+                await button.click()
+                clicked = True
+                logger.info(f"   ✅ Clicked button: {selector}")
 
             if not clicked:
                 logger.error("   ❌ Could not find '+ Dự án mới' button")
@@ -178,7 +308,11 @@ class FlowController:
             # Wait for navigation to new project page
             # Flow auto-generates UUID and redirects to /project/{UUID}
             logger.info("   ⏳ Waiting for redirect to new project...")
-            await asyncio.sleep(5)  # Wait for page load
+            try:
+                await self.page.wait_for_url("**/project/**", timeout=15000)
+                await self._wait_for_prompt_box()
+            except Exception as e:
+                logger.debug(f"   Redirect wait ended: {str(e)}")
 
             # Get project ID from URL
             current_url = self.page.url
@@ -215,7 +349,7 @@ class FlowController:
 
         try:
             await self.page.goto(project_url, wait_until="domcontentloaded", timeout=60000)
-            await asyncio.sleep(3)
+            await self._wait_for_prompt_box()
 
             # Verify we're on the project page
             current_url = self.page.url
@@ -250,12 +384,15 @@ class FlowController:
             Video URL or None if failed
         """
         logger.info(f"🎬 Creating video with prompt: {prompt[:100]}...")
+        started_at = time.monotonic()
+        timings = {}
 
         try:
-            # If first video, wait longer for page to be fully ready
+            # If first video, make sure the project page has finished rendering
             if is_first_video:
                 logger.info("   ⏳ First video - waiting for page to be ready...")
-                await asyncio.sleep(5)
+                await self._wait_for_prompt_box()
+            timings['ready'] = time.monotonic() - started_at
 
             # Find and fill prompt textarea
             # Updated selectors based on Quytrinh.txt - node="72" is the primary selector
@@ -270,27 +407,26 @@ class FlowController:
             filled = False
             max_retries = 3
             for retry in range(max_retries):
-                for selector in prompt_selectors:
+                selector, textarea = await self.selectors.find(self.page, "prompt_box", prompt_selectors)
+                if textarea:
                     try:
-                        await self.page.wait_for_selector(selector, timeout=5000)
-                        # Clear any existing text first
-                        await self.page.fill(selector, "")
-                        await asyncio.sleep(0.5)
-                        # Fill with prompt
-                        await self.page.fill(selector, prompt)
+                        # fill() clears any existing text first
+                        await textarea.fill(prompt)
+                        # Flow's editor must have taken the text before submit
+                        await self.page.wait_for_function(
+                            "([el, length]) => (el.value || '').length >= length",
+                            arg=[textarea, len(prompt)],
+                            timeout=5000
+                        )
                         filled = True
                         logger.info(f"✅ Prompt entered using: {selector}")
                         break
                     except Exception as e:
-                        logger.debug(f"   Selector failed: {selector} - {str(e)}")
-                        continue
-
-                if filled:
-                    break
+                        logger.debug(f"   Fill failed: {selector} - {str(e)}")
 
                 if retry < max_retries - 1:
                     logger.info(f"   ⏳ Retry {retry + 1}/{max_retries}...")
-                    await asyncio.sleep(3)
+                    await self._wait_for_network_idle()
 
             if not filled:
                 logger.error("❌ Could not find prompt textarea after retries")
@@ -298,7 +434,7 @@ class FlowController:
                 await self.page.screenshot(path=f"./debug_no_textarea_{datetime.now().strftime('%H%M%S')}.png")
                 return None
 
-            await asyncio.sleep(2)
+            timings['fill'] = time.monotonic() - started_at - timings['ready']
 
             # Ensure "Từ văn bản sang video" is selected in scene dropdown
             # Based on Quytrinh.txt: select[node="246"]
@@ -312,7 +448,6 @@ class FlowController:
                     # Ensure it's set to "Từ văn bản sang video" mode
                     # We may need to adjust this value based on actual options
                     await self.page.select_option('select[node="246"]', index=0)
-                    await asyncio.sleep(0.5)
                     logger.info("   ✅ Scene type set to video generation mode")
                 else:
                     logger.debug("   ℹ️  Scene selector not found (may not be needed)")
@@ -337,24 +472,30 @@ class FlowController:
                 'button[type="submit"]'
             ]
 
+            await self._track_submission(prompt)
+
             clicked = False
-            for selector in generate_button_selectors:
+            selector, button = await self.selectors.find(self.page, "generate_button", generate_button_selectors)
+            if button:
                 try:
-                    # Wait for button to be visible and clickable
-                    await self.page.wait_for_selector(selector, state="visible", timeout=5000)
-                    await self.page.click(selector)
+                    # click() waits until the button is enabled
+                    await button.click(timeout=10000)
                     clicked = True
                     logger.info(f"✅ Generate button clicked: {selector}")
-                    break
                 except Exception as e:
-                    logger.debug(f"   Selector failed: {selector} - {str(e)}")
-                    continue
+                    logger.debug(f"   Click failed: {selector} - {str(e)}")
 
             if not clicked:
+                self.cards.forget(self.last_card_key)
                 logger.error("❌ Could not find generate button")
                 logger.info("   💡 You may need to click manually or update selectors")
                 return None
 
+            timings['submit'] = time.monotonic() - started_at - timings['ready'] - timings['fill']
+            self.last_timings = timings
+            logger.info(f"   ⏱️  ready {timings['ready']:.1f}s | fill {timings['fill']:.1f}s | "
+                        f"submit {timings['submit']:.1f}s")
+
             if not wait_for_generation:
                 return "pending"
 
@@ -368,73 +509,133 @@ class FlowController:
             logger.error(f"❌ Error creating video: {str(e)}")
             return None
 
-    async def wait_for_video_completion(self, timeout: int = 420) -> bool:
+    async def _track_submission(self, prompt: str):
+        """Register a prompt with the card index so its own card can be followed"""
+        # A submission nobody waited for would hold a queue slot forever
+        if self.last_card_key:
+            self.cards.forget(self.last_card_key)
+
+        try:
+            await self.cards.refresh(self.page)
+        except Exception as e:
+            logger.debug(f"   Could not read video cards: {str(e)}")
+        if not self.cards.submissions:
+            # Cards already on the page are not ours (once per batch)
+            self.cards.mark_baseline()
+
+        self._submission_count += 1
+        self.last_card_key = f"prompt_{self._submission_count}"
+        self.cards.submit(self.last_card_key, prompt)
+
+    async def get_video_urls(self) -> set:
+        """
+        Get all generated video URLs currently on the page
+
+        Returns:
+            Set of Google Storage video URLs
+        """
+        if self.events:
+            return self.events.known_urls()
+
+        content = await self.page.content()
+        return set(re.findall(VIDEO_URL_PATTERN, content))
+
+    async def wait_for_video_completion(self, timeout: int = 420, card_key: Optional[str] = None) -> bool:
         """
-        Wait for video generation to complete by checking for play button
+        Wait for one submitted video to finish
+
+        The submission's own video card decides, so other cards finishing or
+        failing never end the wait; the page-wide play-button probe is only
+        used when Flow shows no recognisable cards. Checks are scheduled by
+        the ETA model: long sleeps until the earliest typical finish, then
+        dense checks; pushed page events wake it up early.
 
         Args:
             timeout: Maximum wait time in seconds (default 7 minutes)
+            card_key: Submission to follow (default: the last prompt submitted)
 
         Returns:
             True if video completed, False if timeout/failed
         """
         logger.info("⏳ Waiting for video generation to complete...")
-        start_time = datetime.now()
-        last_log_time = datetime.now()
-
-        while (datetime.now() - start_time).seconds < timeout:
+        card_key = card_key or self.last_card_key
+        try:
+            return await self._wait_for_card(card_key, timeout)
+        finally:
+            if card_key:
+                card = self.cards.card_for(card_key)
+                self.cards.forget(card_key, card['url'] if card else None)
+                if card_key == self.last_card_key:
+                    self.last_card_key = None
+
+    async def _wait_for_card(self, card_key: Optional[str], timeout: int) -> bool:
+        """Check a submission's card (or the page-wide probe) until done, failed or timed out"""
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
+        last_log_time = start_time
+        checks = 0
+        percent = None
+
+        while True:
+            elapsed = loop.time() - start_time
             try:
-                # Check for play button which appears when video is ready
-                # Based on Button2.txt: button with icon play_arrow
-                play_button_selectors = [
-                    'button:has-text("play_arrow")',
-                    'button[aria-label*="play"]',
-                    'button[aria-label*="Play"]',
-                    '[role="button"]:has-text("play_arrow")'
-                ]
-
-                for selector in play_button_selectors:
-                    try:
-                        element = await self.page.query_selector(selector)
-                        if element:
-                            is_visible = await element.is_visible()
-                            # IMPORTANT: Check if button is NOT disabled
-                            # In SceneBuilder mode, play button exists but is disabled while loading
-                            is_enabled = await element.is_enabled()
-
-                            if is_visible and is_enabled:
-                                logger.info("✅ Video generation completed! Play button is enabled.")
-                                return True
-                            elif is_visible and not is_enabled:
-                                # Button exists but still disabled - video is still generating
-                                logger.debug(f"   Play button found but disabled (still generating)...")
-                    except:
-                        continue
-
-                # Log progress every 30 seconds
-                elapsed = (datetime.now() - last_log_time).seconds
-                if elapsed >= 30:
-                    total_elapsed = (datetime.now() - start_time).seconds
-                    logger.info(f"   ⏳ Still waiting... ({total_elapsed}s / {timeout}s)")
-                    last_log_time = datetime.now()
-
-                # Check for error messages
-                error_selectors = ['[role="alert"]', '.error', '.error-message']
-                for selector in error_selectors:
-                    try:
-                        error = await self.page.query_selector(selector)
-                        if error:
-                            error_text = await error.inner_text()
-                            logger.error(f"❌ Generation error: {error_text}")
-                            return False
-                    except:
-                        continue
+                checks += 1
+                card = None
+                if card_key:
+                    await self.cards.refresh(self.page)
+                    card = self.cards.card_for(card_key)
+
+                if card is not None:
+                    if card['state'] == 'ready':
+                        logger.info(f"✅ Video generation completed! Card is ready. "
+                                    f"({elapsed:.0f}s, {checks} checks)")
+                        self.eta.record(elapsed)
+                        return True
+                    if card['state'] == 'failed':
+                        logger.error(f"❌ Generation error: {card['text'][:100]}")
+                        return False
+                    percent = card['percent']
+
+                elif card_key and self.cards.cards:
+                    logger.debug("   Video card not rendered yet")
+
+                else:
+                    # No recognisable cards on the page - page-wide probe
+                    status = await self.page.evaluate(COMPLETION_PROBE_JS)
+
+                    if status['ready']:
+                        logger.info(f"✅ Video generation completed! Play button is enabled. "
+                                    f"({elapsed:.0f}s, {checks} checks)")
+                        self.eta.record(elapsed)
+                        return True
+
+                    if status['error']:
+                        logger.error(f"❌ Generation error: {status['error']}")
+                        return False
 
-                await asyncio.sleep(5)  # Check every 5 seconds
+                    if status['disabled']:
+                        # In SceneBuilder mode, play button exists but is disabled while loading
+                        logger.debug("   Play button found but disabled (still generating)...")
 
             except Exception as e:
                 logger.warning(f"⚠️  Error while waiting: {str(e)}")
-                await asyncio.sleep(5)
+
+            # Log progress every 30 seconds
+            if loop.time() - last_log_time >= 30:
+                progress = f" - Flow progress: {percent}%" if percent is not None else ""
+                logger.info(f"   ⏳ Still waiting... ({elapsed:.0f}s / {timeout}s){progress}")
+                last_log_time = loop.time()
+
+            remaining = timeout - (loop.time() - start_time)
+            if remaining <= 0:
+                break
+
+            # The ETA model only decides how often to check
+            interval = self.eta.next_interval(loop.time() - start_time, remaining)
+            if self.events:
+                await self.events.wait_for_change(interval)
+            else:
+                await asyncio.sleep(interval)
 
         logger.error(f"❌ Timeout after {timeout} seconds")
         return False
@@ -481,294 +682,426 @@ class FlowController:
         Returns:
             Path to downloaded file or None if failed
         """
-        try:
-            logger.info(f"📥 Downloading video from UI (quality: {quality})...")
-
-            # Step 1: Find the more options button (icon: more_vert)
-            more_options_selectors = [
-                'button:has-text("more_vert")',
-                'button[aria-label*="More"]',
-                'button[aria-label*="options"]',
-                '[role="button"]:has-text("more_vert")'
-            ]
-
-            clicked_menu = False
-            for selector in more_options_selectors:
-                try:
-                    # If prompt_text provided, try to find the specific video card first
-                    if prompt_text:
-                        # Find video card containing the prompt
-                        video_cards = await self.page.query_selector_all('div')
-                        for card in video_cards:
-                            try:
-                                card_text = await card.inner_text()
-                                if prompt_text.lower() in card_text.lower():
-                                    # Found the card, look for more button within it
-                                    more_btn = await card.query_selector(selector)
-                                    if more_btn:
-                                        await more_btn.click()
-                                        clicked_menu = True
-                                        logger.info(f"✅ Clicked more options for video: {prompt_text}")
-                                        break
-                            except:
-                                continue
-                        if clicked_menu:
-                            break
-                    else:
-                        # Just click the first more options button
-                        await self.page.wait_for_selector(selector, timeout=5000)
-                        await self.page.click(selector)
-                        clicked_menu = True
-                        logger.info(f"✅ Clicked more options button: {selector}")
-                        break
-                except:
-                    continue
+        results = await self.download_videos_from_ui(
+            [{'filename': filename, 'prompt_text': prompt_text}],
+            quality=quality
+        )
+        return results[0]
 
-            if not clicked_menu:
-                logger.error("❌ Could not find more options button")
-                return None
+    async def download_videos_from_ui(
+        self,
+        items: List[Dict],
+        quality: str = "1080p",
+        timeout: int = 300
+    ) -> List[Optional[str]]:
+        """
+        Download several videos through the Flow UI
 
-            # Wait for menu to appear
-            await asyncio.sleep(1)
+        For 1080p all upscale requests are fired back to back when every
+        item can be recognised (by prompt text or video URL). Each completion
+        notification is matched to its item through its text, a video URL in
+        it or the download's URL, and saved while the remaining upscales keep
+        running. Notifications that cannot be attributed are discarded and
+        those items are upscaled again one at a time.
 
-            # Step 2: Click download option ("Tải xuống")
-            download_menu_selectors = [
-                'button:has-text("Tải xuống")',
-                '[role="menuitem"]:has-text("Tải xuống")',
-                'div:has-text("Tải xuống")',
-                'button:has-text("Download")',
-                '[role="menuitem"]:has-text("Download")'
-            ]
+        Args:
+            items: List of {'filename', 'prompt_text', 'video_url'} (prompt_text
+                and video_url optional)
+            quality: Download quality ("gif"/"270p", "720p", or "1080p")
+            timeout: Max seconds to wait for all upscales
 
-            clicked_download_menu = False
-            for selector in download_menu_selectors:
+        Returns:
+            Paths to downloaded files (None for failures), same order as ``items``
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        upscaling = quality.lower() == "1080p"
+
+        if not upscaling:
+            # Other qualities download immediately after the menu click
+            for i, item in enumerate(items):
+                filepath = os.path.join(self.download_dir, item['filename'])
+                clicked = False
                 try:
-                    element = await self.page.query_selector(selector)
-                    if element:
-                        is_visible = await element.is_visible()
-                        if is_visible:
-                            await element.click()
-                            logger.info(f"✅ Clicked download menu: {selector}")
-                            clicked_download_menu = True
-                            break
+                    async with self.page.expect_download(timeout=20000) as download_info:
+                        clicked = await self._request_ui_download(item.get('prompt_text'), quality)
+                        if not clicked:
+                            # Raising leaves expect_download at once instead of waiting it out
+                            raise RuntimeError(f"could not request download of {item['filename']}")
+                    results[i] = await self._save_download(await download_info.value, filepath)
                 except Exception as e:
-                    logger.debug(f"   Selector failed: {selector} - {str(e)}")
-                    continue
+                    logger.error(f"❌ Download wait error: {str(e)}")
+                    # A recent file can only be ours if the download was really requested
+                    if clicked:
+                        results[i] = self._find_recent_download(filepath)
+            return results
+
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + timeout
+
+        # Step 4: Fire every upscale request back to back (Bước 7 trong xButton.txt).
+        # Only when every item can be recognised from its notification or
+        # download; otherwise upscale one at a time instead of guessing.
+        identifiable = len(items) > 1 and all(
+            item.get('prompt_text') or item.get('video_url') for item in items
+        )
+        pending = []
+        if identifiable:
+            for i, item in enumerate(items):
+                if await self._request_ui_download(item.get('prompt_text'), quality):
+                    pending.append(i)
+                else:
+                    logger.error(f"❌ Could not request upscale for {item['filename']}")
 
-            if not clicked_download_menu:
-                logger.error("❌ Could not find download menu option")
-                return None
+            logger.info(f"⏳ Waiting for {len(pending)} upscale(s) to 1080p (this may take 1-5 minutes)...")
+            pending = await self._collect_upscales(items, pending, results, deadline)
+            if pending:
+                logger.warning(f"⚠️  {len(pending)} upscale(s) could not be attributed - "
+                               f"retrying them one at a time")
+        else:
+            pending = list(range(len(items)))
+
+        # Step 5 (sequential): one outstanding request, so its notification is unambiguous
+        for i in pending:
+            if loop.time() >= deadline:
+                logger.warning(f"⚠️  Upscale timeout - {items[i]['filename']} not downloaded")
+                continue
+            if not await self._request_ui_download(items[i].get('prompt_text'), quality):
+                logger.error(f"❌ Could not request upscale for {items[i]['filename']}")
+                continue
+            await self._collect_upscales(items, [i], results, deadline, sequential=True)
 
-            # Wait for quality options popup to appear
-            await asyncio.sleep(1)
+        return results
 
-            # Step 3: Select quality option
-            # Based on Giaiphap.txt: Use multiple fallback methods
-            logger.info(f"   Selecting quality: {quality}")
+    async def _collect_upscales(
+        self,
+        items: List[Dict],
+        pending: List[int],
+        results: List[Optional[str]],
+        deadline: float,
+        sequential: bool = False
+    ) -> List[int]:
+        """
+        Download each requested upscale as its completion notification appears
 
-            # Wait for menu to fully render
+        Args:
+            items: Items of download_videos_from_ui
+            pending: Indexes whose upscale was requested
+            results: Result list to fill in
+            deadline: Loop time to give up at
+            sequential: Only one request is outstanding (no matching needed)
+
+        Returns:
+            Indexes whose notification could not be attributed
+        """
+        # <li>check_circle<br/>Đã xong việc tăng độ phân giải!<br/>Tải xuống<button>Đóng</button></li>
+        done_selector = 'li:has-text("Đã xong việc tăng độ phân giải!"):not([data-veo-handled])'
+        loop = asyncio.get_event_loop()
+        pending = list(pending)
+        unattributed = []
+        saves = []
+        notifications = len(pending)
+
+        while notifications:
             try:
-                await self.page.wait_for_selector('text=1080p', timeout=5000)
-                logger.info("   ✅ Menu appeared with 1080p option")
-            except:
-                logger.warning("   ⚠️  1080p text not found, trying anyway...")
+                # Playwright treats timeout=0 as "wait forever"
+                remaining_ms = max((deadline - loop.time()) * 1000, 1)
+                notification = await self.page.wait_for_selector(done_selector, timeout=remaining_ms)
+            except Exception:
+                logger.warning(f"⚠️  Upscale timeout - {len(pending)} video(s) not ready")
+                break
+
+            # Mark first so the next wait only sees newer notifications
+            await notification.evaluate("li => li.dataset.veoHandled = '1'")
+            notifications -= 1
+            index = pending[0] if sequential else await self._match_notification(notification, items, pending)
+
+            download = await self._download_from_notification(notification)
+            if download is None:
+                if index is not None:
+                    pending.remove(index)
+                    logger.error(f"❌ Could not download {items[index]['filename']}")
+                else:
+                    unattributed.append(None)
+                continue
+
+            if index is None:
+                index = self._match_download_url(download.url, items, pending)
+            if index is None:
+                # Never save one scene's upscale under another scene's name
+                logger.warning("⚠️  Upscale notification matches no requested video - discarding it")
+                await download.cancel()
+                unattributed.append(None)
+                continue
+
+            pending.remove(index)
+            filepath = os.path.join(self.download_dir, items[index]['filename'])
+            logger.info(f"✅ Upscale completed: {items[index]['filename']} ({len(pending)} left)")
+            # Save in the background and go straight back to waiting
+            saves.append((index, asyncio.create_task(self._save_download(download, filepath))))
+
+        for index, task in saves:
+            results[index] = await task
+
+        # Items still pending after every notification arrived were the unattributed ones
+        return pending if unattributed and not notifications else []
+
+    async def _download_from_notification(self, notification):
+        """Click a completion notification's download link and close it"""
+        download = None
+        try:
+            async with self.page.expect_download(timeout=20000) as download_info:
+                # IMPORTANT: "Tải xuống" is TEXT inside <li>, NOT a button!
+                link = await notification.query_selector('text=Tải xuống')
+                if not link:
+                    raise RuntimeError("download link missing from notification")
+                await link.click()
+            download = await download_info.value
+        except Exception as e:
+            logger.error(f"❌ Notification download failed: {str(e)}")
 
-            # Try multiple methods in order (from Giaiphap.txt)
-            clicked = False
+        close_button = await notification.query_selector('button:has-text("Đóng")')
+        if close_button:
+            try:
+                await close_button.click()
+            except Exception:
+                pass
+        return download
 
-            # Method 1: Click by text (simplest and most reliable)
-            if not clicked:
-                try:
-                    await self.page.click('text=Đã tăng độ phân giải (1080p)', timeout=3000)
-                    logger.info("✅ Clicked 1080p using text matching")
-                    clicked = True
-                except Exception as e:
-                    logger.debug(f"   Text matching failed: {str(e)}")
+    async def _request_ui_download(self, prompt_text: Optional[str], quality: str) -> bool:
+        """
+        Open a video's download menu and pick a quality
 
-            # Method 2: Click by icon (language-independent, recommended in Giaiphap.txt)
-            if not clicked:
-                try:
-                    await self.page.click('text=aspect_ratio', timeout=3000)
-                    logger.info("✅ Clicked 1080p using icon matching (aspect_ratio)")
-                    clicked = True
-                except Exception as e:
-                    logger.debug(f"   Icon matching failed: {str(e)}")
+        Args:
+            prompt_text: Optional prompt text to identify the video card
+            quality: Download quality ("gif"/"270p", "720p", or "1080p")
 
-            # Method 3: Position-based (3rd item in menu)
-            if not clicked:
+        Returns:
+            True if the quality option was clicked
+        """
+        logger.info(f"📥 Requesting download from UI (quality: {quality})...")
+
+        # Step 1: Find the more options button (icon: more_vert)
+        more_options_selectors = [
+            'button:has-text("more_vert")',
+            'button[aria-label*="More"]',
+            'button[aria-label*="options"]',
+            '[role="button"]:has-text("more_vert")'
+        ]
+
+        clicked_menu = False
+        if prompt_text:
+            # Find the video card containing the prompt (one in-page scan)
+            locale = locale_of(self.page.url)
+            card = await find_card(self.page, prompt=prompt_text)
+            if card is None:
+                logger.warning(f"⚠️  No video card shows prompt: {prompt_text[:60]}")
+            else:
+                # Look for the more button within it
+                for selector in self.selectors.order("card_more_options", more_options_selectors, locale):
+                    try:
+                        more_btn = await card.query_selector(selector)
+                        if more_btn:
+                            await more_btn.click()
+                            clicked_menu = True
+                            self.selectors.record("card_more_options", selector, locale)
+                            logger.info(f"✅ Clicked more options for video: {prompt_text[:60]}")
+                            break
+                    except Exception as e:
+                        logger.debug(f"   Selector failed: {selector} - {str(e)}")
+        else:
+            # Just click the first more options button
+            selector, button = await self.selectors.find(self.page, "more_options", more_options_selectors)
+            if button:
                 try:
-                    await self.page.locator('menu[aria-current="true"] menuitem').nth(2).click(timeout=3000)
-                    logger.info("✅ Clicked 1080p using position-based selector")
-                    clicked = True
+                    await button.click()
+                    clicked_menu = True
+                    logger.info(f"✅ Clicked more options button: {selector}")
                 except Exception as e:
-                    logger.debug(f"   Position-based failed: {str(e)}")
+                    logger.debug(f"   Click failed: {selector} - {str(e)}")
 
-            # Method 4: XPath fallback
-            if not clicked:
-                try:
-                    await self.page.locator('xpath=//*[contains(text(), "1080p")]').click(timeout=3000)
-                    logger.info("✅ Clicked 1080p using XPath")
-                    clicked = True
-                except Exception as e:
-                    logger.debug(f"   XPath failed: {str(e)}")
+        if not clicked_menu:
+            logger.error("❌ Could not find more options button")
+            return False
 
-            if not clicked:
-                logger.error("❌ All methods failed to click 1080p option")
-                return None
+        # Step 2: Click download option ("Tải xuống") as soon as the menu renders
+        download_menu_selectors = [
+            'button:has-text("Tải xuống")',
+            '[role="menuitem"]:has-text("Tải xuống")',
+            'div:has-text("Tải xuống")',
+            'button:has-text("Download")',
+            '[role="menuitem"]:has-text("Download")'
+        ]
+
+        clicked_download_menu = False
+        selector, element = await self.selectors.find(self.page, "download_menu", download_menu_selectors)
+        if element:
+            try:
+                await element.click()
+                logger.info(f"✅ Clicked download menu: {selector}")
+                clicked_download_menu = True
+            except Exception as e:
+                logger.debug(f"   Click failed: {selector} - {str(e)}")
 
-            # Step 4: Wait for upscale if 1080p (Bước 7 trong xButton.txt)
-            if quality.lower() == "1080p":
-                logger.info("⏳ Waiting for 1080p upscale (this may take 1-5 minutes)...")
-                await asyncio.sleep(3)
+        if not clicked_download_menu:
+            logger.error("❌ Could not find download menu option")
+            return False
 
-                # Wait for upscale notification to appear
-                # Based on xButton.txt: li:has-text("Đang tăng độ phân giải")
-                try:
-                    await self.page.wait_for_selector(
-                        'li:has-text("Đang tăng độ phân giải")',
-                        timeout=10000
-                    )
-                    logger.info("   📊 Upscale process started")
-                except:
-                    logger.warning("   ⚠️  Upscale notification not found, continuing anyway")
-
-                # Poll for upscale completion
-                upscale_complete = False
-                attempts = 0
-                max_attempts = 60  # 5 minutes (60 * 5 seconds)
-
-                while not upscale_complete and attempts < max_attempts:
-                    await asyncio.sleep(5)
-                    attempts += 1
-
-                    # Check for completion notification
-                    # Based on xButton.txt: li:has-text("Đã xong việc tăng độ phân giải!")
-                    try:
-                        # Check for completion notification (with exclamation mark!)
-                        completion_notif = await self.page.query_selector('li:has-text("Đã xong việc tăng độ phân giải!")')
-                        if completion_notif:
-                            logger.info("✅ Upscale completed!")
-                            upscale_complete = True
-                            break
+        # Step 3: Select quality option
+        # Based on Giaiphap.txt: Use multiple fallback methods
+        logger.info(f"   Selecting quality: {quality}")
 
-                        # Or check if upscaling notification disappeared
-                        upscaling_notif = await self.page.query_selector('li:has-text("Đang tăng độ phân giải")')
-                        if not upscaling_notif:
-                            logger.info("✅ Upscale notification gone - assuming complete")
-                            upscale_complete = True
-                            break
-                    except:
-                        pass
+        quality_labels = {
+            '1080p': ('Đã tăng độ phân giải (1080p)', 'aspect_ratio', 2),
+            '720p': ('Kích thước gốc (720p)', None, 1),
+            '270p': ('Ảnh GIF động (270p)', None, 0),
+            'gif': ('Ảnh GIF động (270p)', None, 0),
+        }
+        label, icon, position = quality_labels.get(quality.lower(), quality_labels['1080p'])
+        short_label = label[label.index('(') + 1:-1]
 
-                    # Log progress every 30 seconds
-                    if attempts % 6 == 0:
-                        logger.info(f"   ⏳ Still upscaling... ({attempts * 5}s / {max_attempts * 5}s)")
+        # Wait for menu to fully render
+        try:
+            await self.page.wait_for_selector(f'text={short_label}', timeout=5000)
+            logger.info(f"   ✅ Menu appeared with {short_label} option")
+        except:
+            logger.warning(f"   ⚠️  {short_label} text not found, trying anyway...")
+
+        # Try multiple methods in order (from Giaiphap.txt)
+        methods = [
+            ("text matching", lambda: self.page.click(f'text={label}', timeout=3000)),
+            ("position-based selector",
+             lambda: self.page.locator('menu[aria-current="true"] menuitem').nth(position).click(timeout=3000)),
+            ("XPath", lambda: self.page.locator(f'xpath=//*[contains(text(), "{short_label}")]').click(timeout=3000)),
+        ]
+        if icon:
+            # Language-independent, recommended in Giaiphap.txt
+            methods.insert(1, (f"icon matching ({icon})", lambda: self.page.click(f'text={icon}', timeout=3000)))
+
+        # Last run's working method first
+        step = f"quality_{short_label}"
+        locale = locale_of(self.page.url)
+        clicks = dict(methods)
+        for name in self.selectors.order(step, list(clicks), locale):
+            try:
+                await clicks[name]()
+                logger.info(f"✅ Clicked {short_label} using {name}")
+                self.selectors.record(step, name, locale)
+                return True
+            except Exception as e:
+                logger.debug(f"   {name} failed: {str(e)}")
 
-                if not upscale_complete:
-                    logger.warning("⚠️  Upscale timeout - will try to download anyway")
+        logger.error(f"❌ All methods failed to click {short_label} option")
+        return False
 
-                await asyncio.sleep(2)
+    async def _match_notification(self, notification, items: List[Dict], pending: List[int]) -> Optional[int]:
+        """Pick the pending item a completion notification belongs to (None if unknown)"""
+        try:
+            text = (await notification.inner_text()).lower()
+            html = await notification.evaluate("li => li.outerHTML")
+        except Exception:
+            return None
 
-            # Step 5: Click final download link (Bước 8 trong xButton.txt)
-            # IMPORTANT: "Tải xuống" is TEXT inside <li>, NOT a button!
-            # Based on xButton.txt structure:
-            # <li>check_circle<br/>Đã xong việc tăng độ phân giải!<br/>Tải xuống<button>Đóng</button></li>
-            logger.info("📥 Looking for final download link in notification...")
+        for index in pending:
+            prompt_text = items[index].get('prompt_text')
+            if prompt_text and prompt_text[:40].lower() in text:
+                return index
+        for url in find_video_urls(html):
+            index = self._match_download_url(url, items, pending)
+            if index is not None:
+                return index
+        return None
+
+    @staticmethod
+    def _match_download_url(url: str, items: List[Dict], pending: List[int]) -> Optional[int]:
+        """Pending item whose video_url is the same video as ``url``"""
+        for index in pending:
+            video_url = items[index].get('video_url')
+            if video_url and url and base_video_url(url) == base_video_url(video_url):
+                return index
+        return None
+
+    async def _save_download(self, download, filepath: str) -> Optional[str]:
+        """Save a Playwright download, falling back to the browser's download folder"""
+        try:
+            await download.save_as(filepath)
+            logger.info(f"✅ Video saved to: {filepath}")
+            return filepath
+        except Exception as e:
+            logger.error(f"❌ Download wait error: {str(e)}")
+            return self._find_recent_download(filepath)
 
-            filepath = os.path.join(self.download_dir, filename)
+    def _find_recent_download(self, filepath: str) -> Optional[str]:
+        """
+        Check if a file was downloaded anyway (browser's default download)
+        and rename it to ``filepath`` (keeping its extension)
+        """
+        import glob
 
-            try:
-                # Wait a moment for notification to fully render
-                await asyncio.sleep(1)
+        # Check for mp4, webm, or gif files
+        video_patterns = [
+            os.path.join(self.download_dir, "*.mp4"),
+            os.path.join(self.download_dir, "*.webm"),
+            os.path.join(self.download_dir, "*.gif")
+        ]
 
-                # Setup download listener
-                async with self.page.expect_download(timeout=20000) as download_info:
-                    # Click on "Tải xuống" text within the completion notification
-                    # Using locator to click text within the li element
-                    try:
-                        # Method 1: Click the text "Tải xuống" inside the success notification
-                        await self.page.locator('li:has-text("Đã xong việc tăng độ phân giải!")').locator('text=Tải xuống').click()
-                        logger.info("✅ Clicked download link in notification")
-                    except Exception as e:
-                        logger.error(f"❌ Could not click download link: {str(e)}")
-                        return None
+        all_video_files = []
+        for pattern in video_patterns:
+            all_video_files.extend(glob.glob(pattern))
 
-                    # Wait for download to complete
-                    download = await download_info.value
-                    await download.save_as(filepath)
-                    logger.info(f"✅ Video saved to: {filepath}")
-                    return filepath
+        if all_video_files:
+            # Get the most recent one
+            latest_file = max(all_video_files, key=os.path.getctime)
+            file_age = os.path.getctime(latest_file)
 
-            except Exception as e:
-                # Download might have failed or timeout
-                logger.error(f"❌ Download wait error: {str(e)}")
-
-                # Check if file was downloaded anyway (browser's default download)
-                # Wait a bit for potential download to finish
-                await asyncio.sleep(5)
-
-                # Check downloads folder for any new video files
-                import glob
-                import time
-
-                # Check for mp4, webm, or gif files
-                video_patterns = [
-                    os.path.join(self.download_dir, "*.mp4"),
-                    os.path.join(self.download_dir, "*.webm"),
-                    os.path.join(self.download_dir, "*.gif")
-                ]
-
-                all_video_files = []
-                for pattern in video_patterns:
-                    all_video_files.extend(glob.glob(pattern))
-
-                if all_video_files:
-                    # Get the most recent one
-                    latest_file = max(all_video_files, key=os.path.getctime)
-                    file_age = os.path.getctime(latest_file)
-
-                    # If file is very recent (within last 20 seconds), assume it's our download
-                    if (time.time() - file_age) < 20:
-                        # Rename it to our desired filename
-                        # Keep original extension
-                        orig_ext = os.path.splitext(latest_file)[1]
-                        new_filepath = os.path.splitext(filepath)[0] + orig_ext
-
-                        os.rename(latest_file, new_filepath)
-                        logger.info(f"✅ Found and renamed recent download: {new_filepath}")
-                        return new_filepath
-
-                logger.error("❌ Download failed and no recent video found")
-                return None
+            # If file is very recent (within last 20 seconds), assume it's our download
+            if (time.time() - file_age) < 20:
+                orig_ext = os.path.splitext(latest_file)[1]
+                new_filepath = os.path.splitext(filepath)[0] + orig_ext
 
-        except Exception as e:
-            logger.error(f"❌ Download error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return None
+                os.rename(latest_file, new_filepath)
+                logger.info(f"✅ Found and renamed recent download: {new_filepath}")
+                return new_filepath
 
-    async def download_video(self, video_url: str, filename: str) -> Optional[str]:
+        logger.error("❌ Download failed and no recent video found")
+        return None
+
+    async def download_video(
+        self,
+        video_url: str,
+        filename: str,
+        page: Optional[Page] = None
+    ) -> Optional[str]:
         """
-        Download video from URL (legacy method)
+        Download video from URL
 
-        DEPRECATED: Use download_video_from_ui() for Flow videos
-        This method is kept for backwards compatibility
+        Fetches the file over HTTP through the shared download pool (signed
+        URL from the network capture when available). Falls back to a
+        browser download if the direct request fails.
 
         Args:
             video_url: Video URL
             filename: Output filename
+            page: Page to use for the fallback (default: a temporary page,
+                so the project page is never navigated away)
 
         Returns:
             Path to downloaded file or None
         """
-        try:
-            logger.info(f"📥 Downloading video from URL: {video_url}")
+        filepath = os.path.join(self.download_dir, filename)
+        logger.info(f"📥 Downloading video from URL: {video_url}")
 
-            filepath = os.path.join(self.download_dir, filename)
+        url = self.capture.resolve(video_url) if self.capture else video_url
+        if await self.downloader.download(url, filepath):
+            return filepath
+
+        own_page = page is None
+        page = page or await self.context.new_page()
 
-            # Method 1: Use page.goto to trigger download
-            async with self.page.expect_download() as download_info:
-                await self.page.goto(video_url)
+        try:
+            logger.info("   ↪️  Falling back to browser download")
+
+            async with page.expect_download() as download_info:
+                await page.goto(video_url)
 
             download = await download_info.value
             await download.save_as(filepath)
@@ -780,64 +1113,98 @@ class FlowController:
             logger.error(f"❌ Download error: {str(e)}")
             return None
 
+        finally:
+            if own_page:
+                await page.close()
+
+    async def download_videos(self, items: List[Dict]) -> List[Optional[str]]:
+        """
+        Download many videos concurrently
+
+        Args:
+            items: List of {'video_url', 'filename'}
+
+        Returns:
+            Paths to downloaded files (None for failures), same order
+        """
+        return await asyncio.gather(*(
+            self.download_video(item['video_url'], item['filename'])
+            for item in items
+        ))
+
     async def generate_scene_videos(
         self,
         scenes: List[Dict],
-        project_name: str = "video_project"
+        project_name: str = "video_project",
+        max_in_flight: int = 5,
+        timeout: int = 420
     ) -> List[Dict]:
         """
         Generate videos for all scenes
 
+        Keeps up to ``max_in_flight`` generations pending in Flow at once and
+        downloads finished videos in a separate stage (see SceneScheduler).
+
         Args:
             scenes: List of scene dictionaries with 'veo_prompt'
             project_name: Project name for organizing files
+            max_in_flight: Max generations pending at once (Flow allows 5)
+            timeout: Max seconds per generation
 
         Returns:
             List of scenes with video URLs and download paths
         """
-        results = []
-
-        for i, scene in enumerate(scenes, 1):
-            logger.info(f"\n{'='*60}")
-            logger.info(f"🎬 Processing Scene {i}/{len(scenes)}")
-            logger.info(f"{'='*60}")
-
-            prompt = scene.get('veo_prompt', scene.get('description', ''))
+        from .scene_scheduler import SceneScheduler
 
-            # Create video
-            video_url = await self.create_video_from_prompt(
-                prompt=prompt,
-                aspect_ratio=scene.get('aspect_ratio', '16:9'),
-                wait_for_generation=True
-            )
-
-            scene_result = {
-                **scene,
-                'video_url': video_url,
-                'download_path': None,
-                'status': 'success' if video_url else 'failed'
-            }
+        scheduler = SceneScheduler(
+            self,
+            max_in_flight=max_in_flight,
+            job_timeout=timeout
+        )
+        return await scheduler.run(scenes, project_name=project_name)
 
-            if video_url and video_url != "pending":
-                # Download video
-                filename = f"{project_name}_scene_{i:03d}.mp4"
-                download_path = await self.download_video(video_url, filename)
-                scene_result['download_path'] = download_path
+    async def stream_scene_videos(
+        self,
+        scenes,
+        project_name: str = "video_project",
+        max_in_flight: int = 5,
+        timeout: int = 420
+    ) -> List[Dict]:
+        """
+        Generate videos for scenes as they arrive (e.g. from a streamed script)
 
-            results.append(scene_result)
+        Args:
+            scenes: Blocking iterable of scene dictionaries with 'veo_prompt'
+            project_name: Project name for organizing files
+            max_in_flight: Max generations pending at once (Flow allows 5)
+            timeout: Max seconds per generation
 
-            # Small delay between scenes
-            if i < len(scenes):
-                logger.info("⏳ Waiting 10 seconds before next scene...")
-                await asyncio.sleep(10)
+        Returns:
+            List of scenes with video URLs and download paths
+        """
+        from .scene_scheduler import SceneScheduler
 
-        return results
+        scheduler = SceneScheduler(
+            self,
+            max_in_flight=max_in_flight,
+            job_timeout=timeout
+        )
+        return await scheduler.run_stream(scenes, project_name=project_name)
 
     async def close(self):
         """Close browser"""
-        if self.browser:
+        if self.downloader:
+            await self.downloader.close()
+        if self.browser and self._owns_browser:
             await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+                self.playwright = None
             logger.info("👋 Browser closed")
+        elif self.context:
+            # Shared browser: only this controller's context belongs to us
+            await self.context.close()
+            logger.info("👋 Browser context closed")
 
 
 # Example usage
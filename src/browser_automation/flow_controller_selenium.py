@@ -19,9 +19,65 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from webdriver_manager.chrome import ChromeDriverManager
 
+from .card_index import CardIndex
+from .generation_eta import GenerationETA
+from .network_capture import NetworkCapture, stream_download_sync
+from .video_events import VideoEventStream
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# One round trip per status check: everything the queue / progress / ready /
+# error checks need, read from the page in a single execute_script call
+STATUS_SNAPSHOT_JS = r"""
+const text = document.body ? document.body.innerText : '';
+const lower = text.toLowerCase();
+const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+
+// Progress indicators (Flow shows 3% -> 9% -> 15% ... -> 100% on each card)
+const percents = [...text.matchAll(/\b(\d{1,3})%/g)].map((m) => parseInt(m[1], 10));
+const cardProgress = [];
+const walker = document.createTreeWalker(document.body || document, NodeFilter.SHOW_TEXT);
+while (walker.nextNode()) {
+    const m = walker.currentNode.data.match(/^\s*(\d{1,3})%\s*$/);
+    if (m) cardProgress.push(parseInt(m[1], 10));
+}
+
+const videos = [...document.querySelectorAll('video')];
+const durations = [...text.matchAll(/0:\d{2}/g)].map((m) => m[0]);
+const bars = [...document.querySelectorAll('[role="progressbar"]')]
+    .map((el) => el.getAttribute('aria-valuenow')).filter((v) => v);
+const playButtons = [...document.querySelectorAll(
+    'button[aria-label*="Play"], button[aria-label*="play"], button.play-button, [role="button"][aria-label*="Play"]'
+)].filter((el) => visible(el) && !el.disabled);
+
+const errorKeywords = arguments[0];
+return {
+    percents: percents.filter((p) => p <= 100),
+    card_progress: cardProgress,
+    generating: (lower.match(/generating/g) || []).length,
+    in_progress_text: lower.includes('generating') || lower.includes('đang tạo'),
+    veo_fast: text.includes('Veo 3.1') && text.includes('Fast'),
+    progress_bars: bars,
+    loading_videos: videos.filter((v) => !(v.duration > 0)).length,
+    video_durations: videos.map((v) => v.duration).filter((d) => d > 0),
+    duration_labels: durations,
+    play_arrow: text.includes('play_arrow'),
+    play_buttons: playButtons.length,
+    error: errorKeywords.find((k) => lower.includes(k)) || null
+};
+"""
+
+# Flow shows "Không tạo được" when video generation fails
+ERROR_KEYWORDS = [
+    "không tạo được",  # Flow's Vietnamese error message
+    "failed to generate",
+    "error",
+    "failed",
+    "lỗi",
+    "thất bại"
+]
+
 
 class FlowControllerSelenium:
     """Flow Controller using Selenium with Comet browser"""
@@ -44,6 +100,12 @@ class FlowControllerSelenium:
         self.download_dir = download_dir
         self.headless = headless
         self.driver = None
+        self.events = VideoEventStream()
+        self.capture = NetworkCapture(self.events)
+        self.eta = GenerationETA()
+        self.cards = CardIndex()
+        self._submission_count = 0
+        self._baseline_taken = False  # Cards already on the page are marked once per batch
 
         os.makedirs(download_dir, exist_ok=True)
 
@@ -68,12 +130,18 @@ class FlowControllerSelenium:
         if self.headless:
             options.add_argument('--headless')
 
+        # Network events let us see video URLs the page fetches
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
         # Use webdriver-manager to auto-download correct ChromeDriver version
         service = Service(ChromeDriverManager().install())
         self.driver = webdriver.Chrome(service=service, options=options)
 
         logger.info("✅ Comet browser started")
 
+        # Observe video URLs / progress / errors on every page we open
+        self.events.attach_selenium(self.driver)
+
         # Load cookies
         self._load_cookies()
 
@@ -122,6 +190,7 @@ class FlowControllerSelenium:
         """Navigate to Flow homepage"""
         logger.info("🌐 Navigating to Flow...")
         self.driver.get("https://labs.google/fx/vi/tools/flow")
+        self._baseline_taken = False
         time.sleep(3)
         logger.info(f"✅ Navigated to Flow: {self.driver.current_url}")
 
@@ -130,6 +199,7 @@ class FlowControllerSelenium:
         logger.info(f"📁 Navigating to project: {project_id}")
         project_url = f"https://labs.google/fx/vi/tools/flow/project/{project_id}"
         self.driver.get(project_url)
+        self._baseline_taken = False
         time.sleep(5)  # Wait for page to load
 
         # Check if we successfully loaded the project
@@ -163,6 +233,7 @@ class FlowControllerSelenium:
             logger.info(f"   🌐 Navigating to: {project_url}")
 
             self.driver.get(project_url)
+            self._baseline_taken = False
 
             # Wait for Flow to initialize the project
             time.sleep(5)
@@ -260,37 +331,57 @@ class FlowControllerSelenium:
                     return None
 
             # Step 3.5: Get current video URLs before generating (to track new one)
-            import re
-            page_before = self.driver.page_source
-            gcs_pattern = r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+'
-            urls_before = set(re.findall(gcs_pattern, page_before))
+            self._poll_events()
+            urls_before = self.events.known_urls()
             logger.info(f"   📊 Current videos on page: {len(urls_before)}")
 
-            logger.info("   🎬 Clicking Generate button...")
-            # Use JavaScript click for more reliability
-            self.driver.execute_script("arguments[0].click();", generate_button)
-            time.sleep(3)
-            logger.info("   ✅ Generate button clicked")
-
-            # Step 4: Wait for video generation to complete
-            logger.info("   ⏳ Waiting for video generation...")
-            success = self._wait_for_video_generation(progress_callback=progress_callback, urls_before=urls_before)
+            # Link this submission to its video card. The baseline (cards that
+            # are not ours) is taken once per batch, so earlier in-flight
+            # submissions stay linkable.
+            self._submission_count += 1
+            card_key = f"prompt_{self._submission_count}"
+            self._refresh_cards()
+            if not self._baseline_taken:
+                self.cards.mark_baseline()
+                self._baseline_taken = True
+            self.cards.submit(card_key, prompt)
+
+            video_url = None
+            try:
+                logger.info("   🎬 Clicking Generate button...")
+                # Use JavaScript click for more reliability
+                self.driver.execute_script("arguments[0].click();", generate_button)
+                time.sleep(3)
+                logger.info("   ✅ Generate button clicked")
+
+                # Step 4: Wait for video generation to complete
+                logger.info("   ⏳ Waiting for video generation...")
+                success = self._wait_for_video_generation(
+                    progress_callback=progress_callback,
+                    urls_before=urls_before,
+                    card_key=card_key
+                )
+
+                if not success:
+                    logger.error("   ❌ Video generation failed or timed out")
+                    return None
 
-            if success:
                 logger.info("   ✅ Video generation completed!")
 
-                # Extract video URL from page (pass urls_before to find new URL)
-                video_url = self._extract_video_url(urls_before=urls_before)
-
-                if video_url:
-                    logger.info(f"   🎬 Video URL extracted: {video_url[:80]}...")
-                    return video_url
-                else:
-                    logger.warning("   ⚠️  Could not extract video URL, returning placeholder")
-                    return f"https://labs.google/fx/vi/tools/flow/video/generated"
+                # The card's own URL, else extract from page (pass urls_before to find new URL)
+                card = self.cards.card_for(card_key)
+                video_url = card['url'] if card and card['url'] else None
+                video_url = video_url or self._extract_video_url(urls_before=urls_before)
+            finally:
+                # Free the submission's queue slot whatever the outcome
+                self.cards.forget(card_key, video_url)
+
+            if video_url:
+                logger.info(f"   🎬 Video URL extracted: {video_url[:80]}...")
+                return video_url
             else:
-                logger.error("   ❌ Video generation failed or timed out")
-                return None
+                logger.warning("   ⚠️  Could not extract video URL, returning placeholder")
+                return f"https://labs.google/fx/vi/tools/flow/video/generated"
 
         except Exception as e:
             logger.error(f"   ❌ Error creating video: {e}")
@@ -298,6 +389,14 @@ class FlowControllerSelenium:
             traceback.print_exc()
             return None
 
+    def _poll_events(self):
+        """Collect new video URLs, progress and errors from the page and network log"""
+        self.events.poll_selenium(self.driver)
+        try:
+            self.capture.record_performance_log(self.driver.get_log('performance'))
+        except Exception as e:
+            logger.debug(f"      Performance log unavailable: {e}")
+
     def _wait_for_queue_slot(self, max_wait: int = 300) -> bool:
         """
         Wait for available slot in Flow queue
@@ -312,74 +411,84 @@ class FlowControllerSelenium:
         logger.info("   🔍 Checking Flow queue status...")
 
         start_time = time.time()
-        check_interval = 10  # Check every 10 seconds
+        check_interval = 3  # One round trip per check, so this can be short
 
         while time.time() - start_time < max_wait:
             elapsed = int(time.time() - start_time)
 
-            # Count pending videos in queue
-            pending_count = self._count_pending_videos()
+            # Cards give exact queue space; page-wide counts only when none are recognised
+            if self._refresh_cards():
+                pending_count = self.cards.pending_count()
+                has_space = self.cards.free_slots() > 0
+            else:
+                pending_count = self._count_pending_videos(self._snapshot())
+                has_space = pending_count < self.cards.max_queue
 
-            logger.info(f"      📊 Queue status: {pending_count}/5 pending videos")
+            logger.info(f"      📊 Queue status: {pending_count}/{self.cards.max_queue} pending videos")
 
-            if pending_count < 5:
-                logger.info(f"      ✅ Queue has space ({pending_count}/5) - Can submit new video")
+            if has_space:
+                logger.info(f"      ✅ Queue has space ({pending_count}/{self.cards.max_queue}) - Can submit new video")
                 return True
             else:
                 remaining = max_wait - elapsed
-                logger.info(f"      ⏳ Queue full (5/5) - Waiting... ({remaining}s remaining)")
+                logger.info(f"      ⏳ Queue full ({pending_count}/{self.cards.max_queue}) - Waiting... ({remaining}s remaining)")
                 time.sleep(check_interval)
 
         logger.error(f"      ⏱️ Timeout after {max_wait}s - Queue still full")
         return False
 
-    def _count_pending_videos(self) -> int:
+    def _snapshot(self) -> Dict:
         """
-        Count number of videos currently pending/generating in Flow queue
+        Read the page status in one WebDriver round trip
 
         Returns:
-            Number of pending videos (0-5)
+            Snapshot dict from STATUS_SNAPSHOT_JS (empty if the page could not be read)
         """
         try:
-            # Method 1: Count progress bars with % (indicates generating)
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
+            return self.driver.execute_script(STATUS_SNAPSHOT_JS, ERROR_KEYWORDS) or {}
+        except Exception as e:
+            logger.debug(f"      Could not read page status: {e}")
+            return {}
 
-            import re
-            # Find all percentages (indicates videos in progress)
-            percent_matches = re.findall(r'\b(\d{1,3})%\b', body_text)
+    def _refresh_cards(self) -> bool:
+        """
+        Rescan video cards on the page
 
-            # Each unique percentage likely represents one video
-            # But this is rough - count visible progress indicators
-            pending_count = len(percent_matches)
+        Returns:
+            True if the scan worked and found cards
+        """
+        try:
+            return bool(self.cards.refresh_selenium(self.driver))
+        except Exception as e:
+            logger.debug(f"      Could not read video cards: {e}")
+            return False
 
-            # Method 2: Look for "Generating..." text occurrences
-            generating_count = body_text.lower().count('generating')
-            if generating_count > 0:
-                pending_count = max(pending_count, generating_count)
+    def _count_pending_videos(self, snapshot: Optional[Dict] = None) -> int:
+        """
+        Count number of videos currently pending/generating in Flow queue
 
-            # Method 3: Count video elements that are still loading
-            video_elements = self.driver.find_elements(By.TAG_NAME, 'video')
-            loading_videos = 0
-            for video in video_elements:
-                try:
-                    # Check if video has duration (loaded) or not (loading)
-                    duration = video.get_attribute('duration')
-                    if not duration or duration == '0':
-                        loading_videos += 1
-                except:
-                    pass
+        Args:
+            snapshot: Status snapshot to use (default: take a new one)
 
-            pending_count = max(pending_count, loading_videos)
+        Returns:
+            Number of pending videos (0-5)
+        """
+        # Cards give the exact count: queued/in-progress cards + unrendered submissions
+        if snapshot is None and self._refresh_cards():
+            return min(self.cards.pending_count(), 5)
 
-            # Clamp between 0-5
-            pending_count = min(max(pending_count, 0), 5)
+        snapshot = snapshot if snapshot is not None else self._snapshot()
 
-            return pending_count
+        # Each visible percentage, "Generating..." label or unloaded <video>
+        # likely represents one video - take the largest count
+        pending_count = max(
+            len(snapshot.get('percents', [])),
+            snapshot.get('generating', 0),
+            snapshot.get('loading_videos', 0)
+        )
 
-        except Exception as e:
-            logger.debug(f"      Could not count pending videos: {e}")
-            # If can't determine, assume safe (return 0 to allow submission)
-            return 0
+        # Clamp between 0-5 (an unreadable page counts as 0 to allow submission)
+        return min(max(pending_count, 0), 5)
 
     def _find_textarea(self) -> Optional[any]:
         """Find the prompt input textarea"""
@@ -417,13 +526,21 @@ class FlowControllerSelenium:
 
         return None
 
-    def _wait_for_video_generation(self, timeout: int = 120, progress_callback=None, urls_before=None) -> bool:
+    def _wait_for_video_generation(
+        self,
+        timeout: int = 120,
+        progress_callback=None,
+        urls_before=None,
+        card_key: Optional[str] = None
+    ) -> bool:
         """
         Wait for video generation to complete with real-time progress tracking
 
         Args:
             timeout: Maximum wait time in seconds
             progress_callback: Optional callback function(elapsed, percent)
+            urls_before: Video URLs on the page before submitting
+            card_key: Submission key in the card index (tracks this video's own card)
 
         Returns:
             True if video generated successfully, False otherwise
@@ -431,7 +548,6 @@ class FlowControllerSelenium:
         logger.info(f"      Waiting up to {timeout}s for generation...")
 
         start_time = time.time()
-        check_interval = 3  # Check every 3 seconds for more frequent updates
 
         while time.time() - start_time < timeout:
             elapsed = int(time.time() - start_time)
@@ -439,6 +555,10 @@ class FlowControllerSelenium:
 
             logger.info(f"      ⏳ Progress: {percent}% ({elapsed}s / {timeout}s)")
 
+            # Drain observer events (new URLs, progress, errors) since last check
+            errors_before = len(self.events.errors)
+            self._poll_events()
+
             # Call progress callback if provided
             if progress_callback:
                 try:
@@ -446,148 +566,132 @@ class FlowControllerSelenium:
                 except Exception as e:
                     logger.debug(f"      Progress callback failed: {e}")
 
+            # This submission's own card decides whenever the page has cards
+            if card_key and self._refresh_cards():
+                card = self.cards.card_for(card_key)
+                if card is None:
+                    logger.debug("      Video card not rendered yet")
+                elif card['state'] == 'failed':
+                    logger.error("      ❌ Flow could not generate this video")
+                    return False
+                elif card['state'] == 'ready':
+                    logger.info("      ✅ Video card is ready!")
+                    self.eta.record(time.time() - start_time)
+                    return True
+                elif card['percent'] is not None:
+                    logger.info(f"      🎬 Flow progress: {card['percent']}%")
+
+                elapsed = time.time() - start_time
+                time.sleep(self.eta.next_interval(elapsed, timeout - elapsed))
+                continue
+
+            # No cards recognised on the page - fall back to page-wide checks
+            if urls_before is not None and self.events.known_urls() - urls_before:
+                logger.info("      ✅ New video URL appeared - video ready!")
+                self.eta.record(time.time() - start_time)
+                return True
+            if len(self.events.errors) > errors_before:
+                logger.error("      ❌ Error detected during generation")
+                return False
+
+            # One round trip feeds every check below
+            snapshot = self._snapshot()
+            if snapshot.get('card_progress'):
+                logger.debug(f"      Per-card progress: {snapshot['card_progress']}")
+
             # Check for progress bar on page
-            progress_info = self._check_generation_progress()
+            progress_info = self._check_generation_progress(snapshot)
             if progress_info:
                 logger.info(f"      🎬 Flow progress: {progress_info}")
 
             # Look for play button (indicates video is ready)
-            play_button = self._find_play_button()
+            play_button = self._find_play_button(snapshot)
             if play_button:
                 logger.info("      ✅ Play button found - video ready!")
+                self.eta.record(time.time() - start_time)
                 return True
 
             # Look for error indicators
-            if self._check_for_errors():
+            if self._check_for_errors(snapshot):
                 logger.error("      ❌ Error detected during generation")
                 return False
 
-            time.sleep(check_interval)
+            # Sleep long until the usual finish time, then check densely
+            elapsed = time.time() - start_time
+            time.sleep(self.eta.next_interval(elapsed, timeout - elapsed))
 
         logger.error(f"      ⏱️ Timeout after {timeout}s")
         return False
 
-    def _find_play_button(self) -> Optional[any]:
+    def _find_play_button(self, snapshot: Optional[Dict] = None) -> bool:
         """
-        Find the play button (indicates video is ready)
+        Check for the play button (indicates video is ready)
         Also checks for video completion indicators
+
+        Args:
+            snapshot: Status snapshot to use (default: take a new one)
         """
-        # Method 1: Look for play_arrow icon (Flow's video player)
-        try:
-            # Find elements containing "play_arrow" text (Material icon)
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
-
-            # Check if play_arrow icon exists AND progress % is gone
-            if "play_arrow" in body_text:
-                # Verify video is ready by checking no progress %
-                import re
-                percent_matches = re.findall(r'\b(\d{1,3})%\b', body_text)
-                if not percent_matches:  # No % means video complete
-                    logger.info(f"      ✅ Found play_arrow icon and no progress %")
-                    return True
-        except:
-            pass
+        snapshot = snapshot if snapshot is not None else self._snapshot()
 
-        # Method 2: Look for video duration "0:08" (8 seconds video)
-        try:
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
-            # Pattern for video duration: 0:08, 0:07, etc.
-            import re
-            duration_matches = re.findall(r'0:\d{2}', body_text)
-            if duration_matches:
-                logger.info(f"      ✅ Found video duration: {duration_matches[0]}")
-                return True
-        except:
-            pass
+        # Method 1: play_arrow icon (Flow's video player) AND no progress % left
+        if snapshot.get('play_arrow') and not snapshot.get('percents'):
+            logger.info("      ✅ Found play_arrow icon and no progress %")
+            return True
 
-        # Method 3: Traditional play button selectors
-        play_button_selectors = [
-            'button[aria-label*="Play"]',
-            'button[aria-label*="play"]',
-            'button.play-button',
-            '[role="button"][aria-label*="Play"]'
-        ]
+        # Method 2: Video duration label "0:08" (8 seconds video)
+        if snapshot.get('duration_labels'):
+            logger.info(f"      ✅ Found video duration: {snapshot['duration_labels'][0]}")
+            return True
 
-        for selector in play_button_selectors:
-            try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                for element in elements:
-                    if element.is_displayed() and element.is_enabled():
-                        logger.info(f"      ✅ Found play button via selector: {selector}")
-                        return element
-            except:
-                pass
+        # Method 3: Traditional play button selectors
+        if snapshot.get('play_buttons'):
+            logger.info("      ✅ Found enabled play button")
+            return True
 
-        return None
+        return False
 
-    def _check_generation_progress(self) -> Optional[str]:
+    def _check_generation_progress(self, snapshot: Optional[Dict] = None) -> Optional[str]:
         """
         Check for progress indicators on the Flow page
         Based on Flow's actual progress display: 3%, 9%, 15%, 21%, 33%, 45%, 57%...
 
+        Args:
+            snapshot: Status snapshot to use (default: take a new one)
+
         Returns:
             Progress string if found, None otherwise
         """
-        try:
-            # Look for progress percentage text (e.g., "3%", "9%", "15%", "45%")
-            # Flow shows: 3% → 9% → 15% → 21% → 33% → 45% → 57% → ... → 100%
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text
+        snapshot = snapshot if snapshot is not None else self._snapshot()
 
-            # Check for percentage patterns (1-3 digits + %)
-            import re
-            percent_matches = re.findall(r'\b(\d{1,3})%\b', body_text)
-            if percent_matches:
-                # Get all percentages found
-                percentages = [int(p) for p in percent_matches if int(p) <= 100]
-                if percentages:
-                    # Return the highest percentage (most recent progress)
-                    max_percent = max(percentages)
-                    return f"{max_percent}%"
-
-            # Check for "Generating..." or similar text
-            if "generating" in body_text.lower() or "đang tạo" in body_text.lower():
-                return "Generating..."
-
-            # Check for model name "Veo 3.1 - Fast" (indicates video in progress)
-            if "Veo 3.1" in body_text and "Fast" in body_text:
-                return "Processing (Veo 3.1 Fast)"
-
-            # Check for progress bar elements
-            progress_elements = self.driver.find_elements(By.CSS_SELECTOR, '[role="progressbar"]')
-            if progress_elements:
-                for elem in progress_elements:
-                    aria_valuenow = elem.get_attribute('aria-valuenow')
-                    if aria_valuenow:
-                        return f"{aria_valuenow}%"
+        # Highest percentage (most recent progress)
+        if snapshot.get('percents'):
+            return f"{max(snapshot['percents'])}%"
 
-        except Exception as e:
-            logger.debug(f"      Could not check progress: {e}")
+        if snapshot.get('in_progress_text'):
+            return "Generating..."
+
+        # Model name "Veo 3.1 - Fast" (indicates video in progress)
+        if snapshot.get('veo_fast'):
+            return "Processing (Veo 3.1 Fast)"
+
+        if snapshot.get('progress_bars'):
+            return f"{snapshot['progress_bars'][0]}%"
 
         return None
 
-    def _check_for_errors(self) -> bool:
+    def _check_for_errors(self, snapshot: Optional[Dict] = None) -> bool:
         """
         Check if there are any error messages on the page
         Flow shows "Không tạo được" when video generation fails
+
+        Args:
+            snapshot: Status snapshot to use (default: take a new one)
         """
-        # Flow-specific error message
-        error_keywords = [
-            "không tạo được",  # Flow's Vietnamese error message
-            "failed to generate",
-            "error",
-            "failed",
-            "lỗi",
-            "thất bại"
-        ]
+        snapshot = snapshot if snapshot is not None else self._snapshot()
 
-        try:
-            body_text = self.driver.find_element(By.TAG_NAME, 'body').text.lower()
-            for keyword in error_keywords:
-                if keyword in body_text:
-                    logger.error(f"      ❌ Error detected: '{keyword}' found on page")
-                    return True
-        except:
-            pass
+        if snapshot.get('error'):
+            logger.error(f"      ❌ Error detected: '{snapshot['error']}' found on page")
+            return True
 
         return False
 
@@ -597,39 +701,34 @@ class FlowControllerSelenium:
         Strategy: Find the NEWEST Google Storage URL by comparing before/after
         """
         try:
-            # Method 1: Extract Google Storage URL from page source (most reliable)
-            logger.info("      Searching for Google Storage URL in page source...")
-
-            import re
-            page_source = self.driver.page_source
+            # Method 1: Google Storage URLs reported by the page observer (most reliable)
+            logger.info("      Checking Google Storage URLs from page observer...")
 
-            # Pattern for Google Storage video URLs
-            gcs_pattern = r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+'
-            urls_after = set(re.findall(gcs_pattern, page_source))
+            self._poll_events()
+            urls_after = self.events.known_urls()
 
             logger.info(f"      Found {len(urls_after)} Google Storage URLs on page")
 
             if urls_before is not None:
-                # Find NEW URLs (appeared after video generation)
-                new_urls = urls_after - urls_before
+                # Find NEW URLs (appeared after video generation), in arrival order
+                new_urls = [url for url in self.events.urls if url not in urls_before]
                 if new_urls:
                     # Flow is set to create 1 video per prompt
                     # Get the first (and should be only) new URL
-                    new_urls_sorted = sorted(list(new_urls))
-                    latest_url = new_urls_sorted[0]
+                    latest_url = new_urls[0]
                     logger.info(f"      ✅ Found {len(new_urls)} NEW video URL(s)")
                     logger.info(f"      {latest_url[:80]}...")
                     return latest_url
                 else:
                     logger.warning("      ⚠️  No new URLs found, using last URL")
                     if urls_after:
-                        latest_url = sorted(list(urls_after))[-1]
+                        latest_url = self.events.urls[-1]
                         logger.info(f"      Using last URL: {latest_url[:80]}...")
                         return latest_url
             else:
                 # No before URLs provided, use last URL
                 if urls_after:
-                    latest_url = sorted(list(urls_after))[-1]
+                    latest_url = self.events.urls[-1]
                     logger.info(f"      ✅ Found Google Storage URL: {latest_url[:80]}...")
                     return latest_url
 
@@ -659,15 +758,15 @@ class FlowControllerSelenium:
 
             logger.info(f"      Found blob src: {src[:80]}...")
 
-            # Download blob video
+            # Blob sources are backed by a media request; stream that to disk instead
             if src.startswith('blob:'):
-                logger.info("      Downloading blob video to local file...")
-                local_path = self._download_blob_video(src)
+                logger.info("      Downloading captured media URL to local file...")
+                local_path = self._download_captured_video()
                 if local_path:
                     logger.info(f"      ✅ Video saved locally: {local_path}")
                     return local_path
                 else:
-                    logger.error("      ❌ Failed to download blob video")
+                    logger.error("      ❌ No media request captured for blob video")
                     return None
             else:
                 return src
@@ -709,59 +808,21 @@ class FlowControllerSelenium:
             logger.debug(f"      Could not convert blob URL: {e}")
             return None
 
-    def _download_blob_video(self, blob_url: str) -> Optional[str]:
+    def _download_captured_video(self) -> Optional[str]:
         """
-        Download video from blob URL and save locally
+        Stream the most recently captured video to data/videos
         Returns local file path
         """
-        try:
-            from datetime import datetime
-            logger.info("      Downloading video from blob URL...")
-
-            # Use JavaScript to convert blob to base64
-            video_base64 = self.driver.execute_async_script("""
-                let blobUrl = arguments[0];
-                let callback = arguments[1];
-
-                fetch(blobUrl)
-                    .then(r => r.blob())
-                    .then(blob => {
-                        let reader = new FileReader();
-                        reader.onload = () => callback(reader.result);
-                        reader.readAsDataURL(blob);
-                    })
-                    .catch(err => {
-                        console.error('Blob fetch error:', err);
-                        callback(null);
-                    });
-            """, blob_url)
-
-            if video_base64:
-                # Decode base64 and save
-                import base64
-                video_data = base64.b64decode(video_base64.split(',')[1])
-
-                # Save to data/videos directory
-                os.makedirs(self.download_dir, exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"video_{timestamp}.mp4"
-                filepath = os.path.join(self.download_dir, filename)
-
-                with open(filepath, 'wb') as f:
-                    f.write(video_data)
-
-                logger.info(f"      ✅ Video downloaded: {filepath}")
-                return filepath
-            else:
-                logger.error("      ❌ Failed to fetch blob data")
-                return None
-
-        except Exception as e:
-            logger.error(f"      Error downloading blob video: {e}")
-            import traceback
-            traceback.print_exc()
+        self._poll_events()
+        if not self.capture.media_urls:
             return None
 
+        url = list(self.capture.media_urls.values())[-1]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(self.download_dir, f"video_{timestamp}.mp4")
+
+        return stream_download_sync(url, filepath, cookies=self.driver.get_cookies())
+
     def close(self):
         """Close the browser"""
         if self.driver:
@@ -0,0 +1,130 @@
+"""
+Generation ETA - Learn how long Flow takes per scene and plan completion checks
+Học thời gian tạo video từ log các phiên trước để chờ rẻ lúc đầu và kiểm tra dày khi sắp xong
+"""
+
+import glob
+import json
+import os
+import logging
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationETA:
+    """
+    Completion-time model built from ``scene_complete`` events in session logs
+
+    The wait before the fastest typical finish (10th percentile) is spent in
+    long, cheap sleeps. Between that and the slow typical finish (90th
+    percentile) checks are dense; after it the interval backs off again.
+    """
+
+    # Used until enough history exists (Flow usually takes 2-7 minutes)
+    DEFAULT_ESTIMATE = {'early': 90.0, 'expected': 150.0, 'late': 300.0}
+
+    def __init__(
+        self,
+        log_dir: str = "./data/logs",
+        min_samples: int = 5,
+        max_samples: int = 200,
+        dense_interval: float = 2,
+        max_interval: float = 30
+    ):
+        """
+        Initialize Generation ETA
+
+        Args:
+            log_dir: Directory with DetailedLogger session_*.json files
+            min_samples: Samples needed before history replaces the defaults
+            max_samples: Only the most recent samples are used
+            dense_interval: Seconds between checks around the expected finish
+            max_interval: Longest single sleep
+        """
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.dense_interval = dense_interval
+        self.max_interval = max_interval
+        self.samples: List[float] = self._load_samples(log_dir)
+
+        estimate = self.estimate()
+        logger.debug(f"   ETA model: {len(self.samples)} samples, "
+                     f"expected {estimate['expected']:.0f}s "
+                     f"({estimate['early']:.0f}-{estimate['late']:.0f}s)")
+
+    def _load_samples(self, log_dir: str) -> List[float]:
+        """Read per-scene completion times from session logs (oldest first)"""
+        samples = []
+        for path in sorted(glob.glob(os.path.join(log_dir, "session_*.json")), key=os.path.getmtime):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    events = json.load(f).get('events', [])
+            except (OSError, ValueError):
+                continue
+
+            for event in events:
+                if event.get('type') != 'scene_complete':
+                    continue
+                seconds = event.get('metadata', {}).get('duration_seconds')
+                # Some callers log 0 when they did not time the scene
+                if isinstance(seconds, (int, float)) and seconds > 0:
+                    samples.append(float(seconds))
+
+        return samples[-self.max_samples:]
+
+    def record(self, seconds: float):
+        """
+        Add a completion time observed in this session
+
+        Args:
+            seconds: Time from submit to completion
+        """
+        self.samples.append(float(seconds))
+        self.samples = self.samples[-self.max_samples:]
+
+    def estimate(self) -> Dict[str, float]:
+        """
+        Get the current completion estimate
+
+        Returns:
+            {'early': p10, 'expected': median, 'late': p90} in seconds
+        """
+        if len(self.samples) < self.min_samples:
+            return dict(self.DEFAULT_ESTIMATE)
+
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+        return {'early': percentile(0.1), 'expected': percentile(0.5), 'late': percentile(0.9)}
+
+    def next_interval(self, elapsed: float, remaining: Optional[float] = None) -> float:
+        """
+        Seconds to sleep before the next completion check
+
+        Args:
+            elapsed: Seconds since the prompt was submitted
+            remaining: Optional seconds left before the caller's timeout
+
+        Returns:
+            Sleep duration in seconds
+        """
+        estimate = self.estimate()
+
+        if elapsed < estimate['early']:
+            # Nothing to see yet - sleep until just before the earliest finish
+            interval = estimate['early'] - elapsed
+        elif elapsed < estimate['late']:
+            interval = self.dense_interval
+        else:
+            # Slower than usual - back off gradually
+            overdue = elapsed - estimate['late']
+            interval = self.dense_interval * (1 + overdue / 30)
+
+        interval = min(max(interval, self.dense_interval), self.max_interval)
+        if remaining is not None:
+            interval = min(interval, max(remaining, 0))
+        return interval
@@ -0,0 +1,119 @@
+"""
+Lean Profile - Cheaper browser contexts for generation workers
+Chặn tải video xem trước, ảnh, font và tắt tự phát để mỗi context tốn ít băng thông / bộ nhớ hơn
+"""
+
+import asyncio
+import logging
+from typing import Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Smallest viewport that still shows the prompt bar and its submit button
+LEAN_VIEWPORT = {'width': 1280, 'height': 800}
+
+# Requests a worker never needs: thumbnails and icon fonts. Blocked by
+# Chromium itself (CDP Network.setBlockedURLs), so other requests never
+# pass through Python and the HTTP cache stays on.
+BLOCKED_URL_PATTERNS = [
+    '*://storage.googleapis.com/ai-sandbox-videofx/image/*',
+    '*://lh3.googleusercontent.com/*',
+    '*.png', '*.png?*', '*.jpg', '*.jpg?*', '*.jpeg', '*.jpeg?*', '*.webp', '*.webp?*', '*.gif', '*.gif?*',
+    '*://fonts.gstatic.com/*',
+    '*.woff', '*.woff?*', '*.woff2', '*.woff2?*', '*.ttf', '*.ttf?*',
+]
+
+# Card preview videos. The same URLs are used for downloads, so only
+# <video> fetches (resource type Media) of these are failed.
+PREVIEW_URL_PATTERN = '*://storage.googleapis.com/ai-sandbox-videofx/video/*'
+
+# Videos that do get created must not buffer or play
+NO_AUTOPLAY_JS = """
+(() => {
+    HTMLMediaElement.prototype.play = function () {
+        this.pause();
+        return Promise.resolve();
+    };
+    const quiet = (video) => {
+        video.autoplay = false;
+        video.preload = 'none';
+    };
+    new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            for (const node of mutation.addedNodes) {
+                if (node.nodeType !== 1) continue;
+                if (node.tagName === 'VIDEO') quiet(node);
+                node.querySelectorAll && node.querySelectorAll('video').forEach(quiet);
+            }
+        }
+    }).observe(document, {childList: true, subtree: true});
+})();
+"""
+
+
+async def apply_lean_profile(context):
+    """
+    Disable autoplay in every page of a Playwright context
+
+    Call ``block_heavy_requests`` for each page as well.
+
+    Args:
+        context: Playwright BrowserContext
+    """
+    await context.add_init_script(NO_AUTOPLAY_JS)
+
+
+async def block_heavy_requests(page, on_blocked: Optional[Callable[[str], None]] = None):
+    """
+    Block thumbnails, fonts and preview videos in a Playwright page
+
+    Icon buttons are ligature text (e.g. "play_arrow"), so selectors keep
+    working without the icon font; card URLs stay in the video ``src``
+    attributes even though the files are never fetched. Chromium pages are
+    blocked through CDP; other browsers fall back to narrow routes.
+
+    Args:
+        page: Playwright page (before it navigates)
+        on_blocked: Optional callback(url) for each blocked preview video, e.g.
+            NetworkCapture.record so blocked video fetches still report URLs
+    """
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send('Network.enable')
+        await cdp.send('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+
+        # Only Media requests to the preview URLs pause here; downloads pass
+        async def fail_preview(params):
+            if on_blocked is not None:
+                on_blocked(params['request']['url'])
+            try:
+                await cdp.send('Fetch.failRequest', {
+                    'requestId': params['requestId'],
+                    'errorReason': 'BlockedByClient'
+                })
+            except Exception as e:
+                logger.debug(f"   Could not block preview: {str(e)}")
+
+        cdp.on('Fetch.requestPaused', lambda params: asyncio.ensure_future(fail_preview(params)))
+        await cdp.send('Fetch.enable', {'patterns': [
+            {'urlPattern': PREVIEW_URL_PATTERN, 'resourceType': 'Media', 'requestStage': 'Request'}
+        ]})
+        logger.info("🪶 Lean profile: blocking previews, thumbnails and fonts (CDP), autoplay off")
+        return
+    except Exception as e:
+        logger.info(f"ℹ️  CDP unavailable ({str(e)}), blocking with routes instead")
+
+    async def handle(route):
+        request = route.request
+        if request.resource_type in ('media', 'image', 'font'):
+            if on_blocked is not None:
+                on_blocked(request.url)
+            await route.abort()
+        else:
+            await route.continue_()
+
+    for pattern in ('**/ai-sandbox-videofx/**', '**/*.{png,jpg,jpeg,webp,gif,woff,woff2,ttf}*',
+                    '**://fonts.gstatic.com/**', '**://lh3.googleusercontent.com/**'):
+        await page.route(pattern, handle)
+    logger.info("🪶 Lean profile: blocking previews, thumbnails and fonts (routes), autoplay off")
@@ -0,0 +1,189 @@
+"""
+Network Capture - Pick up generated video URLs from network responses
+Bắt URL video ở tầng mạng và ghi video thẳng xuống đĩa theo từng khối, không qua base64
+"""
+
+import os
+import re
+import logging
+from typing import Dict, List, Optional
+
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+# Google Storage URL of a generated Flow video, including any signed query string
+SIGNED_VIDEO_URL_PATTERN = (
+    r'https://storage\.googleapis\.com/ai-sandbox-videofx/video/[a-f0-9\-]+'
+    r'(?:\?[^\s"\'<>\\]*)?'
+)
+# JSON bodies larger than this are not generation results
+MAX_JSON_BYTES = 2 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+
+def base_video_url(url: str) -> str:
+    """Strip the signed query string from a video URL"""
+    return url.split('?', 1)[0]
+
+
+def find_video_urls(text: str) -> List[str]:
+    """
+    Find video URLs in a response body or log message
+
+    Args:
+        text: Raw text (JSON bodies may escape '&' as \\u0026)
+
+    Returns:
+        Full video URLs in order of appearance
+    """
+    text = text.replace('\\u0026', '&').replace('\\/', '/')
+    return re.findall(SIGNED_VIDEO_URL_PATTERN, text)
+
+
+class NetworkCapture:
+    """
+    Watch network responses for generated videos
+
+    Generation results (JSON from Flow's API) and media requests made by the
+    page's <video> elements both carry the storage URL. Every URL found is
+    remembered with its full signed query string and, when an event stream
+    is given, reported as a 'video' event.
+    """
+
+    def __init__(self, events=None):
+        """
+        Initialize Network Capture
+
+        Args:
+            events: Optional VideoEventStream to notify about new video URLs
+        """
+        self.events = events
+        self.media_urls: Dict[str, str] = {}  # base URL -> full (signed) URL
+
+    def attach(self, context):
+        """
+        Listen to responses of every page in a Playwright context
+
+        Args:
+            context: Playwright BrowserContext (or a single Page)
+        """
+        context.on("response", self._on_response)
+
+    async def _on_response(self, response):
+        """Inspect one response (called by Playwright)"""
+        try:
+            if 'storage.googleapis.com' in response.url:
+                self.record(response.url)
+                return
+
+            if response.request.resource_type not in ('fetch', 'xhr'):
+                return
+            if 'json' not in response.headers.get('content-type', ''):
+                return
+            if int(response.headers.get('content-length', 0)) > MAX_JSON_BYTES:
+                return
+
+            for url in find_video_urls(await response.text()):
+                self.record(url)
+        except Exception as e:
+            # Bodies of redirected or aborted responses are unavailable
+            logger.debug(f"   Skipped response {response.url[:70]}: {str(e)}")
+
+    def record(self, url: str):
+        """
+        Remember a captured video URL
+
+        Args:
+            url: Video URL (signed or not)
+        """
+        matches = find_video_urls(url)
+        if not matches:
+            return
+
+        full_url = matches[0]
+        base_url = base_video_url(full_url)
+        is_new = base_url not in self.media_urls
+        # Prefer the signed form; it can be fetched without page context
+        if is_new or '?' in full_url:
+            self.media_urls[base_url] = full_url
+
+        if is_new and self.events is not None:
+            self.events._handle({'type': 'video', 'url': base_url})
+
+    def resolve(self, url: str) -> str:
+        """
+        Get the best known URL to download a video from
+
+        Args:
+            url: Video URL as found on the page
+
+        Returns:
+            Signed URL if one was captured, otherwise ``url``
+        """
+        return self.media_urls.get(base_video_url(url), url)
+
+    def record_performance_log(self, entries: List[Dict]) -> int:
+        """
+        Record video URLs from Chrome performance log entries (Selenium)
+
+        Args:
+            entries: Result of ``driver.get_log('performance')``
+
+        Returns:
+            Number of video URLs found
+        """
+        found = 0
+        for entry in entries:
+            message = entry.get('message', '')
+            if 'Network.responseReceived' not in message or 'storage.googleapis.com' not in message:
+                continue
+            for url in find_video_urls(message):
+                self.record(url)
+                found += 1
+        return found
+
+
+def stream_download_sync(
+    url: str,
+    filepath: str,
+    cookies: Optional[List[Dict]] = None,
+    timeout: int = 300
+) -> Optional[str]:
+    """
+    Stream a video to disk chunk by chunk (Selenium controllers)
+
+    Memory use stays at one chunk regardless of file size. Data is written
+    to ``<filepath>.part`` and renamed only when complete.
+
+    Args:
+        url: Video URL
+        filepath: Destination path
+        cookies: Selenium-style cookies ({'name', 'value', ...}) to send
+        timeout: Seconds to wait for the server between chunks
+
+    Returns:
+        Path of the saved file or None
+    """
+    jar = {c['name']: c['value'] for c in cookies or []}
+    part_path = f"{filepath}.part"
+
+    try:
+        with requests.get(url, cookies=jar, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            written = 0
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+                    written += len(chunk)
+
+        os.replace(part_path, filepath)
+        logger.info(f"✅ Video saved: {filepath} ({written / 1024 / 1024:.1f} MB)")
+        return filepath
+
+    except Exception as e:
+        logger.error(f"❌ Stream download failed: {str(e)}")
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        return None
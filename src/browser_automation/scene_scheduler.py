@@ -0,0 +1,458 @@
+"""
+Scene Scheduler - Concurrent generation pipeline for Flow
+Giữ hàng đợi của Flow luôn đầy (tối đa 5 video) và tải video ở một stage riêng
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .card_index import CardIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SceneScheduler:
+    """
+    Keep up to ``max_in_flight`` generations pending in Flow at once.
+
+    Jobs are submitted back to back while the queue has space. Every
+    submission is linked to its video card, so queue space and completion
+    come from per-card state; storage URLs that appear without a matched
+    card go to the oldest in-flight job. Finished jobs are handed to a
+    separate download stage so submissions never wait on downloads.
+    """
+
+    def __init__(
+        self,
+        controller,
+        max_in_flight: int = 5,
+        poll_interval: float = 5,
+        job_timeout: int = 420,
+        download_workers: int = 4,
+        on_finished: Optional[Callable[[Dict], None]] = None,
+        queue_wait_timeout: int = 600,
+        on_downloaded: Optional[Callable[[Dict], None]] = None
+    ):
+        """
+        Initialize Scene Scheduler
+
+        Args:
+            controller: Started FlowController (page already on the project)
+            max_in_flight: Max generations pending in Flow at once (Flow allows 5)
+            poll_interval: Seconds between checks for new video URLs
+            job_timeout: Max seconds a single generation may take
+            download_workers: Number of parallel downloads
+            on_finished: Optional callback(job) when a job leaves the generation
+                stage; it may set job['requeued'] to drop the job from the results
+            queue_wait_timeout: Max seconds to wait for Flow's queue to show a
+                free slot before submitting anyway
+            on_downloaded: Optional callback(job) when a generated job's download
+                ends (status 'success' or 'failed'); it may also set job['requeued']
+        """
+        self.controller = controller
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.download_workers = download_workers
+        self.on_finished = on_finished
+        self.queue_wait_timeout = queue_wait_timeout
+        self.on_downloaded = on_downloaded
+
+        self._jobs: List[Dict] = []
+        self._in_flight: List[Dict] = []
+        self._known_urls = set()
+        self.cards = CardIndex(max_queue=max_in_flight)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._download_queue: Optional[asyncio.Queue] = None
+        self._stopped = False
+        self._first_submission = True
+
+    async def run(self, scenes: List[Dict], project_name: str = "video_project") -> List[Dict]:
+        """
+        Generate and download videos for all scenes
+
+        Args:
+            scenes: List of scene dictionaries with 'veo_prompt'
+            project_name: Project name for organizing files
+
+        Returns:
+            List of scenes with video URLs and download paths (same order as input)
+        """
+        source = asyncio.Queue()
+        for i, scene in enumerate(scenes, 1):
+            source.put_nowait((i, scene))
+
+        results = await self.run_from_queue(source, project_name, total=len(scenes))
+        return [results[i] for i in sorted(results)]
+
+    async def run_stream(self, scenes: Iterable[Dict], project_name: str = "video_project") -> List[Dict]:
+        """
+        Generate and download scenes while they are still being produced
+
+        ``scenes`` is consumed in a worker thread (e.g. a streamed Gemini
+        script), and each scene is submitted as soon as it arrives and a
+        slot is free.
+
+        Args:
+            scenes: Blocking iterable of scene dictionaries with 'veo_prompt'
+            project_name: Project name for organizing files
+
+        Returns:
+            List of scenes with video URLs and download paths, ordered by
+            scene_number (scenes may arrive out of order, e.g. continuations)
+        """
+        loop = asyncio.get_running_loop()
+        source = asyncio.Queue()
+        finished = asyncio.Event()
+
+        def produce():
+            seen = set()
+            try:
+                for arrival, scene in enumerate(scenes, 1):
+                    # Files and result order follow the script, not arrival
+                    number = scene.get('scene_number')
+                    index = number if isinstance(number, int) else arrival
+                    if index in seen:
+                        logger.warning(f"⚠️  Duplicate scene {index} in stream - skipped")
+                        continue
+                    seen.add(index)
+                    loop.call_soon_threadsafe(source.put_nowait, (index, scene))
+            except Exception as e:
+                logger.error(f"❌ Scene stream failed: {str(e)}")
+            finally:
+                loop.call_soon_threadsafe(finished.set)
+
+        producer = loop.run_in_executor(None, produce)
+        results = await self.run_from_queue(source, project_name, producer_done=finished)
+        await producer
+        return [results[i] for i in sorted(results)]
+
+    async def run_from_queue(
+        self,
+        source: asyncio.Queue,
+        project_name: str = "video_project",
+        total: Optional[int] = None,
+        producer_done: Optional[asyncio.Event] = None
+    ) -> Dict[int, Dict]:
+        """
+        Generate and download scenes pulled from a (possibly shared) queue
+
+        A scene is only taken from ``source`` once this scheduler has a free
+        slot, so several schedulers can share one queue.
+
+        Args:
+            source: Queue of (scene_index, scene) tuples
+            project_name: Project name for organizing files
+            total: Optional total scene count for log messages
+            producer_done: Optional event set once nothing more will be put on
+                ``source``; until then an empty queue means "wait", not "done"
+
+        Returns:
+            Dict of scene_index -> scene result (requeued jobs are left out)
+        """
+        self._jobs = []
+        self._in_flight = []
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._download_queue = asyncio.Queue()
+        self._stopped = False
+        self._first_submission = True
+
+        started_at = time.monotonic()
+        self._known_urls = await self.controller.get_video_urls()
+        await self._refresh_cards()
+        self.cards.mark_baseline()
+        logger.info(f"📊 Baseline: {len(self._known_urls)} videos on page, "
+                    f"{self.cards.pending_count()} still pending")
+
+        monitor = asyncio.create_task(self._monitor())
+        downloaders = [
+            asyncio.create_task(self._download_worker(n))
+            for n in range(self.download_workers)
+        ]
+
+        try:
+            while True:
+                await self._slots.acquire()
+                await self._wait_for_queue_space()
+
+                item = None if self._stopped else await self._next_scene(source, producer_done)
+                if item is None:
+                    self._slots.release()
+                    break
+                i, scene = item
+
+                job = self._new_job(i, scene, project_name)
+                self._jobs.append(job)
+
+                logger.info(f"\n{'='*60}")
+                logger.info(f"🎬 Submitting Scene {i}/{total or '?'} "
+                            f"({len(self._in_flight) + 1}/{self.max_in_flight} in flight)")
+                logger.info(f"{'='*60}")
+
+                await self._submit(job)
+
+            # Wait for every job to leave the generation stage (or the monitor to die)
+            generated = asyncio.ensure_future(
+                asyncio.gather(*(job['generated'].wait() for job in self._jobs))
+            )
+            await asyncio.wait({generated, monitor}, return_when=asyncio.FIRST_COMPLETED)
+            if not generated.done():
+                generated.cancel()
+                error = monitor.exception() if not monitor.cancelled() else None
+                logger.error(f"❌ Scheduler monitor stopped: {error}")
+                for job in list(self._in_flight):
+                    self._finish_generation(job, error=f"Scheduler monitor stopped: {error}")
+
+        finally:
+            monitor.cancel()
+            for _ in downloaders:
+                await self._download_queue.put(None)
+            await asyncio.gather(*downloaders, return_exceptions=True)
+
+        elapsed = time.monotonic() - started_at
+        succeeded = sum(1 for job in self._jobs if job['status'] == 'success')
+        logger.info(f"📊 Scheduler finished: {succeeded}/{len(self._jobs)} scenes in {elapsed:.0f}s")
+
+        return {
+            job['index']: self._to_result(job)
+            for job in self._jobs
+            if not job.get('requeued')
+        }
+
+    @staticmethod
+    async def _next_scene(source: asyncio.Queue, producer_done: Optional[asyncio.Event]):
+        """Next (index, scene) from the source, or None when it is exhausted"""
+        if source.empty() and producer_done is not None and not producer_done.is_set():
+            getter = asyncio.ensure_future(source.get())
+            done_waiter = asyncio.ensure_future(producer_done.wait())
+            await asyncio.wait({getter, done_waiter}, return_when=asyncio.FIRST_COMPLETED)
+            done_waiter.cancel()
+            if getter.done():
+                return getter.result()
+            getter.cancel()
+
+        return None if source.empty() else source.get_nowait()
+
+    def stop(self):
+        """Stop taking new scenes; jobs already submitted still finish"""
+        self._stopped = True
+
+    def _new_job(self, index: int, scene: Dict, project_name: str) -> Dict:
+        """Create job state for a scene"""
+        return {
+            'index': index,
+            'key': f"scene_{index}",
+            'scene': scene,
+            'prompt': scene.get('veo_prompt', scene.get('description', '')),
+            'filename': f"{project_name}_scene_{index:03d}.mp4",
+            'submitted_at': None,
+            'video_url': None,
+            'download_path': None,
+            'status': 'pending',
+            'error': None,
+            'timings': {},  # Seconds per phase: ready/fill/submit, generate, download
+            'generated': asyncio.Event()
+        }
+
+    async def _submit(self, job: Dict):
+        """Submit a job's prompt to Flow without waiting for generation"""
+        # Register before clicking so a fast URL is never orphaned
+        job['status'] = 'generating'
+        job['submitted_at'] = time.monotonic()
+        self._in_flight.append(job)
+        self.cards.submit(job['key'], job['prompt'])
+
+        # Page setup applies to this run's first submission, whatever its scene number
+        is_first_video = self._first_submission
+        self._first_submission = False
+
+        submitted = await self.controller.create_video_from_prompt(
+            prompt=job['prompt'],
+            aspect_ratio=job['scene'].get('aspect_ratio', '16:9'),
+            wait_for_generation=False,
+            is_first_video=is_first_video
+        )
+        job['timings'].update(getattr(self.controller, 'last_timings', {}))
+
+        if not submitted:
+            self._finish_generation(job, error="Could not submit prompt")
+
+    async def _refresh_cards(self):
+        """Rescan video cards on the project page"""
+        try:
+            await self.cards.refresh(self.controller.page)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read video cards: {str(e)}")
+
+    async def _wait_for_queue_space(self):
+        """Wait until Flow's queue (all pending cards, not only ours) has a free slot"""
+        events = getattr(self.controller, 'events', None)
+        started_at = time.monotonic()
+
+        while True:
+            await self._refresh_cards()
+            if self.cards.free_slots() > 0:
+                return
+
+            if time.monotonic() - started_at > self.queue_wait_timeout:
+                # Our own semaphore still bounds submissions; Flow rejects extras itself
+                logger.warning(f"⚠️  Flow queue still looks full after {self.queue_wait_timeout}s "
+                               f"({self.cards.pending_count()}/{self.max_in_flight}) - submitting anyway")
+                return
+
+            logger.info(f"   ⏳ Flow queue full ({self.cards.pending_count()}/{self.max_in_flight})"
+                        f" - waiting for a slot")
+            if events:
+                await events.wait_for_change(self.poll_interval)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+    def _finish_generation(self, job: Dict, video_url: str = None, error: str = None):
+        """Move a job out of the generation stage and free its queue slot"""
+        if job in self._in_flight:
+            self._in_flight.remove(job)
+            self._slots.release()
+        # Whatever the outcome, the submission no longer holds a queue slot of its own
+        self.cards.forget(job['key'], video_url)
+
+        if video_url:
+            job['video_url'] = video_url
+            job['status'] = 'downloading'
+            self._download_queue.put_nowait(job)
+            elapsed = time.monotonic() - job['submitted_at']
+            job['timings']['generate'] = elapsed
+            logger.info(f"✅ Scene {job['index']} generated in {elapsed:.0f}s → {video_url[:70]}...")
+            eta = getattr(self.controller, 'eta', None)
+            try:
+                if eta:
+                    eta.record(elapsed)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not record generation time: {str(e)}")
+        else:
+            job['status'] = 'failed'
+            job['error'] = error
+            logger.error(f"❌ Scene {job['index']} failed: {error}")
+
+        try:
+            if self.on_finished:
+                self.on_finished(job)
+        except Exception as e:
+            logger.error(f"❌ on_finished callback failed for scene {job['index']}: {str(e)}")
+        finally:
+            # Always release waiters, or run_from_queue would never return
+            job['generated'].set()
+
+    async def _monitor(self):
+        """Keep checking in-flight jobs; one failed check never stops the monitor"""
+        events = getattr(self.controller, 'events', None)
+
+        while True:
+            # Wake up as soon as the page pushes an event, or poll as a fallback
+            if events:
+                await events.wait_for_change(self.poll_interval)
+            else:
+                await asyncio.sleep(self.poll_interval)
+
+            if not self._in_flight:
+                continue
+
+            try:
+                await self._check_in_flight(events)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Scheduler monitor check failed: {str(e)}")
+
+            # Timeouts are enforced even when the checks above keep failing
+            now = time.monotonic()
+            for job in list(self._in_flight):
+                if now - job['submitted_at'] > self.job_timeout:
+                    self._finish_generation(job, error=f"Timeout after {self.job_timeout}s")
+
+    async def _check_in_flight(self, events):
+        """Finish in-flight jobs from their card state or newly appeared video URLs"""
+        try:
+            urls = await self.controller.get_video_urls()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read video URLs: {str(e)}")
+            return
+        await self._refresh_cards()
+
+        # Card state decides for every job whose card was found
+        for job in list(self._in_flight):
+            card = self.cards.card_for(job['key'])
+            if card is None:
+                continue
+            if card['state'] == 'failed':
+                self._finish_generation(job, error=f"Flow could not generate: {card['text'][:100]}")
+            elif card['state'] == 'ready' and card['url']:
+                self._finish_generation(job, video_url=card['url'])
+
+        if events:
+            # Arrival order from the observer
+            new_urls = [url for url in events.urls if url not in self._known_urls]
+        else:
+            new_urls = sorted(urls - self._known_urls)
+        self._known_urls |= urls
+
+        # Oldest submission without a card gets the first new URL not shown on any card
+        card_urls = {card['url'] for card in self.cards.cards.values() if card['url']}
+        for url in new_urls:
+            if url in card_urls:
+                continue
+            unmatched = [job for job in self._in_flight if self.cards.card_for(job['key']) is None]
+            if not unmatched:
+                logger.debug(f"   Untracked video URL: {url[:70]}...")
+                break
+            self._finish_generation(unmatched[0], video_url=url)
+
+    async def _download_worker(self, worker_id: int):
+        """Download finished videos through the controller's HTTP pool"""
+        while True:
+            job = await self._download_queue.get()
+            if job is None:
+                self._download_queue.task_done()
+                break
+
+            logger.info(f"📥 [dl-{worker_id}] Scene {job['index']}: {job['filename']}")
+            started_at = time.monotonic()
+            try:
+                download_path = await self.controller.download_video(
+                    job['video_url'],
+                    job['filename']
+                )
+                job['download_path'] = download_path
+                if download_path:
+                    job['status'] = 'success'
+                else:
+                    job['status'] = 'failed'
+                    job['error'] = "Download failed"
+            except Exception as e:
+                # One broken download must not take the worker down with it
+                job['status'] = 'failed'
+                job['error'] = f"Download failed: {str(e)}"
+                logger.error(f"❌ [dl-{worker_id}] Scene {job['index']} download error: {str(e)}")
+            finally:
+                job['timings']['download'] = time.monotonic() - started_at
+                logger.info(f"⏱️  Scene {job['index']}: "
+                            + " | ".join(f"{phase} {seconds:.1f}s" for phase, seconds in job['timings'].items()))
+                try:
+                    if self.on_downloaded:
+                        self.on_downloaded(job)
+                except Exception as e:
+                    logger.error(f"❌ on_downloaded callback failed for scene {job['index']}: {str(e)}")
+                self._download_queue.task_done()
+
+    def _to_result(self, job: Dict) -> Dict:
+        """Convert job state to the scene result format"""
+        result = {
+            **job['scene'],
+            'video_url': job['video_url'],
+            'download_path': job['download_path'],
+            'status': 'success' if job['status'] == 'success' else 'failed'
+        }
+        if job['error']:
+            result['error'] = job['error']
+        return result
@@ -0,0 +1,162 @@
+"""
+Selector Registry - Remember which selector candidate works for each UI step
+Ghi nhớ selector nào khớp cho từng bước (theo ngôn ngữ giao diện) để lần sau thử đúng cái đó trước
+"""
+
+import asyncio
+import json
+import os
+import re
+import logging
+from typing import Dict, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def locale_of(url: str) -> str:
+    """UI locale from a Flow URL (https://labs.google/fx/vi/tools/flow -> 'vi')"""
+    match = re.search(r'/fx/([a-z]{2}(?:-[A-Za-z]{2})?)/', url or '')
+    return match.group(1) if match else 'default'
+
+
+class SelectorRegistry:
+    """
+    Learned fallback order for lists of candidate selectors
+
+    For every (locale, step) the candidate that last matched is stored in a
+    JSON file and tried first on later runs; a miss is only paid when
+    Flow's DOM has changed, and then all candidates are raced instead of
+    timing out one by one. Steps that are actions rather than selectors
+    (e.g. the 1080p click methods) use ``order``/``record``.
+    """
+
+    def __init__(self, path: str = "./data/selector_cache.json"):
+        """
+        Initialize Selector Registry
+
+        Args:
+            path: JSON file the learned winners are kept in
+        """
+        self.path = path
+        self.winners: Dict[str, Dict[str, str]] = {}  # locale -> step -> candidate
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.winners = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  Ignoring unreadable selector cache {path}: {str(e)}")
+
+    def order(self, step: str, candidates: List[str], locale: str = 'default') -> List[str]:
+        """
+        Candidates with the learned winner first
+
+        Args:
+            step: Name of the UI step (e.g. "prompt_box")
+            candidates: Candidates in their default order
+            locale: UI locale
+
+        Returns:
+            Reordered candidates
+        """
+        winner = self.winners.get(locale, {}).get(step)
+        if winner not in candidates:
+            return list(candidates)
+        return [winner] + [candidate for candidate in candidates if candidate != winner]
+
+    def record(self, step: str, candidate: str, locale: str = 'default'):
+        """
+        Remember the candidate that worked for a step
+
+        Args:
+            step: Name of the UI step
+            candidate: Candidate that matched
+            locale: UI locale
+        """
+        steps = self.winners.setdefault(locale, {})
+        if steps.get(step) == candidate:
+            return
+
+        if step in steps:
+            logger.info(f"🔀 Selector for '{step}' changed: {steps[step]} → {candidate}")
+        steps[step] = candidate
+        self._save()
+
+    async def find(
+        self,
+        page,
+        step: str,
+        candidates: List[str],
+        timeout: int = 5000,
+        state: str = 'visible'
+    ) -> Tuple[Optional[str], Optional[object]]:
+        """
+        Wait for the best available candidate on a Playwright page
+
+        The learned winner is tried alone first. Without a winner (or when
+        it no longer matches) all candidates are raced, and once any of them
+        appears the highest-priority candidate present is taken.
+
+        Args:
+            page: Playwright page
+            step: Name of the UI step
+            candidates: Selectors in their default (priority) order
+            timeout: Max milliseconds to wait
+            state: Element state to wait for ("visible" or "attached")
+
+        Returns:
+            (selector, element handle), or (None, None) if nothing matched
+        """
+        locale = locale_of(page.url)
+        winner = self.winners.get(locale, {}).get(step)
+
+        if winner in candidates:
+            try:
+                element = await page.wait_for_selector(winner, state=state, timeout=timeout)
+                if element:
+                    return winner, element
+            except Exception:
+                logger.info(f"🔀 Learned selector for '{step}' missed, trying all candidates")
+
+        if not await self._race(page, candidates, timeout, state):
+            logger.debug(f"   No candidate matched for '{step}' ({locale})")
+            return None, None
+
+        for selector in candidates:
+            try:
+                element = await page.query_selector(selector)
+                if element and (state != 'visible' or await element.is_visible()):
+                    self.record(step, selector, locale)
+                    return selector, element
+            except Exception:
+                continue
+        return None, None
+
+    @staticmethod
+    async def _race(page, candidates: List[str], timeout: int, state: str) -> bool:
+        """Wait until any candidate reaches ``state``"""
+        waits = [
+            asyncio.ensure_future(page.wait_for_selector(selector, state=state, timeout=timeout))
+            for selector in candidates
+        ]
+        pending = set(waits)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                errors = [task.exception() for task in done]
+                if any(error is None for error in errors):
+                    return True
+            return False
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _save(self):
+        """Write the learned winners to disk"""
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.winners, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            logger.warning(f"⚠️  Could not save selector cache: {str(e)}")
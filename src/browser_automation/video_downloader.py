@@ -0,0 +1,203 @@
+"""
+Video Downloader - Pooled HTTP downloads of generated videos
+Tải nhiều video song song bằng HTTP (dùng cookie của trình duyệt), hỗ trợ tải tiếp khi bị ngắt
+"""
+
+import asyncio
+import json
+import os
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .network_capture import CHUNK_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+
+class VideoDownloader:
+    """
+    Download videos over one pooled aiohttp session
+
+    Every file is written to ``<path>.part``, with a ``.part.json`` sidecar
+    recording the URL and the server's ETag/Last-Modified. A failed transfer
+    is resumed with a Range + If-Range request only when the partial file
+    belongs to the same URL, the final size is checked against the server's
+    length, and the file is renamed into place only when complete.
+    """
+
+    def __init__(
+        self,
+        context=None,
+        max_concurrent: int = 6,
+        retries: int = 3,
+        timeout: int = 300
+    ):
+        """
+        Initialize Video Downloader
+
+        Args:
+            context: Optional Playwright BrowserContext to take cookies from
+            max_concurrent: Max parallel downloads
+            retries: Attempts per file (each one resumes the previous)
+            timeout: Max seconds between two chunks
+        """
+        self.context = context
+        self.max_concurrent = max_concurrent
+        self.retries = retries
+        self.timeout = timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._cookie_headers: Dict[str, str] = {}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Create the shared session on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrent),
+                timeout=aiohttp.ClientTimeout(sock_read=self.timeout)
+            )
+        return self._session
+
+    async def _cookie_header(self, url: str) -> str:
+        """Cookie header for a host, read once from the browser context"""
+        host = urlparse(url).netloc
+        if host not in self._cookie_headers:
+            cookies = await self.context.cookies(url) if self.context else []
+            self._cookie_headers[host] = '; '.join(f"{c['name']}={c['value']}" for c in cookies)
+        return self._cookie_headers[host]
+
+    async def download(self, url: str, filepath: str) -> Optional[str]:
+        """
+        Download one video, resuming after interrupted transfers
+
+        Args:
+            url: Video URL
+            filepath: Destination path
+
+        Returns:
+            Path of the saved file or None
+        """
+        async with self._slots:
+            for attempt in range(1, self.retries + 1):
+                try:
+                    size = await self._fetch(url, filepath)
+                    logger.info(f"✅ Video saved: {filepath} ({size / 1024 / 1024:.1f} MB)")
+                    return filepath
+                except (aiohttp.ClientError, asyncio.TimeoutError, IOError, ValueError) as e:
+                    logger.warning(f"⚠️  Download attempt {attempt}/{self.retries} failed "
+                                   f"for {os.path.basename(filepath)}: {str(e)}")
+                    if attempt < self.retries:
+                        await asyncio.sleep(2 ** attempt)
+
+        logger.error(f"❌ Download failed: {url[:70]}...")
+        return None
+
+    async def download_many(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        """
+        Download many videos concurrently
+
+        Args:
+            items: List of (url, filepath)
+
+        Returns:
+            Saved paths (None for failures), same order as ``items``
+        """
+        logger.info(f"📥 Downloading {len(items)} videos ({self.max_concurrent} at a time)...")
+        results = await asyncio.gather(*(self.download(url, path) for url, path in items))
+
+        succeeded = sum(1 for path in results if path)
+        logger.info(f"📊 Downloaded {succeeded}/{len(items)} videos")
+        return list(results)
+
+    @staticmethod
+    def _read_sidecar(meta_path: str) -> Dict:
+        """URL and validator of a partial download (empty if unknown)"""
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_sidecar(meta_path: str, url: str, response: aiohttp.ClientResponse):
+        """Remember which URL and server version a partial download came from"""
+        meta = {
+            'url': url,
+            'validator': response.headers.get('ETag') or response.headers.get('Last-Modified')
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    async def _fetch(self, url: str, filepath: str) -> int:
+        """Transfer the remaining bytes of one file and move it into place"""
+        part_path = f"{filepath}.part"
+        meta_path = f"{part_path}.json"
+        meta = self._read_sidecar(meta_path)
+
+        # A partial file from another URL (or an older run) would splice two videos
+        if os.path.exists(part_path) and meta.get('url') != url:
+            logger.info(f"🗑️  Discarding stale partial download: {os.path.basename(part_path)}")
+            os.remove(part_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        headers = {}
+        cookie = await self._cookie_header(url)
+        if cookie:
+            headers['Cookie'] = cookie
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            if meta.get('validator'):
+                # Server sends the whole file instead if it changed since
+                headers['If-Range'] = meta['validator']
+
+        session = await self._get_session()
+        async with session.get(url, headers=headers) as response:
+            if response.status == 416:
+                # Nothing left to fetch; the size check below decides
+                expected = offset
+            else:
+                response.raise_for_status()
+                if response.status != 206:
+                    # Server ignored the Range header or the file changed (If-Range) - start over
+                    offset = 0
+                expected = self._expected_size(response, offset)
+                if not offset:
+                    self._write_sidecar(meta_path, url, response)
+
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        f.write(chunk)
+
+        size = os.path.getsize(part_path)
+        if expected is not None and size != expected:
+            if size > expected:
+                os.remove(part_path)
+            raise IOError(f"size mismatch: got {size} bytes, expected {expected}")
+
+        os.replace(part_path, filepath)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        return size
+
+    @staticmethod
+    def _expected_size(response: aiohttp.ClientResponse, offset: int) -> Optional[int]:
+        """Total file size announced by the server, if any"""
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range:
+            try:
+                return int(content_range.rsplit('/', 1)[1])
+            except ValueError:
+                pass  # "bytes */*" or ".../*": total unknown
+        if response.content_length is not None:
+            return offset + response.content_length
+        return None
+
+    async def close(self):
+        """Close the shared session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
@@ -0,0 +1,248 @@
+"""
+Video Event Stream - Push video URLs, progress and errors from the Flow page
+Dùng MutationObserver trong trang thay vì quét toàn bộ HTML mỗi vài giây
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Injected once per document. Scans only added nodes / changed attributes and
+# emits events through window.__veoEmit (Playwright binding) or buffers them
+# for window.__veoDrain() (Selenium).
+OBSERVER_JS = r"""
+(() => {
+    if (window.__veoObserver) return;
+
+    const URL_RE = /https:\/\/storage\.googleapis\.com\/ai-sandbox-videofx\/video\/[a-f0-9\-]+/g;
+    const PERCENT_RE = /^\s*(\d{1,3})%\s*$/;
+    const ERROR_KEYWORDS = ['không tạo được', 'failed to generate'];
+    const seen = new Set();
+    const buffer = [];
+    let lastPercent = null;
+
+    const emit = (event) => {
+        event.ts = Date.now();
+        if (typeof window.__veoEmit === 'function') {
+            try { window.__veoEmit(event); return; } catch (e) {}
+        }
+        buffer.push(event);
+        if (buffer.length > 1000) buffer.shift();
+    };
+    window.__veoDrain = () => buffer.splice(0, buffer.length);
+
+    const scanUrls = (text, initial) => {
+        if (!text) return;
+        for (const match of text.matchAll(URL_RE)) {
+            if (!seen.has(match[0])) {
+                seen.add(match[0]);
+                emit({type: 'video', url: match[0], initial: !!initial});
+            }
+        }
+    };
+
+    const scanText = (text) => {
+        if (!text) return;
+        const percent = text.match(PERCENT_RE);
+        if (percent && percent[1] !== lastPercent) {
+            lastPercent = percent[1];
+            emit({type: 'progress', percent: parseInt(percent[1], 10)});
+        }
+        const lower = text.toLowerCase();
+        for (const keyword of ERROR_KEYWORDS) {
+            if (lower.includes(keyword)) {
+                emit({type: 'error', text: text.trim().slice(0, 200)});
+                break;
+            }
+        }
+    };
+
+    window.__veoObserver = new MutationObserver((mutations) => {
+        for (const m of mutations) {
+            if (m.type === 'attributes') {
+                scanUrls(m.target.getAttribute(m.attributeName));
+            } else if (m.type === 'characterData') {
+                scanText(m.target.data);
+            } else {
+                for (const node of m.addedNodes) {
+                    if (node.nodeType === 1) {
+                        scanUrls(node.outerHTML);
+                        scanText(node.textContent);
+                    } else if (node.nodeType === 3) {
+                        scanText(node.data);
+                    }
+                }
+            }
+        }
+    });
+
+    const start = () => {
+        scanUrls(document.documentElement.outerHTML, true);
+        window.__veoObserver.observe(document.documentElement, {
+            childList: true,
+            subtree: true,
+            characterData: true,
+            attributes: true,
+            attributeFilter: ['src', 'href']
+        });
+    };
+    if (document.documentElement) start();
+    else document.addEventListener('DOMContentLoaded', start);
+})();
+"""
+
+
+class VideoEventStream:
+    """
+    Receive video/progress/error events pushed by the in-page observer
+
+    Playwright pages push events through ``expose_binding``. Selenium has no
+    push channel, so the observer buffers events and ``poll_selenium`` drains
+    only the new ones (a few bytes instead of the whole page source).
+    """
+
+    def __init__(self):
+        self.urls: List[str] = []  # in order of appearance
+        self.progress: Optional[int] = None
+        self.errors: List[Dict] = []
+        self._url_set = set()
+        self._changed: Optional[asyncio.Event] = None
+
+    # ---------- Playwright ----------
+
+    async def attach(self, page):
+        """
+        Install the observer on a Playwright page (and on every future navigation)
+
+        Args:
+            page: Playwright page
+        """
+        self._changed = asyncio.Event()
+        await page.expose_binding("__veoEmit", lambda source, event: self._handle(event))
+        await page.add_init_script(OBSERVER_JS)
+        try:
+            await page.evaluate(OBSERVER_JS)
+        except Exception as e:
+            logger.debug(f"   Observer will start on next navigation: {str(e)}")
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """
+        Wait until any event arrives
+
+        Args:
+            timeout: Max seconds to wait
+
+        Returns:
+            True if an event arrived, False on timeout
+        """
+        self._changed.clear()
+        return await self._wait_for_event(timeout)
+
+    async def _wait_for_event(self, timeout: float) -> bool:
+        """Wait for the change flag without clearing it first"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_new_video(self, exclude: set, timeout: float = 180) -> Optional[str]:
+        """
+        Wait for a video URL that is not in ``exclude``
+
+        Args:
+            exclude: URLs that existed before (baseline)
+            timeout: Max seconds to wait
+
+        Returns:
+            First new video URL, or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        last_log = time.monotonic()
+
+        while True:
+            # Clear before checking so an event arriving mid-check is not missed
+            self._changed.clear()
+            new_urls = [url for url in self.urls if url not in exclude]
+            if new_urls:
+                logger.info(f"   ✅ Found {len(new_urls)} new video(s)!")
+                return new_urls[0]
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.error(f"   ⏱️ Timeout after {timeout}s")
+                return None
+
+            await self._wait_for_event(min(remaining, 15))
+
+            if time.monotonic() - last_log >= 15:
+                elapsed = int(timeout - (deadline - time.monotonic()))
+                progress = f" - Flow progress: {self.progress}%" if self.progress is not None else ""
+                logger.info(f"   ⏳ {elapsed}s / {timeout}s{progress}")
+                last_log = time.monotonic()
+
+    # ---------- Selenium ----------
+
+    def attach_selenium(self, driver):
+        """
+        Install the observer on a Selenium driver (and on future navigations via CDP)
+
+        Args:
+            driver: Selenium WebDriver (Chromium based)
+        """
+        try:
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': OBSERVER_JS})
+        except Exception as e:
+            logger.debug(f"   CDP init script unavailable: {str(e)}")
+        driver.execute_script(OBSERVER_JS)
+
+    def poll_selenium(self, driver) -> int:
+        """
+        Drain buffered events from the page
+
+        Args:
+            driver: Selenium WebDriver
+
+        Returns:
+            Number of events received
+        """
+        events = driver.execute_script("return window.__veoDrain ? window.__veoDrain() : null;")
+        if events is None:
+            # New document without the observer (e.g. CDP unavailable)
+            driver.execute_script(OBSERVER_JS)
+            events = driver.execute_script("return window.__veoDrain();") or []
+
+        for event in events:
+            self._handle(event)
+        return len(events)
+
+    # ---------- Shared ----------
+
+    def known_urls(self) -> set:
+        """All video URLs seen so far"""
+        return set(self._url_set)
+
+    def _handle(self, event: Dict):
+        """Apply one event from the page"""
+        kind = event.get('type')
+
+        if kind == 'video':
+            url = event.get('url')
+            if url and url not in self._url_set:
+                self._url_set.add(url)
+                self.urls.append(url)
+                if not event.get('initial'):
+                    logger.info(f"   📹 New video URL: {url[:70]}...")
+        elif kind == 'progress':
+            self.progress = event.get('percent')
+            logger.debug(f"   🎬 Flow progress: {self.progress}%")
+        elif kind == 'error':
+            self.errors.append(event)
+            logger.warning(f"   ⚠️  Flow error: {event.get('text')}")
+
+        if self._changed is not None:
+            self._changed.set()
@@ -1,3 +1,8 @@
 from .gemini_generator import ScriptGenerator
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from .script_parser import salvage_script, validate_scene
+from .stream_parser import ScriptStream, SceneStreamParser
 
-__all__ = ['ScriptGenerator']
+__all__ = ['ScriptGenerator', 'RateLimiter', 'ResponseCache', 'ScriptStream', 'SceneStreamParser',
+           'salvage_script', 'validate_scene']
@@ -6,21 +6,104 @@ Tạo kịch bản video chia theo scenes với prompt cho VEO 3.1
 import google.generativeai as genai
 import json
 import os
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 
+from .rate_limiter import RateLimiter, is_rate_limited
+from .response_cache import ResponseCache
+from .script_parser import salvage_script, validate_scene
+from .stream_parser import ScriptStream
+
 
 class ScriptGenerator:
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash-exp"):
+    # Sampling settings for full scripts
+    SCRIPT_GENERATION_CONFIG = {
+        "temperature": 0.7,
+        "top_p": 0.95,
+        "top_k": 40,
+        "max_output_tokens": 8192,
+    }
+
+    # Longer scripts are written as an outline plus parallel scene batches
+    MAX_SCENES_PER_CALL = 20
+
+    # Continuation requests for scenes missing from a truncated/invalid response
+    MAX_CONTINUATIONS = 3
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.0-flash-exp",
+        cache_dir: Optional[str] = "./data/cache/gemini",
+        force_refresh: bool = False
+    ):
         """
         Initialize Gemini API
 
         Args:
             api_key: Gemini API key
             model: Model name (default: gemini-2.0-flash-exp)
+            cache_dir: Directory for cached responses (None disables the cache)
+            force_refresh: Always call Gemini and overwrite cached responses
         """
         genai.configure(api_key=api_key)
+        self.model_name = model
         self.model = genai.GenerativeModel(model)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.force_refresh = force_refresh
+
+    def _generate(
+        self,
+        prompt: str,
+        generation_config: Optional[Dict] = None,
+        parse: Optional[Callable[[str], object]] = None,
+        force_refresh: bool = False,
+        before_call: Optional[Callable[[], None]] = None
+    ):
+        """
+        Call Gemini, answering repeated requests from the cache
+
+        Args:
+            prompt: Fully rendered prompt
+            generation_config: Generation parameters
+            parse: Optional parser for the response text; a response is only
+                cached once it parses
+            force_refresh: Skip the cached response (the new one replaces it)
+            before_call: Optional hook run only before a real API call (e.g.
+                acquiring rate-limit quota; cache hits skip it)
+
+        Returns:
+            Parsed response (or the text when no parser is given)
+        """
+        parse = parse or (lambda text: text)
+        key = None
+
+        if self.cache:
+            key = ResponseCache.make_key(self.model_name, prompt, generation_config)
+            if not (force_refresh or self.force_refresh):
+                text = self.cache.get(key)
+                if text is not None:
+                    try:
+                        result = parse(text)
+                        print("⚡ Using cached Gemini response")
+                        return result
+                    except ValueError:
+                        self.cache.invalidate(key)
+
+        if before_call:
+            before_call()
+        if generation_config:
+            response = self.model.generate_content(prompt, generation_config=generation_config)
+        else:
+            response = self.model.generate_content(prompt)
+
+        text = response.text
+        result = parse(text)
+        if key:
+            self.cache.set(key, text)
+        return result
 
     def generate_script(
         self,
@@ -28,7 +111,8 @@ class ScriptGenerator:
         duration: int = 60,
         scene_duration: int = 8,
         aspect_ratio: str = "16:9",
-        style: str = "cinematic"
+        style: str = "cinematic",
+        force_refresh: bool = False
     ) -> Dict:
         """
         Generate video script with scenes
@@ -39,13 +123,391 @@ class ScriptGenerator:
             scene_duration: Duration per scene in seconds
             aspect_ratio: Video aspect ratio (16:9, 9:16, 1:1)
             style: Visual style (cinematic, anime, realistic, etc.)
+            force_refresh: Ignore a cached script for the same request
 
         Returns:
             Dict with script metadata and scenes
         """
+        if duration // scene_duration > self.MAX_SCENES_PER_CALL:
+            return self.generate_long_script(
+                topic, duration, scene_duration, aspect_ratio, style,
+                force_refresh=force_refresh
+            )
+
+        prompt = self._script_prompt(topic, duration, scene_duration, aspect_ratio, style)
+
+        script_data = self._generate(
+            prompt,
+            generation_config=self.SCRIPT_GENERATION_CONFIG,
+            parse=salvage_script,
+            force_refresh=force_refresh
+        )
+        script_data['scenes'] = self._complete_scenes(
+            script_data, list(range(1, duration // scene_duration + 1)),
+            scene_duration, style, force_refresh
+        )
+
+        return self._add_metadata(script_data, aspect_ratio)
+
+    def generate_long_script(
+        self,
+        topic: str,
+        duration: int = 600,
+        scene_duration: int = 8,
+        aspect_ratio: str = "16:9",
+        style: str = "cinematic",
+        batch_size: int = 10,
+        max_parallel: int = 4,
+        force_refresh: bool = False
+    ) -> Dict:
+        """
+        Generate a long script as an outline, then expand scene batches in parallel
+
+        One call writes a one-line summary per scene. Batches of scenes are
+        then written concurrently, each with the whole outline for
+        continuity, and merged in order, so no single response comes near
+        the output token limit.
+
+        Args:
+            topic: Video topic/subject
+            duration: Total video duration in seconds
+            scene_duration: Duration per scene in seconds
+            aspect_ratio: Video aspect ratio (16:9, 9:16, 1:1)
+            style: Visual style (cinematic, anime, realistic, etc.)
+            batch_size: Scenes written per expansion call
+            max_parallel: Max expansion calls at once
+            force_refresh: Ignore cached responses
+
+        Returns:
+            Dict with script metadata and scenes (same format as generate_script)
+        """
         num_scenes = duration // scene_duration
 
-        prompt = f"""
+        print(f"🗂️  Writing outline for {num_scenes} scenes...")
+        outline: Dict = {}
+        summaries: Dict[int, str] = {}
+        for attempt in range(1, self.MAX_CONTINUATIONS + 1):
+            try:
+                outline = self._generate(
+                    self._outline_prompt(topic, duration, num_scenes, style),
+                    generation_config=self.SCRIPT_GENERATION_CONFIG,
+                    parse=salvage_script,
+                    # A retry must not get the same (salvaged) response back
+                    force_refresh=force_refresh or attempt > 1
+                )
+            except ValueError as e:
+                print(f"⚠️  Outline attempt {attempt} unusable: {str(e)}")
+                continue
+            summaries = self._outline_summaries(outline)
+            if len(summaries) >= num_scenes:
+                break
+            print(f"⚠️  Outline attempt {attempt} covers {len(summaries)}/{num_scenes} scenes")
+
+        # Scenes the outline missed still get written, guided by their neighbours
+        for number in range(1, num_scenes + 1):
+            summaries.setdefault(number, f"(tiếp nối mạch truyện về {topic})")
+
+        batches = [
+            list(range(start, min(start + batch_size, num_scenes + 1)))
+            for start in range(1, num_scenes + 1, batch_size)
+        ]
+        print(f"✍️  Expanding {len(batches)} batches ({max_parallel} at a time)...")
+
+        def expand(numbers: List[int]) -> List[Dict]:
+            try:
+                data = self._generate(
+                    self._expand_prompt(outline, summaries, numbers, scene_duration, style),
+                    generation_config=self.SCRIPT_GENERATION_CONFIG,
+                    parse=salvage_script,
+                    force_refresh=force_refresh
+                )
+            except ValueError:
+                data = {'scenes': []}
+
+            # The model sometimes restarts numbering at 1 for a batch
+            batch_scenes = data['scenes']
+            if batch_scenes and not any(scene.get('scene_number') in numbers for scene in batch_scenes):
+                for number, scene in zip(numbers, batch_scenes):
+                    scene['scene_number'] = number
+
+            context = {**data, 'title': outline.get('title', topic), 'description': outline.get('description', '')}
+            return self._complete_scenes(context, numbers, scene_duration, style, force_refresh)
+
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            expanded = list(pool.map(expand, batches))
+
+        scenes = [scene for batch_scenes in expanded for scene in batch_scenes]
+
+        script_data = {
+            'title': outline.get('title', topic),
+            'description': outline.get('description', ''),
+            'total_duration': duration,
+            'num_scenes': len(scenes),
+            'style': style,
+            'acts': outline.get('acts', []),
+            'scenes': scenes
+        }
+        return self._add_metadata(script_data, aspect_ratio)
+
+    @staticmethod
+    def _outline_summaries(outline: Dict) -> Dict[int, str]:
+        """
+        Scene summaries of an outline, tolerating missing or malformed entries
+
+        Args:
+            outline: Parsed outline response
+
+        Returns:
+            Dict of scene_number -> summary (entries without a usable number
+            are numbered by position)
+        """
+        summaries: Dict[int, str] = {}
+        for position, item in enumerate(outline.get('scenes', []), 1):
+            if not isinstance(item, dict):
+                continue
+            number = item.get('scene_number')
+            if isinstance(number, str) and number.strip().isdigit():
+                number = int(number)
+            if not isinstance(number, int) or isinstance(number, bool) or number in summaries:
+                number = position
+            summary = item.get('summary') or item.get('description')
+            if summary:
+                summaries.setdefault(number, str(summary))
+        return summaries
+
+    def _complete_scenes(
+        self,
+        script_data: Dict,
+        numbers: List[int],
+        scene_duration: int,
+        style: str,
+        force_refresh: bool = False
+    ) -> List[Dict]:
+        """
+        Keep the valid scenes of a response and ask only for the missing ones
+
+        Args:
+            script_data: Parsed (possibly salvaged) response with 'scenes'
+            numbers: Scene numbers the result must contain
+            scene_duration: Duration per scene in seconds
+            style: Visual style
+            force_refresh: Ignore cached responses
+
+        Returns:
+            Valid scenes in order (scenes still missing after the retries are left out)
+        """
+        if script_data.pop('truncated', False):
+            print("⚠️  Response was cut off, keeping its complete scenes")
+        valid: Dict[int, Dict] = {}
+
+        def collect(scenes: List[Dict]):
+            for scene in scenes:
+                if isinstance(scene, dict):
+                    scene.setdefault('duration', scene_duration)
+                errors = validate_scene(scene)
+                if errors:
+                    print(f"⚠️  Dropping invalid scene {scene.get('scene_number', '?') if isinstance(scene, dict) else '?'}: "
+                          f"{', '.join(errors)}")
+                elif scene['scene_number'] in numbers:
+                    valid.setdefault(scene['scene_number'], scene)
+
+        collect(script_data.get('scenes', []))
+
+        for _ in range(self.MAX_CONTINUATIONS):
+            missing = [number for number in numbers if number not in valid]
+            if not missing:
+                break
+
+            print(f"🔁 Requesting {len(missing)} missing scenes: {missing[:10]}{'...' if len(missing) > 10 else ''}")
+            try:
+                continuation = self._generate(
+                    self._continuation_prompt(script_data, valid, missing, scene_duration, style),
+                    generation_config=self.SCRIPT_GENERATION_CONFIG,
+                    parse=salvage_script,
+                    force_refresh=force_refresh
+                )
+            except ValueError:
+                continue
+            collect(continuation['scenes'])
+
+        missing = [number for number in numbers if number not in valid]
+        if missing:
+            print(f"⚠️  {len(missing)} scenes could not be generated: {missing}")
+
+        return [valid[number] for number in numbers if number in valid]
+
+    def _continuation_prompt(
+        self,
+        script_data: Dict,
+        written: Dict[int, Dict],
+        missing: List[int],
+        scene_duration: int,
+        style: str
+    ) -> str:
+        """Render the prompt that writes only the missing scenes of a script"""
+        written_text = "\n".join(
+            f"{number}. {scene['description'][:150]}" for number, scene in sorted(written.items())
+        ) or "(chưa có)"
+
+        return f"""
+Video: "{script_data.get('title', '')}" - {script_data.get('description', '')}
+Phong cách: {style}
+
+Các cảnh đã viết (giữ mạch truyện liền mạch với chúng):
+{written_text}
+
+Viết CHỈ các cảnh còn thiếu sau: {', '.join(map(str, missing))}.
+Mỗi cảnh gồm scene_number, duration ({scene_duration}), description (tiếng Việt),
+veo_prompt (tiếng Anh 100-200 từ, tối ưu cho VEO 3.1), camera_movement, time_of_day, mood.
+
+Chỉ trả về JSON:
+```json
+{{"scenes": [{{"scene_number": {missing[0]}, "duration": {scene_duration}, "description": "...", "veo_prompt": "...", "camera_movement": "...", "time_of_day": "...", "mood": "..."}}]}}
+```
+"""
+
+    def _outline_prompt(self, topic: str, duration: int, num_scenes: int, style: str) -> str:
+        """Render the outline prompt (one short line per scene)"""
+        return f"""
+Lập dàn ý cho video về "{topic}":
+- Tổng thời lượng: {duration} giây
+- Số lượng cảnh: {num_scenes} cảnh
+- Phong cách: {style}
+
+Chia video thành các hồi (acts) và viết cho MỖI cảnh một câu tóm tắt ngắn (tối đa 20 từ).
+Chỉ trả về JSON, không giải thích:
+```json
+{{
+  "title": "Tiêu đề video",
+  "description": "Mô tả tổng quan",
+  "acts": [{{"name": "Mở đầu", "scenes": [1, 2, 3]}}],
+  "scenes": [{{"scene_number": 1, "summary": "Tóm tắt cảnh"}}]
+}}
+```
+Phải có đủ {num_scenes} cảnh, đánh số từ 1 đến {num_scenes}.
+"""
+
+    def _expand_prompt(
+        self,
+        outline: Dict,
+        summaries: Dict[int, str],
+        numbers: List[int],
+        scene_duration: int,
+        style: str
+    ) -> str:
+        """Render the prompt that writes full scenes for one batch of the outline"""
+        outline_text = "\n".join(f"{number}. {summary}" for number, summary in sorted(summaries.items()))
+        first, last = numbers[0], numbers[-1]
+
+        return f"""
+Video: "{outline.get('title', '')}" - {outline.get('description', '')}
+Phong cách: {style}
+
+Dàn ý toàn bộ video (để giữ mạch truyện liền mạch):
+{outline_text}
+
+Viết chi tiết CHỈ các cảnh từ {first} đến {last}, đúng theo dàn ý.
+Cảnh đầu tiên phải nối tiếp tự nhiên cảnh {first - 1}, cảnh cuối dẫn sang cảnh {last + 1} (nếu có).
+
+Mỗi cảnh cần:
+- description: Mô tả cảnh bằng tiếng Việt
+- veo_prompt: Prompt tiếng Anh 100-200 từ, tối ưu cho VEO 3.1 (chuyển động, góc máy, ánh sáng, mood)
+- camera_movement, time_of_day, mood
+
+**Output format (JSON):**
+```json
+{{
+  "scenes": [
+    {{
+      "scene_number": {first},
+      "duration": {scene_duration},
+      "description": "Mô tả cảnh bằng tiếng Việt",
+      "veo_prompt": "Detailed English prompt optimized for VEO 3.1",
+      "camera_movement": "slow pan left",
+      "time_of_day": "golden hour",
+      "mood": "peaceful"
+    }}
+  ]
+}}
+```
+"""
+
+    def stream_script(
+        self,
+        topic: str,
+        duration: int = 60,
+        scene_duration: int = 8,
+        aspect_ratio: str = "16:9",
+        style: str = "cinematic",
+        force_refresh: bool = False
+    ) -> ScriptStream:
+        """
+        Generate a script, yielding each scene as soon as Gemini has written it
+
+        Iterate over the result to get scenes; afterwards ``.script`` holds
+        the full script (same format as ``generate_script``).
+
+        Args:
+            topic: Video topic/subject
+            duration: Total video duration in seconds
+            scene_duration: Duration per scene in seconds
+            aspect_ratio: Video aspect ratio (16:9, 9:16, 1:1)
+            style: Visual style (cinematic, anime, realistic, etc.)
+            force_refresh: Ignore a cached script for the same request
+
+        Returns:
+            ScriptStream of scene dicts
+        """
+        prompt = self._script_prompt(topic, duration, scene_duration, aspect_ratio, style)
+        key = None
+        cached = None
+
+        if self.cache:
+            key = ResponseCache.make_key(self.model_name, prompt, self.SCRIPT_GENERATION_CONFIG)
+            if not (force_refresh or self.force_refresh):
+                cached = self.cache.get(key)
+
+        def chunks():
+            if cached is not None:
+                print("⚡ Using cached Gemini response")
+                yield cached
+                return
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self.SCRIPT_GENERATION_CONFIG,
+                stream=True
+            )
+            for chunk in response:
+                yield chunk.text
+
+        def finish(text: str) -> Dict:
+            script_data = salvage_script(text)
+            if key and cached is None:
+                self.cache.set(key, text)
+            script_data['scenes'] = self._complete_scenes(
+                script_data, list(range(1, duration // scene_duration + 1)),
+                scene_duration, style, force_refresh
+            )
+            return self._add_metadata(script_data, aspect_ratio)
+
+        def accept(scene: Dict) -> bool:
+            scene.setdefault('duration', scene_duration)
+            return not validate_scene(scene)
+
+        return ScriptStream(chunks(), finish, accept)
+
+    def _script_prompt(
+        self,
+        topic: str,
+        duration: int,
+        scene_duration: int,
+        aspect_ratio: str,
+        style: str
+    ) -> str:
+        """Render the script generation prompt"""
+        num_scenes = duration // scene_duration
+
+        return f"""
 Tạo kịch bản video về "{topic}" với các yêu cầu sau:
 
 **Thông số kỹ thuật:**
@@ -95,32 +557,23 @@ Tạo kịch bản video về "{topic}" với các yêu cầu sau:
 Hãy tạo kịch bản hoàn chỉnh theo format trên.
 """
 
-        response = self.model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 8192,
-            }
-        )
-
-        # Extract JSON from response
-        text = response.text
+    @staticmethod
+    def _add_metadata(script_data: Dict, aspect_ratio: str) -> Dict:
+        """Stamp a parsed script with creation time and aspect ratio"""
+        script_data["created_at"] = datetime.now().isoformat()
+        script_data["aspect_ratio"] = aspect_ratio
+        return script_data
 
+    @staticmethod
+    def _parse_json(text: str) -> Dict:
+        """Extract the JSON object from a response"""
         # Remove markdown code blocks if present
         if "```json" in text:
             text = text.split("```json")[1].split("```")[0]
         elif "```" in text:
             text = text.split("```")[1].split("```")[0]
 
-        script_data = json.loads(text.strip())
-
-        # Add metadata
-        script_data["created_at"] = datetime.now().isoformat()
-        script_data["aspect_ratio"] = aspect_ratio
-
-        return script_data
+        return json.loads(text.strip())
 
     def save_script(self, script_data: Dict, output_dir: str = "./data/scripts") -> str:
         """
@@ -150,13 +603,19 @@ Hãy tạo kịch bản hoàn chỉnh theo format trên.
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def refine_scene_prompt(self, scene_description: str, style: str = "cinematic") -> str:
+    def refine_scene_prompt(
+        self,
+        scene_description: str,
+        style: str = "cinematic",
+        force_refresh: bool = False
+    ) -> str:
         """
         Refine a single scene description into optimized VEO prompt
 
         Args:
             scene_description: Scene description in Vietnamese
             style: Visual style
+            force_refresh: Ignore a cached prompt for the same description
 
         Returns:
             Optimized English prompt for VEO 3.1
@@ -178,8 +637,116 @@ Requirements:
 Output only the prompt, no explanation.
 """
 
-        response = self.model.generate_content(prompt)
-        return response.text.strip()
+        return self._generate(prompt, force_refresh=force_refresh).strip()
+
+    def refine_scene_prompts(
+        self,
+        scenes: List[Dict],
+        style: str = "cinematic",
+        max_scenes_per_request: int = 10,
+        max_output_tokens: int = 8192,
+        max_parallel: int = 4,
+        limiter: Optional[RateLimiter] = None,
+        retries: int = 4,
+        force_refresh: bool = False
+    ) -> List[Dict]:
+        """
+        Refine many scene descriptions into VEO prompts
+
+        Scenes are packed several per request (as many as the output token
+        budget allows) and requests run concurrently under a shared rate
+        limiter; a 429 pauses every worker with exponential backoff.
+
+        Args:
+            scenes: Scene dicts with 'description' (and optionally 'scene_number')
+            style: Visual style
+            max_scenes_per_request: Upper bound of scenes packed into one request
+            max_output_tokens: Output budget of one request
+            max_parallel: Max requests at once
+            limiter: Shared RateLimiter (default: Gemini free-tier quota)
+            retries: Retries per request after rate limiting
+            force_refresh: Ignore cached responses
+
+        Returns:
+            Copies of the scenes with 'veo_prompt' replaced (unchanged on failure)
+        """
+        limiter = limiter or RateLimiter()
+        # Roughly 300 output tokens per 100-200 word prompt, plus JSON overhead
+        per_scene = max(max_output_tokens // 350, 1)
+        pack_size = max(min(max_scenes_per_request, per_scene), 1)
+        packs = [list(range(i, min(i + pack_size, len(scenes)))) for i in range(0, len(scenes), pack_size)]
+
+        print(f"✨ Refining {len(scenes)} prompts in {len(packs)} requests ({max_parallel} at a time)...")
+
+        def refine_pack(indexes: List[int]) -> Dict[int, str]:
+            prompt = self._refine_batch_prompt([scenes[i] for i in indexes], indexes, style)
+            estimate = len(prompt) // 3 + 350 * len(indexes)
+
+            for attempt in range(retries + 1):
+                try:
+                    data = self._generate(
+                        prompt,
+                        generation_config={"temperature": 0.7, "max_output_tokens": max_output_tokens},
+                        parse=self._parse_json,
+                        force_refresh=force_refresh,
+                        # Quota is only spent when the cache cannot answer
+                        before_call=lambda: limiter.acquire(estimate)
+                    )
+                    return {
+                        int(item['id']): item['veo_prompt']
+                        for item in data.get('prompts', [])
+                        if str(item.get('id')) in map(str, indexes) and item.get('veo_prompt')
+                    }
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == retries:
+                        print(f"⚠️  Refine request for scenes {indexes[0] + 1}-{indexes[-1] + 1} failed: {e}")
+                        return {}
+                    delay = 5 * 2 ** attempt
+                    print(f"⏳ Rate limited - backing off {delay}s")
+                    limiter.pause(delay)
+
+            return {}
+
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            refined: Dict[int, str] = {}
+            for result in pool.map(refine_pack, packs):
+                refined.update(result)
+
+        print(f"✅ Refined {len(refined)}/{len(scenes)} prompts in {time.monotonic() - started_at:.0f}s")
+        return [
+            {**scene, 'veo_prompt': refined[i]} if i in refined else dict(scene)
+            for i, scene in enumerate(scenes)
+        ]
+
+    def _refine_batch_prompt(self, scenes: List[Dict], indexes: List[int], style: str) -> str:
+        """Render the prompt that refines several scenes at once"""
+        scene_lines = "\n".join(
+            f"[{i}] {scene.get('description') or scene.get('veo_prompt', '')}"
+            for i, scene in zip(indexes, scenes)
+        )
+
+        return f"""
+Convert each scene description below into an optimized VEO 3.1 prompt.
+
+Style: {style}
+
+Scenes:
+{scene_lines}
+
+Requirements for every prompt:
+- 100-200 words in English
+- Include camera movement details
+- Describe lighting and mood
+- Focus on visual elements and motion
+- Use cinematic terminology
+- Optimize for VEO 3.1 capabilities
+
+Output only JSON, one entry per scene, using the number in brackets as id:
+```json
+{{"prompts": [{{"id": {indexes[0]}, "veo_prompt": "..."}}]}}
+```
+"""
 
 
 # Example usage
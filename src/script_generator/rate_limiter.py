@@ -0,0 +1,103 @@
+"""
+Rate Limiter - Token buckets for Gemini request and token quotas
+Giới hạn số request / token mỗi phút khi gọi Gemini song song, tạm dừng khi gặp lỗi 429
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``;
+    ``acquire`` blocks until enough are available.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize Token Bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Max tokens held (default: one second's worth, at least 1)
+        """
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Take tokens, waiting as long as needed
+
+        Args:
+            tokens: Amount to take (clamped to the capacity)
+        """
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                else:
+                    wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens for a while (e.g. after a 429)"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute quota shared by worker threads"""
+
+    def __init__(self, requests_per_minute: float = 15, tokens_per_minute: float = 1_000_000):
+        """
+        Initialize Rate Limiter
+
+        Args:
+            requests_per_minute: Request quota (Gemini free tier: 15)
+            tokens_per_minute: Input + output token quota
+        """
+        self.requests = TokenBucket(requests_per_minute / 60, capacity=max(requests_per_minute / 60, 1.0))
+        self.tokens = TokenBucket(tokens_per_minute / 60, capacity=tokens_per_minute / 60 * 10)
+
+    def acquire(self, tokens: int = 0):
+        """
+        Wait for quota for one request
+
+        Args:
+            tokens: Estimated input + output tokens of the request
+        """
+        self.requests.acquire(1)
+        if tokens:
+            self.tokens.acquire(tokens)
+
+    def pause(self, seconds: float):
+        """Back off every worker (e.g. after a 429 response)"""
+        self.requests.pause(seconds)
+        self.tokens.pause(seconds)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for quota / 429 errors from the Gemini client (by status code or exception type)"""
+    response = getattr(error, 'response', None)
+    return (
+        getattr(error, 'code', None) == 429
+        or getattr(error, 'status_code', None) == 429
+        or getattr(response, 'status_code', None) == 429
+        or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests')
+    )
@@ -0,0 +1,131 @@
+"""
+Response Cache - On-disk cache of Gemini responses
+Lưu phản hồi Gemini theo nội dung yêu cầu để chạy lại cùng chủ đề không tốn thời gian / quota
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """
+    Content-addressed cache: one JSON file per (model, prompt, generation_config)
+
+    Entries expire after ``ttl`` seconds. A hit refreshes the file's mtime,
+    so when the directory grows past ``max_bytes`` the least recently used
+    entries are evicted first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = "./data/cache/gemini",
+        ttl: int = 7 * 24 * 3600,
+        max_bytes: int = 50 * 1024 * 1024
+    ):
+        """
+        Initialize Response Cache
+
+        Args:
+            cache_dir: Directory for cached responses
+            ttl: Seconds an entry stays valid (0 = forever)
+            max_bytes: Total size the cache is trimmed to
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        """
+        Key of a request
+
+        Args:
+            model: Model name
+            prompt: Fully rendered prompt
+            generation_config: Generation parameters (None = model defaults)
+
+        Returns:
+            SHA-256 hex digest
+        """
+        payload = json.dumps(
+            {'model': model, 'prompt': prompt, 'generation_config': generation_config or {}},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Cached response text
+
+        Args:
+            key: Request key from ``make_key``
+
+        Returns:
+            Response text, or None if missing or expired
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl and time.time() - entry.get('created_at', 0) > self.ttl:
+            self.invalidate(key)
+            return None
+
+        os.utime(path)  # Mark as recently used
+        return entry.get('text')
+
+    def set(self, key: str, text: str):
+        """
+        Store a response
+
+        Args:
+            key: Request key from ``make_key``
+            text: Response text
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': time.time(), 'text': text}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def invalidate(self, key: str):
+        """Remove one entry"""
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,90 @@
+"""
+Script Parser - Tolerant parsing and validation of Gemini script output
+Cứu các scene hoàn chỉnh từ phản hồi bị cắt ngang và kiểm tra từng scene theo schema
+"""
+
+import json
+import re
+from typing import Dict, List
+
+from .stream_parser import SceneStreamParser
+
+
+# Fields every scene must have, with their accepted types
+SCENE_SCHEMA = {
+    'scene_number': int,
+    'duration': (int, float),
+    'description': str,
+    'veo_prompt': str,
+}
+
+
+def validate_scene(scene: Dict) -> List[str]:
+    """
+    Check a scene against SCENE_SCHEMA (numeric strings are coerced in place)
+
+    Args:
+        scene: Scene dict from the model
+
+    Returns:
+        List of problems (empty if the scene is usable)
+    """
+    if not isinstance(scene, dict):
+        return ["not an object"]
+
+    errors = []
+    for field, types in SCENE_SCHEMA.items():
+        value = scene.get(field)
+        if types is int and isinstance(value, str) and value.strip().isdigit():
+            value = scene[field] = int(value)
+        if value is None or value == "":
+            errors.append(f"missing {field}")
+        elif not isinstance(value, types) or isinstance(value, bool):
+            errors.append(f"{field} has wrong type ({type(value).__name__})")
+
+    if not errors and scene['duration'] <= 0:
+        errors.append("duration must be positive")
+    return errors
+
+
+def salvage_script(text: str) -> Dict:
+    """
+    Parse a script response, keeping every complete scene of a truncated one
+
+    Args:
+        text: Raw response text (may be fenced, truncated or slightly malformed)
+
+    Returns:
+        Script dict; 'truncated' is True when the full JSON did not parse
+
+    Raises:
+        ValueError: If not a single scene could be recovered
+    """
+    body = text
+    if "```json" in body:
+        body = body.split("```json", 1)[1]
+    elif "```" in body:
+        body = body.split("```", 1)[1]
+    body = body.split("```", 1)[0].strip()
+
+    try:
+        script = json.loads(body)
+        if isinstance(script, dict) and isinstance(script.get('scenes'), list):
+            script['truncated'] = False
+            return script
+    except ValueError:
+        pass
+
+    parser = SceneStreamParser()
+    scenes = parser.feed(body)
+    if not scenes:
+        raise ValueError("No complete scene in response")
+
+    # Header fields come before the scenes array
+    header = body[:parser.array_pattern.search(body).start()]
+    script = {'scenes': scenes, 'truncated': True}
+    for key in ('title', 'description', 'style'):
+        match = re.search(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)"' % key, header)
+        if match:
+            script[key] = json.loads(f'"{match.group(1)}"')
+    return script
@@ -0,0 +1,140 @@
+"""
+Stream Parser - Pull finished scenes out of a script while Gemini is still writing it
+Tách từng scene hoàn chỉnh ngay khi dấu đóng ngoặc của nó về tới, không đợi cả kịch bản
+"""
+
+import json
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class SceneStreamParser:
+    """
+    Incremental parser for the ``"scenes": [...]`` array of a script
+
+    Text is fed chunk by chunk. Only the scenes array is scanned (tracking
+    brace depth and string/escape state), and each element is decoded as
+    soon as its closing brace arrives.
+    """
+
+    def __init__(self, array_key: str = "scenes"):
+        """
+        Initialize Scene Stream Parser
+
+        Args:
+            array_key: Key of the array whose objects are emitted
+        """
+        self.array_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+        self.buffer = ""
+        self.done = False
+
+        self._pos = None     # next index to scan, None until the array starts
+        self._depth = 0      # brace depth inside the array (0 = between elements)
+        self._start = None   # index where the current element began
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Add text and return the scenes it completed
+
+        Args:
+            chunk: Next piece of the response
+
+        Returns:
+            Scene dicts completed by this chunk (in order)
+        """
+        self.buffer += chunk
+        if self.done:
+            return []
+
+        if self._pos is None:
+            match = self.array_pattern.search(self.buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        scenes = []
+        buffer = self.buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif c == '}':
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    try:
+                        scenes.append(json.loads(buffer[self._start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._start = None
+            elif c == ']' and self._depth == 0:
+                self.done = True
+                i += 1
+                break
+            i += 1
+
+        self._pos = i
+        return scenes
+
+
+class ScriptStream:
+    """
+    Iterable of scenes from a streamed script response
+
+    Iterating yields each scene as soon as it is complete, then any scenes
+    the final script has that were not streamed (e.g. written by a
+    continuation request). Afterwards ``script`` holds the full parsed
+    script and ``scenes`` every scene that was yielded.
+    """
+
+    def __init__(
+        self,
+        chunks: Iterable[str],
+        finish: Callable[[str], Dict],
+        accept: Optional[Callable[[Dict], bool]] = None
+    ):
+        """
+        Initialize Script Stream
+
+        Args:
+            chunks: Response text chunks
+            finish: Builds the full script from the complete text (may raise)
+            accept: Optional check a streamed scene must pass to be yielded
+        """
+        self.chunks = chunks
+        self.finish = finish
+        self.accept = accept
+        self.scenes: List[Dict] = []
+        self.text = ""
+        self.script: Optional[Dict] = None
+
+    def __iter__(self) -> Iterator[Dict]:
+        parser = SceneStreamParser()
+        for chunk in self.chunks:
+            for scene in parser.feed(chunk):
+                if self.accept and not self.accept(scene):
+                    continue
+                self.scenes.append(scene)
+                yield scene
+
+        self.text = parser.buffer
+        self.script = self.finish(self.text)
+
+        streamed = {scene.get('scene_number') for scene in self.scenes}
+        for scene in self.script.get('scenes', []):
+            if scene.get('scene_number') not in streamed:
+                self.scenes.append(scene)
+                yield scene
@@ -4,18 +4,43 @@ Nối các video scenes thành video hoàn chỉnh
 """
 
 import os
+import shutil
+import tempfile
 import logging
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from moviepy.editor import VideoFileClip, concatenate_videoclips, CompositeVideoClip
 
+from .video_processor.ffmpeg_tools import concat_copy, parse_frame_rate, streams_compatible
+from .video_processor.parallel_encode import normalize_clips
+from .video_processor.probe_cache import PROBE_CACHE_FILENAME, ProbeCache
+from .video_processor.segment_cache import SegmentCache
+from .video_processor.transitions import render_crossfade
+
 logger = logging.getLogger(__name__)
 
 
 class VideoAssembler:
     """Assembles multiple scene videos into a single final video"""
 
-    def __init__(self):
+    def __init__(self, probe_cache_path: Optional[str] = None):
+        """
+        Initialize Video Assembler
+
+        Args:
+            probe_cache_path: Probe cache file (default: next to each output video)
+        """
         self.logger = logger
+        self.probe_cache_path = probe_cache_path
+        self._probe_caches: Dict[str, ProbeCache] = {}
+
+    def _probe_cache(self, output_path: str) -> ProbeCache:
+        """Get the probe cache stored in the project (output) directory"""
+        cache_path = self.probe_cache_path or os.path.join(
+            os.path.dirname(os.path.abspath(output_path)), PROBE_CACHE_FILENAME
+        )
+        if cache_path not in self._probe_caches:
+            self._probe_caches[cache_path] = ProbeCache(cache_path)
+        return self._probe_caches[cache_path]
 
     def assemble_videos(
         self,
@@ -23,7 +48,11 @@ class VideoAssembler:
         output_path: str,
         script: Optional[Dict] = None,
         add_transitions: bool = False,
-        transition_duration: float = 0.5
+        transition_duration: float = 0.5,
+        target_size: Optional[Tuple[int, int]] = None,
+        fps: Optional[float] = None,
+        workers: Optional[int] = None,
+        segment_dir: Optional[str] = None
     ) -> Optional[str]:
         """
         Assemble multiple video files into one
@@ -34,6 +63,11 @@ class VideoAssembler:
             script: Optional script metadata
             add_transitions: Whether to add crossfade transitions
             transition_duration: Duration of transitions in seconds
+            target_size: Optional (width, height) to resize every scene to
+            fps: Optional frame rate to normalise every scene to
+            workers: Encoder processes when re-encoding (default: CPU count)
+            segment_dir: Optional directory to keep per-scene intermediate
+                segments between builds, so only changed scenes are re-processed
 
         Returns:
             Path to the final video, or None if failed
@@ -41,6 +75,21 @@ class VideoAssembler:
         try:
             logger.info(f"🎞️  Assembling {len(video_files)} videos...")
 
+            existing_files = [f for f in video_files if os.path.exists(f)]
+            probes = self._probe_cache(output_path).get_many(existing_files)
+
+            if existing_files and all(probes):
+                segment_cache = SegmentCache(segment_dir) if segment_dir else None
+                if self._assemble_with_ffmpeg(
+                    existing_files, probes, output_path,
+                    add_transitions, transition_duration,
+                    target_size, fps, workers, segment_cache
+                ):
+                    logger.info(f"✅ Video assembly complete: {output_path}")
+                    return output_path
+
+            logger.info("   Falling back to re-encode with moviepy")
+
             # Load all video clips
             clips = []
             for i, video_file in enumerate(video_files):
@@ -81,8 +130,9 @@ class VideoAssembler:
                 output_path,
                 codec='libx264',
                 audio_codec='aac',
-                fps=30,
+                fps=fps or 30,
                 preset='medium',
+                threads=workers or os.cpu_count(),
                 logger=None  # Suppress moviepy logging
             )
 
@@ -98,14 +148,137 @@ class VideoAssembler:
             logger.error(f"❌ Assembly failed: {str(e)}")
             return None
 
+    def _assemble_with_ffmpeg(
+        self,
+        files: List[str],
+        probes: List[Dict],
+        output_path: str,
+        add_transitions: bool,
+        transition_duration: float,
+        target_size: Optional[Tuple[int, int]],
+        fps: Optional[float],
+        workers: Optional[int],
+        segment_cache: Optional[SegmentCache]
+    ) -> bool:
+        """
+        Assemble with ffmpeg, re-encoding as little as possible
+
+        Compatible scenes are joined directly. Otherwise every scene is
+        normalised in parallel chunks first. With a segment cache, normalised
+        scenes and crossfade segments are reused for unchanged content.
+        """
+        source_keys = [segment_cache.content_hash(f) for f in files] if segment_cache else None
+        keys = source_keys
+
+        if not self._needs_normalize(probes, target_size, fps):
+            # Fast path: container-level concat, re-encoding only crossfade boundaries
+            joined = self._join(files, output_path, add_transitions, transition_duration,
+                                probes, segment_cache, keys)
+        else:
+            # Re-encode is unavoidable: normalise in parallel chunks, then join losslessly
+            size = target_size or (probes[0]['video']['width'], probes[0]['video']['height'])
+            fps = fps or 30
+
+            if segment_cache:
+                keys = [f"{key}_{size[0]}x{size[1]}_{fps}" for key in source_keys]
+                names = [f"{key}.mp4" for key in keys]
+                normalised = [segment_cache.use(name) for name in names]
+                missing = [i for i, name in enumerate(names) if not segment_cache.has(name)]
+                logger.info(f"🧩 Re-using {len(files) - len(missing)}/{len(files)} normalised scenes")
+
+                if missing and not normalize_clips(
+                    [files[i] for i in missing], segment_cache.segment_dir, size,
+                    fps=fps, workers=workers, probes=[probes[i] for i in missing],
+                    output_names=[names[i] for i in missing]
+                ):
+                    return False
+
+                joined = self._join(normalised, output_path, add_transitions, transition_duration,
+                                    segment_cache=segment_cache, keys=keys)
+            else:
+                work_dir = tempfile.mkdtemp(
+                    prefix='assemble_',
+                    dir=os.path.dirname(os.path.abspath(output_path))
+                )
+                try:
+                    normalised = normalize_clips(
+                        files, work_dir, size,
+                        fps=fps, workers=workers, probes=probes
+                    )
+                    joined = bool(normalised) and self._join(
+                        normalised, output_path, add_transitions, transition_duration
+                    )
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+
+        if joined and segment_cache:
+            segment_cache.record_build(source_keys)
+
+        return joined
+
+    def _needs_normalize(
+        self,
+        probes: List[Dict],
+        target_size: Optional[Tuple[int, int]],
+        fps: Optional[float]
+    ) -> bool:
+        """Check if scenes must be re-encoded before they can be joined"""
+        if not streams_compatible(probes):
+            return True
+
+        video = probes[0]['video']
+        if target_size and (video.get('width'), video.get('height')) != tuple(target_size):
+            return True
+        if fps and abs(parse_frame_rate(video.get('r_frame_rate')) - fps) > 0.01:
+            return True
+
+        return False
+
+    def _join(
+        self,
+        files: List[str],
+        output_path: str,
+        add_transitions: bool,
+        transition_duration: float,
+        probes: Optional[List[Dict]] = None,
+        segment_cache: Optional[SegmentCache] = None,
+        keys: Optional[List[str]] = None
+    ) -> bool:
+        """Join scenes that share codec parameters without a full re-encode"""
+        if add_transitions and len(files) > 1:
+            return render_crossfade(
+                files, output_path, transition_duration, probes=probes,
+                segment_cache=segment_cache, keys=keys
+            )
+        return concat_copy(files, output_path)
+
     def resize_video(
         self,
         input_path: str,
         output_path: str,
         width: int,
-        height: int
+        height: int,
+        workers: Optional[int] = None
     ) -> Optional[str]:
         """Resize a video to specific dimensions"""
+        probe = self._probe_cache(output_path).get(input_path)
+        if probe and probe['video']:
+            work_dir = tempfile.mkdtemp(
+                prefix='resize_',
+                dir=os.path.dirname(os.path.abspath(output_path))
+            )
+            try:
+                fps = parse_frame_rate(probe['video'].get('r_frame_rate')) or 30
+                normalised = normalize_clips(
+                    [input_path], work_dir, (width, height),
+                    fps=fps, workers=workers, probes=[probe]
+                )
+                if normalised:
+                    shutil.move(normalised[0], output_path)
+                    return output_path
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
         try:
             clip = VideoFileClip(input_path)
             resized = clip.resize((width, height))
@@ -116,3 +289,4 @@ class VideoAssembler:
         except Exception as e:
             logger.error(f"❌ Resize failed: {str(e)}")
             return None
+
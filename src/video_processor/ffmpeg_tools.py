@@ -0,0 +1,291 @@
+"""
+FFmpeg helpers - probe videos and concatenate without re-encoding
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+# Stream properties that must match for a lossless container-level concat
+VIDEO_COMPAT_KEYS = ('codec_name', 'profile', 'width', 'height', 'pix_fmt', 'r_frame_rate', 'time_base')
+AUDIO_COMPAT_KEYS = ('codec_name', 'sample_rate', 'channels')
+
+# Encoder used when a segment must be re-encoded to match its neighbours
+ENCODERS = {
+    'h264': 'libx264',
+    'hevc': 'libx265',
+}
+
+
+def get_ffmpeg_binary() -> str:
+    """Get the ffmpeg binary used by moviepy (falls back to PATH)"""
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return shutil.which("ffmpeg") or "ffmpeg"
+
+
+@lru_cache(maxsize=None)
+def _list_filters(binary: str) -> frozenset:
+    """Names of the filters an ffmpeg binary was built with"""
+    try:
+        result = subprocess.run([binary, '-hide_banner', '-filters'], capture_output=True, text=True)
+    except OSError:
+        return frozenset()
+
+    names = set()
+    for line in result.stdout.splitlines():
+        # " TSC xfade  VV->V  Cross fade one video with another video."
+        parts = line.split()
+        if len(parts) >= 3 and '->' in parts[2]:
+            names.add(parts[1])
+    return frozenset(names)
+
+
+def find_ffmpeg_with_filters(filters: Iterable[str]) -> Optional[str]:
+    """
+    Find an ffmpeg binary that has all the given filters
+
+    moviepy's bundled ffmpeg is tried first, then the one on PATH (bundled
+    builds can be old or minimal and lack e.g. xfade).
+
+    Args:
+        filters: Required filter names
+
+    Returns:
+        Binary path or None if no candidate has them all
+    """
+    filters = set(filters)
+    candidates = [get_ffmpeg_binary(), shutil.which("ffmpeg")]
+    for binary in dict.fromkeys(c for c in candidates if c):
+        if filters <= _list_filters(binary):
+            return binary
+    return None
+
+
+def get_ffprobe_binary() -> Optional[str]:
+    """Find ffprobe next to ffmpeg or on PATH"""
+    ffmpeg = get_ffmpeg_binary()
+    sibling = os.path.join(os.path.dirname(ffmpeg), os.path.basename(ffmpeg).replace("ffmpeg", "ffprobe"))
+    if os.path.dirname(ffmpeg) and os.path.isfile(sibling):
+        return sibling
+    return shutil.which("ffprobe")
+
+
+def run_ffmpeg(args: List[str], binary: Optional[str] = None) -> bool:
+    """
+    Run ffmpeg with the given arguments
+
+    Args:
+        args: Arguments after the binary name
+        binary: ffmpeg binary to use (default: get_ffmpeg_binary())
+
+    Returns:
+        True if ffmpeg exited successfully
+    """
+    cmd = [binary or get_ffmpeg_binary(), '-hide_banner', '-loglevel', 'error', '-y'] + args
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError as e:
+        logger.warning(f"⚠️  Cannot run ffmpeg: {str(e)}")
+        return False
+
+    if result.returncode != 0:
+        logger.warning(f"⚠️  ffmpeg failed: {result.stderr.strip()[-500:]}")
+        return False
+    return True
+
+
+def probe_video(path: str) -> Optional[Dict]:
+    """
+    Read container and stream metadata with ffprobe
+
+    Args:
+        path: Video file path
+
+    Returns:
+        Dict with 'duration', 'video' and 'audio' stream info, or None if probing failed
+    """
+    ffprobe = get_ffprobe_binary()
+    if not ffprobe:
+        logger.debug("   ffprobe not found")
+        return None
+
+    cmd = [
+        ffprobe, '-v', 'error',
+        '-show_entries', 'format=duration:stream=codec_type,codec_name,profile,level,width,height,'
+                         'pix_fmt,r_frame_rate,time_base,sample_rate,channels',
+        '-of', 'json',
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            logger.debug(f"   ffprobe failed for {path}: {result.stderr.strip()}")
+            return None
+        data = json.loads(result.stdout)
+    except (OSError, ValueError) as e:
+        logger.debug(f"   ffprobe error for {path}: {str(e)}")
+        return None
+
+    info = {
+        'duration': float(data.get('format', {}).get('duration') or 0),
+        'video': None,
+        'audio': None
+    }
+    for stream in data.get('streams', []):
+        kind = stream.get('codec_type')
+        if kind in ('video', 'audio') and info[kind] is None:
+            info[kind] = stream
+
+    return info
+
+
+def parse_frame_rate(rate: Optional[str]) -> float:
+    """Convert an ffprobe frame rate like '30000/1001' to a float"""
+    try:
+        num, _, den = (rate or '').partition('/')
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
+
+
+def list_keyframes(path: str) -> List[float]:
+    """
+    List keyframe timestamps of the first video stream (reads packets, no decode)
+
+    Args:
+        path: Video file path
+
+    Returns:
+        Sorted keyframe times in seconds (empty if probing failed)
+    """
+    ffprobe = get_ffprobe_binary()
+    if not ffprobe:
+        return []
+
+    cmd = [
+        ffprobe, '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except OSError:
+        return []
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) >= 2 and 'K' in parts[1]:
+            try:
+                keyframes.append(float(parts[0]))
+            except ValueError:
+                continue
+
+    return sorted(keyframes)
+
+
+def streams_compatible(probes: List[Optional[Dict]]) -> bool:
+    """
+    Check if videos can be joined with stream copy
+
+    Args:
+        probes: Results of probe_video() for each input
+
+    Returns:
+        True if every input has identical codec parameters
+    """
+    if not probes or any(p is None or p['video'] is None for p in probes):
+        return False
+    if not probes[0]['video'].get('codec_name'):
+        # Fallback probes (no ffprobe) cannot prove codec compatibility
+        return False
+
+    first = probes[0]
+    for probe in probes[1:]:
+        for key in VIDEO_COMPAT_KEYS:
+            if probe['video'].get(key) != first['video'].get(key):
+                logger.info(f"   ℹ️  Video {key} differs: {first['video'].get(key)} vs {probe['video'].get(key)}")
+                return False
+
+        if (probe['audio'] is None) != (first['audio'] is None):
+            logger.info("   ℹ️  Some inputs have no audio track")
+            return False
+        if probe['audio'] is not None:
+            for key in AUDIO_COMPAT_KEYS:
+                if probe['audio'].get(key) != first['audio'].get(key):
+                    logger.info(f"   ℹ️  Audio {key} differs: {first['audio'].get(key)} vs {probe['audio'].get(key)}")
+                    return False
+
+    return True
+
+
+def write_concat_list(paths: List[str], list_path: str):
+    """Write an ffmpeg concat demuxer list file"""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+
+def concat_copy(paths: List[str], output_path: str) -> bool:
+    """
+    Concatenate videos at the container level (no re-encode)
+
+    Args:
+        paths: Input video paths (in order), with identical codec parameters
+        output_path: Output file path
+
+    Returns:
+        True if successful
+    """
+    fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='concat_')
+    os.close(fd)
+
+    try:
+        write_concat_list(paths, list_path)
+        return run_ffmpeg([
+            '-f', 'concat', '-safe', '0',
+            '-i', list_path,
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            output_path
+        ])
+    finally:
+        os.remove(list_path)
+
+
+def try_stream_copy_concat(
+    paths: List[str],
+    output_path: str,
+    probes: Optional[List[Dict]] = None
+) -> bool:
+    """
+    Concatenate with stream copy if all inputs share codec parameters
+
+    Args:
+        paths: Input video paths (in order)
+        output_path: Output file path
+        probes: Optional probe_video() results for the inputs
+
+    Returns:
+        True if the fast path produced the output, False if caller must re-encode
+    """
+    probes = probes or [probe_video(path) for path in paths]
+    if not streams_compatible(probes):
+        return False
+
+    logger.info("⚡ Inputs share codec parameters - concatenating with stream copy")
+    return concat_copy(paths, output_path)
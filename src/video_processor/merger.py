@@ -3,25 +3,42 @@ Video Processor - Merge scenes into final video
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from moviepy.editor import VideoFileClip, concatenate_videoclips, CompositeVideoClip
 import logging
 
+from .ffmpeg_tools import parse_frame_rate, try_stream_copy_concat
+from .probe_cache import PROBE_CACHE_FILENAME, ProbeCache
+from .transitions import render_crossfade
+
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class VideoMerger:
-    def __init__(self, output_dir: str = "./data/videos"):
+    def __init__(self, output_dir: str = "./data/videos", probe_cache_path: Optional[str] = None):
         """
         Initialize Video Merger
 
         Args:
             output_dir: Output directory for merged videos
+            probe_cache_path: Probe cache file (default: next to the scene
+                videos, i.e. in their project directory)
         """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
+        self.probe_cache_path = probe_cache_path
+        self._probe_caches: Dict[str, ProbeCache] = {}
+
+    def _probe_cache(self, video_path: str) -> ProbeCache:
+        """Get the probe cache stored with the project's scene videos"""
+        cache_path = self.probe_cache_path or os.path.join(
+            os.path.dirname(os.path.abspath(video_path)), PROBE_CACHE_FILENAME
+        )
+        if cache_path not in self._probe_caches:
+            self._probe_caches[cache_path] = ProbeCache(cache_path)
+        return self._probe_caches[cache_path]
 
     def merge_scenes(
         self,
@@ -45,6 +62,23 @@ class VideoMerger:
         try:
             logger.info(f"🎬 Merging {len(video_paths)} videos...")
 
+            output_path = os.path.join(self.output_dir, output_filename)
+
+            # Fast path: Flow scenes share codec/resolution/fps, so join them
+            # without decoding, re-encoding only the crossfade boundaries
+            existing_paths = [p for p in video_paths if os.path.exists(p)]
+            if existing_paths:
+                probes = self._probe_cache(existing_paths[0]).get_many(existing_paths)
+                if add_transitions and len(existing_paths) > 1:
+                    merged = render_crossfade(existing_paths, output_path, transition_duration, probes=probes)
+                else:
+                    merged = try_stream_copy_concat(existing_paths, output_path, probes=probes)
+
+                if merged:
+                    logger.info(f"✅ Video merged successfully: {output_path}")
+                    return output_path
+                logger.info("🔁 Falling back to re-encode with moviepy")
+
             # Load all video clips
             clips = []
             for i, path in enumerate(video_paths, 1):
@@ -69,7 +103,6 @@ class VideoMerger:
                 final_clip = concatenate_videoclips(clips, method="compose")
 
             # Export
-            output_path = os.path.join(self.output_dir, output_filename)
             logger.info(f"💾 Exporting to: {output_path}")
 
             final_clip.write_videofile(
@@ -78,7 +111,7 @@ class VideoMerger:
                 audio_codec='aac',
                 fps=30,
                 preset='medium',
-                threads=4,
+                threads=os.cpu_count(),
                 logger=None  # Suppress moviepy logs
             )
 
@@ -134,47 +167,48 @@ class VideoMerger:
             List of valid video paths
         """
         valid_paths = []
+        existing_paths = []
 
         for path in video_paths:
             if not os.path.exists(path):
                 logger.warning(f"⚠️  Video not found: {path}")
                 continue
+            existing_paths.append(path)
 
-            try:
-                # Try to open video to check if valid
-                clip = VideoFileClip(path)
-                duration = clip.duration
-                clip.close()
-
-                if duration > 0:
-                    valid_paths.append(path)
-                    logger.info(f"✅ Valid: {os.path.basename(path)} ({duration:.1f}s)")
-                else:
-                    logger.warning(f"⚠️  Invalid duration: {path}")
+        # Probe metadata (cached by path + size + mtime) instead of opening each clip
+        probes = self._probe_cache(existing_paths[0]).get_many(existing_paths) if existing_paths else []
+        for path, info in zip(existing_paths, probes):
+            if info is None:
+                logger.warning(f"⚠️  Cannot read video: {path}")
+                continue
 
-            except Exception as e:
-                logger.warning(f"⚠️  Cannot read video: {path} - {str(e)}")
+            duration = info['duration']
+            if duration > 0:
+                valid_paths.append(path)
+                logger.info(f"✅ Valid: {os.path.basename(path)} ({duration:.1f}s)")
+            else:
+                logger.warning(f"⚠️  Invalid duration: {path}")
 
         logger.info(f"📊 Valid videos: {len(valid_paths)}/{len(video_paths)}")
         return valid_paths
 
     def get_video_info(self, video_path: str) -> dict:
         """Get video metadata"""
-        try:
-            clip = VideoFileClip(video_path)
-            info = {
-                'duration': clip.duration,
-                'fps': clip.fps,
-                'size': clip.size,
-                'width': clip.w,
-                'height': clip.h
-            }
-            clip.close()
-            return info
-        except Exception as e:
-            logger.error(f"❌ Error getting video info: {str(e)}")
+        probe = self._probe_cache(video_path).get(video_path)
+        if not probe or not probe['video']:
+            logger.error(f"❌ Error getting video info: cannot probe {video_path}")
             return {}
 
+        width = probe['video'].get('width')
+        height = probe['video'].get('height')
+        return {
+            'duration': probe['duration'],
+            'fps': parse_frame_rate(probe['video'].get('r_frame_rate')),
+            'size': [width, height],
+            'width': width,
+            'height': height
+        }
+
 
 # Example usage
 if __name__ == "__main__":
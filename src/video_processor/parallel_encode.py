@@ -0,0 +1,201 @@
+"""
+Parallel segment encoding
+Chia timeline thành các đoạn theo keyframe (GOP) và encode song song trên nhiều core
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from .ffmpeg_tools import list_keyframes, probe_video, run_ffmpeg, write_concat_list
+
+
+logger = logging.getLogger(__name__)
+
+
+def plan_chunks(path: str, duration: float, chunk_seconds: float = 4.0) -> List[Tuple[float, float]]:
+    """
+    Split a clip into independent chunks that start on source keyframes
+
+    Args:
+        path: Video file path
+        duration: Clip duration in seconds
+        chunk_seconds: Minimum chunk length
+
+    Returns:
+        List of (start, end) times covering the whole clip
+    """
+    boundaries = [0.0]
+    for keyframe in list_keyframes(path):
+        if keyframe - boundaries[-1] >= chunk_seconds and duration - keyframe >= chunk_seconds / 2:
+            boundaries.append(keyframe)
+    boundaries.append(duration)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def output_frame(seconds: float, fps: float) -> int:
+    """Index of the output frame the fps filter places at a source timestamp"""
+    return int(seconds * fps + 0.5)
+
+
+def _encode_chunk(job: Dict) -> bool:
+    """Encode one chunk (runs in a worker process)"""
+    width, height = job['size']
+    fps = job['fps']
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={fps}"
+    )
+
+    # Source timestamps are kept (-copyts), so every chunk's fps filter lands
+    # on the same frame grid as a single pass over the whole clip (its pts
+    # are frame indexes); each chunk then keeps exactly its own grid frames.
+    # Cutting by duration instead rounds every chunk separately and the clip
+    # drifts by a frame per chunk.
+    trim = []
+    if job['first_frame'] > 0:
+        trim.append(f"start_pts={job['first_frame']}")
+    if job['end_frame'] is not None:
+        trim.append(f"end_pts={job['end_frame']}")
+    if trim:
+        video_filter += f",trim={':'.join(trim)}"
+    video_filter += ",setpts=PTS-STARTPTS"
+
+    return run_ffmpeg([
+        '-ss', f"{job['start']:.6f}",
+        '-i', job['input'],
+        '-copyts',
+        '-an',
+        '-vf', video_filter,
+        '-c:v', 'libx264', '-preset', job['preset'], '-crf', str(job['crf']),
+        '-pix_fmt', 'yuv420p',
+        '-threads', str(job['threads']),
+        '-f', 'mpegts',
+        job['output']
+    ])
+
+
+def _join_clip(job: Dict) -> bool:
+    """Join a clip's encoded chunks and re-encode its audio (runs in a worker process)"""
+    write_concat_list(job['chunks'], job['list_path'])
+
+    if job['has_audio']:
+        audio_input = ['-i', job['input']]
+    else:
+        # Silent track so every normalised clip has identical streams
+        audio_input = ['-f', 'lavfi', '-i', 'anullsrc=r=48000:cl=stereo']
+
+    return run_ffmpeg([
+        '-f', 'concat', '-safe', '0', '-i', job['list_path'],
+        *audio_input,
+        '-map', '0:v:0', '-map', '1:a:0',
+        '-c:v', 'copy',
+        '-c:a', 'aac', '-b:a', '192k', '-ar', '48000', '-ac', '2',
+        '-shortest',
+        '-movflags', '+faststart',
+        job['output']
+    ])
+
+
+def normalize_clips(
+    paths: List[str],
+    work_dir: str,
+    size: Tuple[int, int],
+    fps: float = 30,
+    workers: Optional[int] = None,
+    chunk_seconds: float = 4.0,
+    preset: str = 'medium',
+    crf: int = 18,
+    probes: Optional[List[Dict]] = None,
+    output_names: Optional[List[str]] = None
+) -> Optional[List[str]]:
+    """
+    Re-encode clips to a common size/fps using a process pool
+
+    Every clip is split into GOP-aligned chunks; chunks from all clips are
+    encoded in parallel, then joined per clip with stream copy.
+
+    Args:
+        paths: Input video paths
+        work_dir: Directory for chunks and normalised clips
+        size: Target (width, height)
+        fps: Target frame rate
+        workers: Pool size (default: number of CPU cores)
+        chunk_seconds: Minimum chunk length in seconds
+        preset: x264 preset
+        crf: x264 quality
+        probes: Optional probe_video() results for the inputs
+        output_names: Optional file names for the normalised clips
+
+    Returns:
+        Paths of normalised clips (same order), or None if any encode failed
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    probes = probes or [probe_video(path) for path in paths]
+    if any(p is None for p in probes):
+        logger.warning("⚠️  Cannot probe all inputs for parallel encoding")
+        return None
+
+    cpu_count = os.cpu_count() or 1
+    workers = workers or cpu_count
+
+    chunk_jobs = []
+    join_jobs = []
+    for i, (path, probe) in enumerate(zip(paths, probes)):
+        name = output_names[i] if output_names else f"clip_{i:04d}.mp4"
+        chunks = []
+        spans = plan_chunks(path, probe['duration'], chunk_seconds)
+        for n, (start, end) in enumerate(spans):
+            chunk_path = os.path.join(work_dir, f"{os.path.splitext(name)[0]}_{n:03d}.ts")
+            chunks.append(chunk_path)
+            chunk_jobs.append({
+                'input': path,
+                'output': chunk_path,
+                'start': start,
+                'end': end,
+                'first_frame': output_frame(start, fps),
+                # The last chunk runs to the end of the input like a single pass would
+                'end_frame': output_frame(end, fps) if n < len(spans) - 1 else None,
+                'size': size,
+                'fps': fps,
+                'preset': preset,
+                'crf': crf,
+            })
+
+        join_jobs.append({
+            'input': path,
+            'chunks': chunks,
+            'list_path': os.path.join(work_dir, f"{os.path.splitext(name)[0]}.txt"),
+            'has_audio': probe['audio'] is not None,
+            'output': os.path.join(work_dir, name),
+        })
+
+    # Split cores between concurrent encoders so small batches still use the whole machine
+    threads = max(1, cpu_count // min(workers, len(chunk_jobs) or 1))
+    for job in chunk_jobs:
+        job['threads'] = threads
+
+    logger.info(f"⚙️  Encoding {len(chunk_jobs)} chunks from {len(paths)} clips "
+                f"on {workers} workers ({size[0]}x{size[1]} @ {fps}fps)")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        ok = all(pool.map(_encode_chunk, chunk_jobs))
+        if not ok:
+            logger.error("❌ Chunk encoding failed")
+        else:
+            ok = all(pool.map(_join_clip, join_jobs))
+            if not ok:
+                logger.error("❌ Joining chunks failed")
+
+    # Intermediate files; on failure also drop partial outputs so they are never reused
+    leftovers = [job['output'] for job in chunk_jobs] + [job['list_path'] for job in join_jobs]
+    if not ok:
+        leftovers += [job['output'] for job in join_jobs]
+    for path in leftovers:
+        if os.path.exists(path):
+            os.remove(path)
+
+    return [job['output'] for job in join_jobs] if ok else None
@@ -0,0 +1,162 @@
+"""
+Persistent media-probe cache
+Lưu metadata video (duration/fps/size/codec) để không phải probe lại file không đổi
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import logging
+
+from .ffmpeg_tools import probe_video
+
+
+logger = logging.getLogger(__name__)
+
+PROBE_CACHE_FILENAME = ".probe_cache.json"
+
+
+def _probe_with_moviepy(path: str) -> Optional[Dict]:
+    """Fallback probe via `ffmpeg -i` when ffprobe is not installed"""
+    try:
+        from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+        infos = ffmpeg_parse_infos(path)
+    except Exception as e:
+        logger.debug(f"   ffmpeg probe failed for {path}: {str(e)}")
+        return None
+
+    if not infos.get('video_found'):
+        return None
+
+    width, height = infos.get('video_size') or (None, None)
+    return {
+        'duration': infos.get('duration') or 0,
+        'video': {
+            'width': width,
+            'height': height,
+            'r_frame_rate': f"{infos.get('video_fps')}/1",
+        },
+        'audio': {'sample_rate': infos.get('audio_fps')} if infos.get('audio_found') else None
+    }
+
+
+class ProbeCache:
+    """Probe results keyed by path + size + mtime, persisted as JSON"""
+
+    def __init__(self, cache_path: str, max_workers: int = 8):
+        """
+        Initialize Probe Cache
+
+        Args:
+            cache_path: JSON file to persist the cache (usually in the project directory)
+            max_workers: Threads used to probe uncached files
+        """
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        self._load()
+
+    def _load(self):
+        """Load cache file if it exists"""
+        if not os.path.exists(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️  Ignoring unreadable probe cache {self.cache_path}: {str(e)}")
+            self._entries = {}
+
+    def save(self):
+        """Write cache to disk if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def _lookup(self, path: str) -> Optional[Dict]:
+        """Return cached info if the file is unchanged"""
+        key = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['info']
+        return None
+
+    def _probe(self, path: str) -> Optional[Dict]:
+        """Probe a file and store the result"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        info = probe_video(path) or _probe_with_moviepy(path)
+        if info is None:
+            return None
+
+        with self._lock:
+            self._entries[os.path.abspath(path)] = {
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'info': info
+            }
+            self._dirty = True
+
+        return info
+
+    def get(self, path: str) -> Optional[Dict]:
+        """
+        Get probe info for a file
+
+        Args:
+            path: Video file path
+
+        Returns:
+            probe_video()-style dict, or None if the file is missing/unreadable
+        """
+        info = self._lookup(path)
+        if info is None:
+            info = self._probe(path)
+            self.save()
+        return info
+
+    def get_many(self, paths: List[str]) -> List[Optional[Dict]]:
+        """
+        Get probe info for many files, probing uncached ones in parallel
+
+        Args:
+            paths: Video file paths
+
+        Returns:
+            List of probe info (None for missing/unreadable files), same order
+        """
+        results = [self._lookup(path) for path in paths]
+        cold = [i for i, info in enumerate(results) if info is None and os.path.exists(paths[i])]
+
+        if cold:
+            logger.info(f"🔍 Probing {len(cold)}/{len(paths)} uncached videos...")
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for i, info in zip(cold, pool.map(self._probe, [paths[i] for i in cold])):
+                    results[i] = info
+            self.save()
+
+        return results
@@ -0,0 +1,112 @@
+"""
+Segment cache for incremental re-assembly
+Lưu các đoạn video trung gian theo hash nội dung để chỉ xử lý lại scene đã thay đổi
+"""
+
+import hashlib
+import json
+import os
+from typing import List
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+class SegmentCache:
+    """Intermediate segments named by content hash, tracked in a manifest"""
+
+    def __init__(self, segment_dir: str):
+        """
+        Initialize Segment Cache
+
+        Args:
+            segment_dir: Directory holding segments and manifest.json
+        """
+        self.segment_dir = segment_dir
+        self.manifest_path = os.path.join(segment_dir, MANIFEST_FILENAME)
+        self.used = set()
+        os.makedirs(segment_dir, exist_ok=True)
+
+        self.manifest = {'sources': {}, 'last_build': []}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.manifest.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️  Ignoring unreadable manifest {self.manifest_path}: {str(e)}")
+
+    def content_hash(self, path: str) -> str:
+        """
+        Get SHA-1 of a file's content (re-hashed only when size/mtime change)
+
+        Args:
+            path: Source video path
+
+        Returns:
+            Hex digest
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.manifest['sources'].get(key)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return entry['sha1']
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+
+        self.manifest['sources'][key] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha1': digest.hexdigest()
+        }
+        return digest.hexdigest()
+
+    def use(self, name: str) -> str:
+        """
+        Mark a segment as part of the current build
+
+        Args:
+            name: Segment file name
+
+        Returns:
+            Full path of the segment (may not exist yet)
+        """
+        self.used.add(name)
+        return os.path.join(self.segment_dir, name)
+
+    def has(self, name: str) -> bool:
+        """Check if a segment was already produced"""
+        return os.path.exists(os.path.join(self.segment_dir, name))
+
+    def record_build(self, scene_hashes: List[str]):
+        """
+        Save the manifest and drop segments the current build did not use
+
+        Args:
+            scene_hashes: Content hashes of the scenes in the build (in order)
+        """
+        keep = self.used | {MANIFEST_FILENAME}
+        removed = 0
+        for name in os.listdir(self.segment_dir):
+            if name not in keep:
+                os.remove(os.path.join(self.segment_dir, name))
+                removed += 1
+
+        changed = len(set(scene_hashes) - set(self.manifest.get('last_build', [])))
+        logger.info(f"🧩 Segments: {changed}/{len(scene_hashes)} scenes changed since last build"
+                    f"{f', removed {removed} stale files' if removed else ''}")
+
+        self.manifest['last_build'] = scene_hashes
+        self.manifest['sources'] = {
+            path: entry for path, entry in self.manifest['sources'].items()
+            if os.path.exists(path)
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
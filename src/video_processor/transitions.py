@@ -0,0 +1,319 @@
+"""
+Boundary-only crossfade rendering
+Chỉ encode lại đoạn chuyển cảnh ngắn, phần giữa mỗi scene được copy nguyên stream
+"""
+
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+import logging
+
+from .ffmpeg_tools import (
+    ENCODERS,
+    find_ffmpeg_with_filters,
+    list_keyframes,
+    probe_video,
+    run_ffmpeg,
+    streams_compatible,
+    write_concat_list,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Boundary segments must match these properties of the stream-copied ranges
+BOUNDARY_MATCH_KEYS = ('codec_name', 'profile', 'level', 'width', 'height', 'pix_fmt', 'r_frame_rate')
+
+
+def render_crossfade(
+    paths: List[str],
+    output_path: str,
+    transition_duration: float = 0.5,
+    probes: Optional[List[Dict]] = None,
+    preset: str = 'medium',
+    crf: int = 18,
+    segment_cache=None,
+    keys: Optional[List[str]] = None
+) -> bool:
+    """
+    Join videos with crossfades, re-encoding only the overlap around each cut
+
+    Each clip is split at keyframes into head / middle / tail. Middles are
+    stream-copied; each tail + next head pair is re-encoded with an xfade.
+    Audio is crossfaded in a single audio-only pass and muxed at the end.
+
+    Args:
+        paths: Input video paths (in order), with identical codec parameters
+        output_path: Output file path
+        transition_duration: Crossfade duration in seconds
+        probes: Optional probe_video() results for the inputs
+        preset: x264/x265 preset for the re-encoded boundaries
+        crf: Quality for the re-encoded boundaries
+        segment_cache: Optional SegmentCache to keep and reuse segments across builds
+        keys: Content hashes of the inputs (required with segment_cache)
+
+    Returns:
+        True if successful, False if caller should fall back to a full re-encode
+    """
+    if len(paths) < 2:
+        return False
+
+    probes = probes or [probe_video(path) for path in paths]
+    if not streams_compatible(probes):
+        return False
+
+    video = probes[0]['video']
+    encoder = ENCODERS.get(video.get('codec_name'))
+    if not encoder:
+        logger.info(f"   ℹ️  No matching encoder for {video.get('codec_name')}")
+        return False
+
+    # Bundled ffmpeg builds may lack the crossfade filters
+    ffmpeg = find_ffmpeg_with_filters(('xfade', 'acrossfade'))
+    if not ffmpeg:
+        logger.info("   ℹ️  No ffmpeg with xfade/acrossfade available")
+        return False
+
+    plan = _plan_cuts(paths, probes, transition_duration)
+    if plan is None:
+        return False
+
+    work_dir = tempfile.mkdtemp(prefix='crossfade_')
+    try:
+        def segment_path(cache_name: str, temp_name: str) -> str:
+            if segment_cache is None:
+                return os.path.join(work_dir, temp_name)
+            return segment_cache.use(cache_name)
+
+        keys = keys or [''] * len(paths)
+        segments = []
+        reused = 0
+        last = len(paths) - 1
+        for i, (path, cut) in enumerate(zip(paths, plan)):
+            # Untouched middle of the scene
+            if cut['tail_start'] - cut['head_end'] > 0:
+                middle = segment_path(
+                    f"{keys[i]}_mid_{int(i > 0)}{int(i < last)}_{transition_duration}.ts",
+                    f"{i:04d}_middle.ts"
+                )
+                if os.path.exists(middle):
+                    reused += 1
+                elif not _copy_range(path, cut['head_end'], cut['tail_start'], middle, ffmpeg):
+                    _discard(middle)
+                    return False
+                segments.append(middle)
+
+            # Crossfade into the next scene
+            if i < last:
+                # Encoder settings are part of the name so changing them re-renders
+                boundary = segment_path(
+                    f"{keys[i]}_{keys[i + 1]}_xfade_{transition_duration}_{encoder}_{preset}_crf{crf}.ts",
+                    f"{i:04d}_xfade.ts"
+                )
+                if os.path.exists(boundary):
+                    reused += 1
+                elif not _encode_boundary(
+                    path, cut,
+                    paths[i + 1], plan[i + 1],
+                    boundary, transition_duration,
+                    encoder, video, preset, crf, ffmpeg
+                ):
+                    _discard(boundary)
+                    return False
+                elif not _boundary_matches(boundary, video):
+                    # Splicing mismatched streams would break playback
+                    _discard(boundary)
+                    return False
+                segments.append(boundary)
+
+        logger.info(f"✨ Rendered {len(segments) - reused} segments, reused {reused} "
+                    f"(only the {last} boundaries are re-encoded)")
+
+        list_path = os.path.join(work_dir, 'segments.txt')
+        write_concat_list(segments, list_path)
+
+        # Keep the source's MP4 timescale rather than the muxer default
+        timescale = []
+        if '/' in (video.get('time_base') or ''):
+            timescale = ['-video_track_timescale', video['time_base'].split('/', 1)[1]]
+
+        if probes[0]['audio'] is None:
+            return run_ffmpeg([
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-c', 'copy', '-movflags', '+faststart',
+                *timescale,
+                output_path
+            ], ffmpeg)
+
+        audio_path = os.path.join(work_dir, 'audio.m4a')
+        if not _crossfade_audio(paths, audio_path, transition_duration, ffmpeg):
+            return False
+
+        return run_ffmpeg([
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-i', audio_path,
+            '-map', '0:v:0', '-map', '1:a:0',
+            '-c', 'copy', '-movflags', '+faststart',
+            *timescale,
+            '-shortest',
+            output_path
+        ], ffmpeg)
+
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _discard(path: str):
+    """Remove a partially written segment so it is never reused"""
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def _plan_cuts(paths: List[str], probes: List[Dict], transition_duration: float) -> Optional[List[Dict]]:
+    """
+    Pick keyframe-aligned cut points for every clip
+
+    Returns:
+        List of {'duration', 'head_end', 'tail_start'} or None if a clip has
+        no keyframes that leave room for the transitions
+    """
+    plan = []
+    last = len(paths) - 1
+
+    for i, (path, probe) in enumerate(zip(paths, probes)):
+        duration = probe['duration']
+        keyframes = list_keyframes(path)
+        if not keyframes or duration <= 2 * transition_duration:
+            logger.info(f"   ℹ️  Cannot plan cuts for {os.path.basename(path)}")
+            return None
+
+        head_end = 0.0
+        if i > 0:
+            later = [k for k in keyframes if k >= transition_duration]
+            head_end = later[0] if later else duration
+
+        tail_start = duration
+        if i < last:
+            earlier = [k for k in keyframes if k <= duration - transition_duration]
+            tail_start = earlier[-1] if earlier else 0.0
+
+        if head_end > tail_start:
+            logger.info(f"   ℹ️  Keyframes too sparse in {os.path.basename(path)}")
+            return None
+
+        plan.append({'duration': duration, 'head_end': head_end, 'tail_start': tail_start})
+
+    return plan
+
+
+def _copy_range(path: str, start: float, end: float, output_path: str, ffmpeg: Optional[str] = None) -> bool:
+    """Stream-copy [start, end) of the video track into an MPEG-TS segment"""
+    return run_ffmpeg([
+        '-ss', f"{start:.6f}",
+        '-i', path,
+        '-t', f"{end - start:.6f}",
+        '-map', '0:v:0',
+        '-c', 'copy',
+        '-avoid_negative_ts', 'make_zero',
+        '-f', 'mpegts',
+        output_path
+    ], ffmpeg)
+
+
+def _encode_boundary(
+    prev_path: str,
+    prev_cut: Dict,
+    next_path: str,
+    next_cut: Dict,
+    output_path: str,
+    transition_duration: float,
+    encoder: str,
+    video: Dict,
+    preset: str,
+    crf: int,
+    ffmpeg: Optional[str] = None
+) -> bool:
+    """Re-encode the previous clip's tail crossfaded into the next clip's head"""
+    tail_length = prev_cut['duration'] - prev_cut['tail_start']
+    head_length = next_cut['head_end']
+    offset = max(tail_length - transition_duration, 0)
+    fps = video.get('r_frame_rate', '30/1')
+    pix_fmt = video.get('pix_fmt', 'yuv420p')
+
+    filter_graph = (
+        f"[0:v]fps={fps},settb=AVTB[a];"
+        f"[1:v]fps={fps},settb=AVTB[b];"
+        f"[a][b]xfade=transition=fade:duration={transition_duration}:offset={offset:.6f},"
+        f"format={pix_fmt}[v]"
+    )
+
+    return run_ffmpeg([
+        '-ss', f"{prev_cut['tail_start']:.6f}", '-t', f"{tail_length:.6f}", '-i', prev_path,
+        '-t', f"{head_length:.6f}", '-i', next_path,
+        '-filter_complex', filter_graph,
+        '-map', '[v]',
+        '-c:v', encoder, '-preset', preset, '-crf', str(crf),
+        *_profile_args(encoder, video),
+        '-pix_fmt', pix_fmt,
+        '-r', fps,
+        '-f', 'mpegts',
+        output_path
+    ], ffmpeg)
+
+
+def _profile_args(encoder: str, video: Dict) -> List[str]:
+    """Encoder options reproducing the source's profile and level"""
+    args = []
+    profile = (video.get('profile') or '').lower()
+    if profile:
+        # ffprobe "Constrained Baseline" / "High 10" -> x264 "baseline" / "high10"
+        profile = profile.replace('constrained ', '').replace(' ', '')
+        args += ['-profile:v', profile]
+
+    level = video.get('level')
+    if isinstance(level, int) and level > 0:
+        # ffprobe reports 40 for H.264 level 4.0 and 120 for HEVC level 4.0
+        value = level / 30 if encoder == 'libx265' else level / 10
+        args += ['-level', f"{value:.1f}"] if encoder == 'libx264' else ['-x265-params', f"level-idc={value:.1f}"]
+    return args
+
+
+def _boundary_matches(path: str, video: Dict) -> bool:
+    """Check a re-encoded boundary against the source stream it is spliced between"""
+    probe = probe_video(path)
+    if not probe or not probe['video']:
+        return False
+
+    for key in BOUNDARY_MATCH_KEYS:
+        expected, actual = video.get(key), probe['video'].get(key)
+        if expected is not None and actual != expected:
+            logger.info(f"   ℹ️  Boundary {key} differs from source: {actual} vs {expected}")
+            return False
+    return True
+
+
+def _crossfade_audio(
+    paths: List[str],
+    output_path: str,
+    transition_duration: float,
+    ffmpeg: Optional[str] = None
+) -> bool:
+    """Crossfade all audio tracks in one audio-only pass"""
+    inputs = []
+    for path in paths:
+        inputs += ['-i', path]
+
+    chain = []
+    previous = '[0:a]'
+    for i in range(1, len(paths)):
+        label = f"[a{i}]"
+        chain.append(f"{previous}[{i}:a]acrossfade=d={transition_duration}{label}")
+        previous = label
+
+    return run_ffmpeg(inputs + [
+        '-filter_complex', ';'.join(chain),
+        '-map', previous,
+        '-c:a', 'aac', '-b:a', '192k',
+        output_path
+    ], ffmpeg)
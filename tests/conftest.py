@@ -0,0 +1,25 @@
+"""
+Make the pure-logic modules importable without the heavy optional dependencies
+
+The package ``__init__`` files pull in playwright, google-generativeai and
+moviepy. When one of those is missing, the package is registered without
+running its ``__init__`` so that submodules which do not need it (card
+index, parsers, caches, rate limiter, ...) can still be imported and tested.
+"""
+
+import importlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for package in ('src.browser_automation', 'src.script_generator', 'src.video_processor'):
+    try:
+        importlib.import_module(package)
+    except ImportError:
+        module = types.ModuleType(package)
+        module.__path__ = [os.path.join(ROOT, *package.split('.'))]
+        sys.modules[package] = module
@@ -0,0 +1,77 @@
+"""Unit tests for CardIndex submission linking and queue accounting"""
+
+from src.browser_automation.card_index import CardIndex
+
+
+def card(card_id, state='queued', percent=None, url=None, text=''):
+    return {'id': card_id, 'state': state, 'percent': percent, 'url': url, 'text': text}
+
+
+def test_submission_linked_by_prompt_text():
+    index = CardIndex()
+    index._apply([card('1', 'ready', url='u1', text='old video')])
+    index.mark_baseline()
+
+    index.submit('a', "A fox in the snow")
+    index.submit('b', "A whale at sea")
+    index._apply([
+        card('1', 'ready', url='u1', text='old video'),
+        card('2', 'progress', 10, text='a whale at sea veo 3.1'),
+        card('3', 'progress', 5, text='a fox in the snow veo 3.1'),
+    ])
+
+    assert index.card_for('a')['id'] == '3'
+    assert index.card_for('b')['id'] == '2'
+
+
+def test_unmatched_submission_linked_by_order():
+    index = CardIndex()
+    index.submit('a', "first prompt")
+    index._apply([card('7', 'progress', 1, text='no prompt shown')])
+
+    assert index.card_for('a')['id'] == '7'
+
+
+def test_pending_counts_unrendered_and_linked_cards():
+    index = CardIndex(max_queue=5)
+    index.submit('a', "first prompt")
+    index.submit('b', "second prompt")
+    assert index.pending_count() == 2
+
+    index._apply([card('1', 'queued', text='first prompt')])
+    assert index.card_for('a')['id'] == '1'
+    # 'a' is linked (queued), 'b' is still unrendered
+    assert index.pending_count() == 2
+    assert index.free_slots() == 3
+
+
+def test_unknown_queued_cards_do_not_fill_the_queue():
+    index = CardIndex(max_queue=5)
+    # Finished cards with blocked media / stale cards from another session look 'queued'
+    index._apply([card(str(i), 'queued', text='other session') for i in range(1, 6)])
+    index.mark_baseline()
+
+    assert index.pending_count() == 0
+    assert index.free_slots() == 5
+
+
+def test_cards_seen_in_progress_keep_counting():
+    index = CardIndex(max_queue=5)
+    index._apply([card('1', 'progress', 40)])
+    index.mark_baseline()
+    # Percent text disappears for a moment before the video loads
+    index._apply([card('1', 'queued')])
+
+    assert index.pending_count() == 1
+
+
+def test_forget_retires_card():
+    index = CardIndex()
+    index.submit('a', "first prompt")
+    index._apply([card('1', 'progress', 50, text='first prompt')])
+    index.forget('a')
+
+    index.submit('b', "second prompt")
+    index._apply([card('1', 'progress', 60, text='first prompt')])
+
+    assert index.card_for('b') is None
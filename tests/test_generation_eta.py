@@ -0,0 +1,49 @@
+"""Unit tests for the completion-time model"""
+
+import json
+
+from src.browser_automation.generation_eta import GenerationETA
+
+
+def write_session(path, durations):
+    events = [{'type': 'scene_complete', 'metadata': {'duration_seconds': d}} for d in durations]
+    events.append({'type': 'scene_start', 'metadata': {}})
+    path.write_text(json.dumps({'events': events}), encoding='utf-8')
+
+
+def test_defaults_until_enough_samples(tmp_path):
+    write_session(tmp_path / "session_1.json", [100, 0, "n/a"])
+    eta = GenerationETA(log_dir=str(tmp_path))
+
+    assert eta.samples == [100.0]
+    assert eta.estimate() == GenerationETA.DEFAULT_ESTIMATE
+
+
+def test_percentiles_from_logs_and_recorded_samples(tmp_path):
+    write_session(tmp_path / "session_1.json", [60, 70, 80, 90])
+    (tmp_path / "session_2.json").write_text("{broken", encoding='utf-8')
+    eta = GenerationETA(log_dir=str(tmp_path), min_samples=5)
+
+    for seconds in (100, 110, 120, 130, 140, 200):
+        eta.record(seconds)
+
+    assert eta.estimate() == {'early': 70.0, 'expected': 110.0, 'late': 200.0}
+
+
+def test_max_samples_keeps_most_recent(tmp_path):
+    eta = GenerationETA(log_dir=str(tmp_path), max_samples=3)
+    for seconds in (1, 2, 3, 4):
+        eta.record(seconds)
+    assert eta.samples == [2.0, 3.0, 4.0]
+
+
+def test_next_interval_phases(tmp_path):
+    eta = GenerationETA(log_dir=str(tmp_path), dense_interval=2, max_interval=30)
+    # Defaults: early 90s, late 300s
+
+    assert eta.next_interval(0) == 30        # long cheap sleep, capped
+    assert eta.next_interval(85) == 5        # wake just before the earliest finish
+    assert eta.next_interval(150) == 2       # dense checks
+    assert eta.next_interval(330) == 4       # backing off when overdue
+    assert eta.next_interval(150, remaining=0.5) == 0.5
+    assert eta.next_interval(150, remaining=-1) == 0
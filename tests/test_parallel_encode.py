@@ -0,0 +1,53 @@
+"""Parallel chunk encoding must keep the frame count and duration of a single pass"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from src.video_processor.parallel_encode import normalize_clips, plan_chunks
+
+pytestmark = pytest.mark.skipif(
+    shutil.which('ffmpeg') is None or shutil.which('ffprobe') is None,
+    reason="ffmpeg/ffprobe not installed"
+)
+
+
+def make_source(path, rate, seconds, gop):
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"testsrc=size=320x240:rate={rate}",
+        '-t', str(seconds),
+        '-c:v', 'libx264', '-g', str(gop), '-pix_fmt', 'yuv420p',
+        str(path)
+    ], check=True)
+
+
+def frames_and_duration(path):
+    result = subprocess.run([
+        'ffprobe', '-v', 'error', '-count_frames', '-select_streams', 'v:0',
+        '-show_entries', 'stream=nb_read_frames:format=duration', '-of', 'json',
+        str(path)
+    ], capture_output=True, text=True, check=True)
+    info = json.loads(result.stdout)
+    return int(info['streams'][0]['nb_read_frames']), float(info['format']['duration'])
+
+
+@pytest.mark.parametrize('rate, fps', [('24', 30), ('30000/1001', 25), ('30000/1001', 30)])
+def test_chunked_encode_matches_source(tmp_path, rate, fps):
+    source = tmp_path / "source.mp4"
+    seconds = 8
+    # Keyframes off whole seconds / frame-grid points of the target rate
+    make_source(source, rate, seconds, gop=29)
+    assert len(plan_chunks(str(source), seconds, chunk_seconds=1.5)) > 2
+
+    outputs = normalize_clips(
+        [str(source)], str(tmp_path / "work"), size=(320, 240), fps=fps,
+        workers=2, chunk_seconds=1.5, preset='ultrafast'
+    )
+    assert outputs
+
+    frames, duration = frames_and_duration(outputs[0])
+    assert frames == round(seconds * fps)
+    assert abs(duration - seconds) <= 1.5 / fps
@@ -0,0 +1,57 @@
+"""Unit tests for the persistent probe cache (ffprobe is stubbed out)"""
+
+import os
+
+from src.video_processor import probe_cache
+from src.video_processor.probe_cache import ProbeCache
+
+
+def fake_probe(calls):
+    def probe(path):
+        calls.append(path)
+        return {'duration': 8.0, 'video': {'width': 1280, 'height': 720, 'r_frame_rate': '24/1'}, 'audio': None}
+    return probe
+
+
+def write(path, data=b'video'):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_unchanged_files_are_probed_once(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(probe_cache, 'probe_video', fake_probe(calls))
+    videos = [write(tmp_path / f"scene_{i}.mp4") for i in (1, 2)]
+    cache_path = str(tmp_path / ".probe_cache.json")
+
+    assert [info['duration'] for info in ProbeCache(cache_path).get_many(videos)] == [8.0, 8.0]
+    assert len(calls) == 2
+
+    # A new instance reads the persisted entries
+    assert ProbeCache(cache_path).get(videos[0])['duration'] == 8.0
+    assert len(calls) == 2
+
+
+def test_changed_file_is_probed_again(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(probe_cache, 'probe_video', fake_probe(calls))
+    video = write(tmp_path / "scene_1.mp4")
+    cache = ProbeCache(str(tmp_path / ".probe_cache.json"))
+
+    cache.get(video)
+    write(video, b'regenerated video')
+    cache.get(video)
+
+    assert len(calls) == 2
+
+
+def test_missing_files_and_unreadable_cache(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(probe_cache, 'probe_video', fake_probe(calls))
+    cache_path = write(tmp_path / ".probe_cache.json", b'{not json')
+
+    cache = ProbeCache(cache_path)
+    assert cache.get_many([str(tmp_path / "missing.mp4")]) == [None]
+    assert calls == []
+    assert os.path.exists(cache_path)
@@ -0,0 +1,52 @@
+"""Unit tests for the Gemini rate limiter"""
+
+import time
+
+from src.script_generator.rate_limiter import RateLimiter, TokenBucket, is_rate_limited
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+class ApiError(Exception):
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def test_bucket_hands_out_burst_then_waits():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    bucket.acquire()
+    bucket.acquire()
+    assert time.monotonic() - start < 0.04
+
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.04
+
+
+def test_pause_blocks_acquire():
+    bucket = TokenBucket(rate=1000)
+    bucket.pause(0.1)
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_limiter_clamps_large_token_estimates():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600)
+    start = time.monotonic()
+    # More than the bucket can ever hold must not block forever
+    limiter.acquire(tokens=10_000)
+    assert time.monotonic() - start < 1
+
+
+def test_rate_limit_detected_by_code_or_type():
+    assert is_rate_limited(ApiError("quota exceeded", code=429))
+    assert is_rate_limited(ResourceExhausted("quota"))
+
+
+def test_other_errors_mentioning_429_are_not_rate_limits():
+    assert not is_rate_limited(ValueError("scene 429 is missing"))
+    assert not is_rate_limited(ApiError("bad request for item 429", code=400))
@@ -0,0 +1,50 @@
+"""Unit tests for the on-disk Gemini response cache"""
+
+import os
+import time
+
+from src.script_generator.response_cache import ResponseCache
+
+
+def test_key_depends_on_model_prompt_and_config():
+    key = ResponseCache.make_key("gemini", "prompt", {'temperature': 0.7, 'top_p': 1})
+    assert key == ResponseCache.make_key("gemini", "prompt", {'top_p': 1, 'temperature': 0.7})
+    assert key != ResponseCache.make_key("gemini", "prompt", {'temperature': 0.8, 'top_p': 1})
+    assert key != ResponseCache.make_key("other", "prompt", {'temperature': 0.7, 'top_p': 1})
+    assert ResponseCache.make_key("gemini", "p") == ResponseCache.make_key("gemini", "p", {})
+
+
+def test_round_trip_and_invalidate(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    key = ResponseCache.make_key("gemini", "kịch bản")
+    assert cache.get(key) is None
+
+    cache.set(key, '{"title": "Cáo"}')
+    assert cache.get(key) == '{"title": "Cáo"}'
+
+    cache.invalidate(key)
+    assert cache.get(key) is None
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=1)
+    cache.set("k", "text")
+    cache.ttl = 0.01
+    time.sleep(0.05)
+
+    assert cache.get("k") is None
+    assert not os.path.exists(tmp_path / "k.json")
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10_000_000)
+    for i, key in enumerate(("old", "used", "new")):
+        cache.set(key, "x" * 1000)
+        os.utime(tmp_path / f"{key}.json", (1000 + i, 1000 + i))
+    assert cache.get("old")  # A hit makes it the most recently used
+
+    cache.max_bytes = 2500
+    cache.set("newest", "x" * 1000)
+
+    assert cache.get("used") is None
+    assert cache.get("old") and cache.get("newest")
@@ -0,0 +1,74 @@
+"""Unit tests for SceneScheduler queue accounting (no browser needed)"""
+
+import asyncio
+
+from src.browser_automation.scene_scheduler import SceneScheduler
+
+
+URL = "https://storage.googleapis.com/ai-sandbox-videofx/video/0123-abcd"
+
+
+class FakePage:
+    def __init__(self):
+        self.cards = []
+
+    async def evaluate(self, script, *args):
+        return self.cards
+
+
+class FakeController:
+    def __init__(self):
+        self.page = FakePage()
+
+    async def get_video_urls(self):
+        return set()
+
+
+def test_url_fallback_frees_queue_slot():
+    async def scenario():
+        scheduler = SceneScheduler(FakeController(), max_in_flight=5)
+        scheduler._slots = asyncio.Semaphore(5)
+        scheduler._download_queue = asyncio.Queue()
+
+        job = scheduler._new_job(1, {'veo_prompt': "a red fox in the snow"}, "test")
+        await scheduler._slots.acquire()
+        scheduler._in_flight.append(job)
+        job['submitted_at'] = 0
+        scheduler.cards.submit(job['key'], job['prompt'])
+        assert scheduler.cards.pending_count() == 1
+
+        # No card was ever linked; the job finishes from a loose URL
+        scheduler._finish_generation(job, video_url=URL)
+
+        assert scheduler.cards.pending_count() == 0
+        assert scheduler.cards.free_slots() == 5
+        assert job['status'] == 'downloading'
+
+    asyncio.run(scenario())
+
+
+
+def test_download_error_fails_job_and_keeps_worker_alive():
+    class BrokenDownloads(FakeController):
+        async def download_video(self, url, filename):
+            if 'broken' in url:
+                raise RuntimeError("new_page failed")
+            return f"/tmp/{filename}"
+
+    async def scenario():
+        scheduler = SceneScheduler(BrokenDownloads())
+        scheduler._download_queue = asyncio.Queue()
+        jobs = [scheduler._new_job(i, {'veo_prompt': f"scene {i}"}, "test") for i in (1, 2)]
+        jobs[0]['video_url'] = URL + "-broken"
+        jobs[1]['video_url'] = URL
+        for job in jobs:
+            scheduler._download_queue.put_nowait(job)
+        scheduler._download_queue.put_nowait(None)
+
+        await scheduler._download_worker(0)
+
+        assert jobs[0]['status'] == 'failed'
+        assert "new_page failed" in jobs[0]['error']
+        assert jobs[1]['status'] == 'success'
+
+    asyncio.run(scenario())
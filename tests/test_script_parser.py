@@ -0,0 +1,51 @@
+"""Unit tests for tolerant script parsing and scene validation"""
+
+import json
+
+import pytest
+
+from src.script_generator.script_parser import salvage_script, validate_scene
+
+
+def scene(number, **fields):
+    return {'scene_number': number, 'duration': 8, 'description': "d", 'veo_prompt': "p", **fields}
+
+
+def test_complete_fenced_script():
+    text = "```json\n" + json.dumps({'title': "T", 'scenes': [scene(1)]}) + "\n```"
+    script = salvage_script(text)
+    assert script['truncated'] is False
+    assert script['title'] == "T"
+
+
+def test_truncated_script_keeps_complete_scenes_and_header():
+    full = json.dumps({'title': "Tiêu \\\"đề\\\"", 'style': "cinematic", 'scenes': [scene(1), scene(2)]},
+                      ensure_ascii=False)
+    script = salvage_script(full[:full.rindex('{') + 20])
+
+    assert script['truncated'] is True
+    assert [s['scene_number'] for s in script['scenes']] == [1]
+    assert script['title'] == json.loads(full)['title']
+    assert script['style'] == "cinematic"
+
+
+def test_nothing_recoverable_raises():
+    with pytest.raises(ValueError):
+        salvage_script('{"title": "T", "scenes": [{"scene_number": 1, "desc')
+
+
+def test_valid_scene_and_numeric_string_coercion():
+    s = scene("3")
+    assert validate_scene(s) == []
+    assert s['scene_number'] == 3
+
+
+@pytest.mark.parametrize('bad, problem', [
+    (scene(1, veo_prompt=""), "missing veo_prompt"),
+    (scene(True), "scene_number has wrong type (bool)"),
+    (scene(1, duration="8"), "duration has wrong type (str)"),
+    (scene(1, duration=0), "duration must be positive"),
+    ("scene", "not an object"),
+])
+def test_invalid_scenes(bad, problem):
+    assert problem in validate_scene(bad)
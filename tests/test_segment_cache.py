@@ -0,0 +1,49 @@
+"""Unit tests for the incremental re-assembly segment cache"""
+
+import hashlib
+import os
+
+from src.video_processor.segment_cache import MANIFEST_FILENAME, SegmentCache
+
+
+def test_content_hash_is_reused_until_file_changes(tmp_path):
+    video = tmp_path / "scene_1.mp4"
+    video.write_bytes(b"frames")
+    cache = SegmentCache(str(tmp_path / "segments"))
+
+    assert cache.content_hash(str(video)) == hashlib.sha1(b"frames").hexdigest()
+
+    # Unchanged size/mtime: the manifest entry is trusted without re-reading
+    cache.manifest['sources'][os.path.abspath(video)]['sha1'] = "cached"
+    assert cache.content_hash(str(video)) == "cached"
+
+    video.write_bytes(b"new frames")
+    assert cache.content_hash(str(video)) == hashlib.sha1(b"new frames").hexdigest()
+
+
+def test_record_build_removes_unused_segments_and_persists(tmp_path):
+    video = tmp_path / "scene_1.mp4"
+    video.write_bytes(b"frames")
+    segment_dir = tmp_path / "segments"
+    cache = SegmentCache(str(segment_dir))
+    scene_hash = cache.content_hash(str(video))
+
+    for name in ("kept.mp4", "stale.mp4"):
+        (segment_dir / name).write_bytes(b"x")
+    cache.use("kept.mp4")
+    cache.record_build([scene_hash])
+
+    assert sorted(os.listdir(segment_dir)) == sorted([MANIFEST_FILENAME, "kept.mp4"])
+    reloaded = SegmentCache(str(segment_dir))
+    assert reloaded.has("kept.mp4") and not reloaded.has("stale.mp4")
+    assert reloaded.manifest['last_build'] == [scene_hash]
+    assert os.path.abspath(video) in reloaded.manifest['sources']
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    segment_dir = tmp_path / "segments"
+    segment_dir.mkdir()
+    (segment_dir / MANIFEST_FILENAME).write_text("{broken", encoding='utf-8')
+
+    cache = SegmentCache(str(segment_dir))
+    assert cache.manifest == {'sources': {}, 'last_build': []}
@@ -0,0 +1,52 @@
+"""Unit tests for streaming scene extraction"""
+
+import json
+
+from src.script_generator.stream_parser import SceneStreamParser, ScriptStream
+
+
+SCRIPT = {
+    'title': "Fox",
+    'scenes': [
+        {'scene_number': 1, 'description': "a {curly} \"quoted\" scene", 'veo_prompt': "fox }"},
+        {'scene_number': 2, 'description': "second", 'veo_prompt': "snow"},
+    ]
+}
+
+
+def test_scenes_emitted_as_soon_as_complete():
+    text = json.dumps(SCRIPT)
+    parser = SceneStreamParser()
+    emitted = []
+    # Feed in tiny chunks so braces inside strings straddle chunk boundaries
+    for i in range(0, len(text), 3):
+        emitted.append([s['scene_number'] for s in parser.feed(text[i:i + 3])])
+
+    flat = [n for chunk in emitted for n in chunk]
+    assert flat == [1, 2]
+    assert parser.done
+    first = next(i for i, chunk in enumerate(emitted) if chunk)
+    assert first < len(emitted) - 2
+
+
+def test_malformed_element_is_skipped():
+    parser = SceneStreamParser()
+    scenes = parser.feed('{"scenes": [{"scene_number": 1, "x": tru}, {"scene_number": 2}]')
+    assert [s['scene_number'] for s in scenes] == [2]
+
+
+def test_script_stream_adds_scenes_only_in_final_script():
+    text = json.dumps({'scenes': SCRIPT['scenes'][:1]})
+    final = dict(SCRIPT)
+    stream = ScriptStream([text[:10], text[10:]], finish=lambda _: final)
+
+    assert [s['scene_number'] for s in stream] == [1, 2]
+    assert stream.script is final
+
+
+def test_script_stream_accept_filters_streamed_scenes():
+    text = json.dumps(SCRIPT)
+    stream = ScriptStream([text], finish=json.loads, accept=lambda s: s['scene_number'] != 1)
+
+    # Rejected while streaming, then yielded from the final script
+    assert [s['scene_number'] for s in stream] == [2, 1]